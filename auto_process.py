@@ -5,7 +5,7 @@
 获取->解析打印->清空
 """
 
-import requests
+import http_client
 
 BASE_URL = "https://aliyun.ideapool.club/datapost"
 #BASE_URL = "http://127.0.0.1:8000/datapost"
@@ -13,7 +13,7 @@ BASE_URL = "https://aliyun.ideapool.club/datapost"
 def main():
     print("\n1. 获取数据...")
     try:
-        response = requests.get(f"{BASE_URL}/voice/list/")
+        response = http_client.get(f"{BASE_URL}/voice/list/")
         if response.status_code == 200:
             data = response.json()
             if data.get('status') == 'success':
@@ -45,7 +45,7 @@ def main():
     if items:
         print(f"\n3. 清空 {len(items)} 条数据...")
         try:
-            response = requests.get(f"{BASE_URL}/voice/clear/")
+            response = http_client.get(f"{BASE_URL}/voice/clear/")
             print(f"状态码: {response.status_code}")
             
             if response.status_code == 200:
@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+语音合成自动化流程压测脚本
+在本地启动假的队列API（/voice/list|delete|clear）、假的Gradio页面和假的文件上传服务，
+假Gradio在可配置的延迟后把预先生成的WAV写入临时目录（模拟GPU合成），
+然后在临时工作目录中运行 input_textarea_win.py 的 main() 循环，统计每分钟处理的任务数和各阶段耗时
+
+用法示例：
+    python benchmark_voice_pipeline.py --jobs 20 --delay 0.5
+    python benchmark_voice_pipeline.py --jobs 10 --backend browser --rate 0.5
+"""
+
+import argparse
+import contextlib
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import wave
+import _thread
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, unquote
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 假Gradio页面，元素的class与 config_win.json 中的选择器一致
+FAKE_GRADIO_PAGE = """<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>Fake CosyVoice</title></head>
+<body>
+<textarea class="scroll-hide svelte-1f354aw"></textarea>
+<textarea class="scroll-hide svelte-1f354aw"></textarea>
+<textarea class="scroll-hide svelte-1f354aw"></textarea>
+<div class="svelte-b0hvie"><input type="file" accept="audio/*"></div>
+<button class="lg secondary svelte-cmf5ev">随机种子</button>
+<button class="lg secondary svelte-cmf5ev" id="generate">生成音频</button>
+<script>
+document.querySelectorAll("input[type='file']").forEach(function(input) {
+    input.addEventListener('change', function() {
+        input.parentNode.appendChild(document.createElement('audio'));
+    });
+});
+document.getElementById('generate').addEventListener('click', function() {
+    var texts = [].map.call(document.querySelectorAll('textarea'), function(t) { return t.value; });
+    fetch('/generate', {method: 'POST', headers: {'Content-Type': 'application/json'}, body: JSON.stringify({texts: texts})});
+});
+</script>
+</body>
+</html>
+"""
+
+def write_canned_wav(file_path, seconds=2.0, sample_rate=22050):
+    """
+    生成一段静音WAV，作为假Gradio的合成结果和音色提示音频
+
+    Args:
+        file_path: 保存路径
+        seconds: 时长（秒）
+        sample_rate: 采样率
+    """
+    with wave.open(file_path, 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(b'\x00\x00' * int(seconds * sample_rate))
+
+def start_server(handler_class, state):
+    """
+    在后台线程中启动HTTP服务（随机端口）
+
+    Args:
+        handler_class: 请求处理类
+        state: 服务共享状态，处理类通过 self.server.state 访问
+
+    Returns:
+        ThreadingHTTPServer: 已启动的服务
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler_class)
+    server.daemon_threads = True
+    server.state = state
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+class JsonHandler(BaseHTTPRequestHandler):
+    """返回JSON的请求处理基类"""
+
+    def send_json(self, data, status=200):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_not_found(self):
+        self.send_json({"status": "error", "message": "not found"}, 404)
+
+    def read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def log_message(self, format, *args):
+        pass
+
+class FakeQueueApiHandler(JsonHandler):
+    """假的队列API：/voice/list/、/voice/delete/<id>/、/voice/clear/，其余接口（租约、SSE）返回404"""
+
+    def do_GET(self):
+        state = self.server.state
+        path = urlparse(self.path).path
+        if path == '/voice/list/':
+            with state["lock"]:
+                state["list_calls"] += 1
+                items = list(state["items"])
+            return self.send_json({"status": "success", "total_count": len(items), "items": items})
+        if path == '/voice/clear/':
+            with state["lock"]:
+                state["items"].clear()
+            return self.send_json({"status": "success", "message": "cleared"})
+        self.send_not_found()
+
+    def do_POST(self):
+        state = self.server.state
+        parts = urlparse(self.path).path.strip('/').split('/')
+        if len(parts) == 3 and parts[:2] == ['voice', 'delete']:
+            self.read_body()
+            with state["lock"]:
+                before = len(state["items"])
+                state["items"] = [item for item in state["items"] if str(item["id"]) != parts[2]]
+                if len(state["items"]) < before:
+                    state["deleted"].append(time.monotonic())
+            return self.send_json({"status": "success", "message": "deleted"})
+        self.send_not_found()
+
+class FakeGradioHandler(JsonHandler):
+    """假的Gradio服务：浏览器页面（/ 和 /generate）以及HTTP接口（/config、/upload、/queue/join、/queue/data、/file=）"""
+
+    def do_GET(self):
+        state = self.server.state
+        parsed = urlparse(self.path)
+        if parsed.path == '/':
+            body = FAKE_GRADIO_PAGE.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if parsed.path == '/config':
+            return self.send_json({
+                "version": "fake",
+                "protocol": "sse_v3",
+                "dependencies": [{"id": 0, "api_name": "generate_audio", "targets": [[1, "click"]]}]
+            })
+        if parsed.path == '/queue/data':
+            session_hash = parse_qs(parsed.query).get('session_hash', [''])[0]
+            with state["lock"]:
+                event_id = state["events"].pop(session_hash, None)
+            return self.stream_job(event_id)
+        if parsed.path.startswith('/file='):
+            return self.send_file(unquote(parsed.path[len('/file='):]))
+        self.send_not_found()
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        body = self.read_body()
+        if path == '/generate':
+            threading.Thread(target=generate_audio, args=(self.server.state,), daemon=True).start()
+            return self.send_json({"status": "queued"})
+        if path == '/upload':
+            return self.send_json([f"/tmp/fake_upload_{uuid.uuid4().hex}.wav"])
+        if path == '/queue/join':
+            event_id = uuid.uuid4().hex
+            with self.server.state["lock"]:
+                self.server.state["events"][json.loads(body).get("session_hash")] = event_id
+            return self.send_json({"event_id": event_id})
+        self.send_not_found()
+
+    def stream_job(self, event_id):
+        """按Gradio SSE协议返回任务进度和结果"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+        self.wfile.write(f'data: {json.dumps({"msg": "process_starts", "event_id": event_id})}\n\n'.encode('utf-8'))
+        self.wfile.flush()
+
+        audio_path = generate_audio(self.server.state)
+        host, port = self.server.server_address[:2]
+        output = {"path": audio_path, "url": f"http://{host}:{port}/file={audio_path}"}
+        message = {"msg": "process_completed", "event_id": event_id, "success": True, "output": {"data": [output]}}
+        self.wfile.write(f'data: {json.dumps(message)}\n\n'.encode('utf-8'))
+        self.wfile.flush()
+
+    def send_file(self, file_path):
+        if not os.path.isfile(file_path):
+            return self.send_not_found()
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        self.send_response(200)
+        self.send_header('Content-Type', 'audio/wav')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+def generate_audio(state):
+    """
+    模拟GPU合成：等待配置的延迟后，把预先生成的WAV写入Gradio临时目录下的新文件夹
+
+    Args:
+        state: 假Gradio服务状态
+
+    Returns:
+        str: 生成的音频路径
+    """
+    time.sleep(state["delay"])
+    folder = os.path.join(state["temp_dir"], uuid.uuid4().hex)
+    os.makedirs(folder, exist_ok=True)
+    audio_path = os.path.join(folder, "audio.wav")
+    shutil.copyfile(state["canned_wav"], audio_path)
+    with state["lock"]:
+        state["generated"] += 1
+    return audio_path
+
+class FakeFileServerHandler(JsonHandler):
+    """假的文件上传服务：/api/upload/ 接收multipart上传，断点续传接口返回404"""
+
+    def do_POST(self):
+        state = self.server.state
+        if urlparse(self.path).path == '/api/upload/':
+            body = self.read_body()
+            with state["lock"]:
+                state["uploads"] += 1
+                state["bytes"] += len(body)
+            return self.send_json({"status": "success", "message": "uploaded"})
+        self.send_not_found()
+
+    def do_HEAD(self):
+        self.send_response(404)
+        self.end_headers()
+
+def deep_update(target, overrides):
+    """递归合并配置字典"""
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            deep_update(target[key], value)
+        else:
+            target[key] = value
+    return target
+
+def prepare_workdir(workdir, args, api_url, gradio_url, upload_url):
+    """
+    在工作目录中生成音色文件、paths_windows.txt 和指向本地假服务的 config_win.json
+
+    Args:
+        workdir: 工作目录
+        args: 命令行参数
+        api_url: 假队列API地址
+        gradio_url: 假Gradio地址
+        upload_url: 假文件服务地址
+
+    Returns:
+        str: Gradio临时目录
+    """
+    text_dir = os.path.join(workdir, "voices", "text")
+    audio_dir = os.path.join(workdir, "voices", "audio")
+    temp_dir = os.path.join(workdir, "gradio_tmp")
+    for directory in (text_dir, audio_dir, temp_dir):
+        os.makedirs(directory, exist_ok=True)
+
+    for index in range(args.voices):
+        with open(os.path.join(text_dir, f"voice{index}.txt"), 'w', encoding='utf-8') as f:
+            f.write(f"这是第{index}个音色的提示文本。")
+        write_canned_wav(os.path.join(audio_dir, f"voice{index}.wav"), seconds=3)
+    with open(os.path.join(workdir, "content.txt"), 'w', encoding='utf-8') as f:
+        f.write("压测默认文本")
+
+    with open(os.path.join(workdir, "paths_windows.txt"), 'w', encoding='utf-8') as f:
+        f.write(f"text_file_1={os.path.join(workdir, 'content.txt')}\n")
+        f.write(f"text_file_2={os.path.join(text_dir, 'voice0.txt')}\n")
+        f.write(f"audio_file_1={os.path.join(audio_dir, 'voice0.wav')}\n")
+        f.write(f"temp_directory={temp_dir}\n")
+
+    with open(os.path.join(SCRIPT_DIR, "config_win.json"), 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    deep_update(config, {
+        "url": gradio_url,
+        "backup_urls": [],
+        "backend": args.backend,
+        "api": {"base_url": api_url, "lease": {"enabled": False}},
+        "upload": {"server_url": upload_url, "resumable": {"enabled": False}},
+        "browser": {"headless": True, "driver_path": args.driver_path},
+        "monitoring": {"max_wait_time": 120, "no_update_timeout": 30},
+        "output": {"directory": os.path.join(workdir, "data"), "wait_before_close": 0},
+        "timeouts": {"observe_time": 0},
+        "pipeline": {"enabled": not args.no_pipeline},
+        "metrics": {"enabled": False},
+        "tracing": {"print_tree": False, "summary_every": 0}
+    })
+    with open(os.path.join(workdir, "config_win.json"), 'w', encoding='utf-8') as f:
+        json.dump(config, f, ensure_ascii=False, indent=4)
+
+    return temp_dir
+
+def feed_jobs(api_state, args):
+    """
+    按到达速率向假队列中加入任务（rate为0时一次性全部加入）
+
+    Args:
+        api_state: 假队列API状态
+        args: 命令行参数
+    """
+    for index in range(args.jobs):
+        item = {
+            "id": index + 1,
+            "voice": f"voice{index % args.voices}",
+            "outfile": f"bench_{index + 1}.wav",
+            "content": f"压测任务第{index + 1}条：" + "语音合成测试文本。" * args.text_repeat
+        }
+        with api_state["lock"]:
+            api_state["items"].append(item)
+            api_state["added"].append(time.monotonic())
+        if args.rate > 0:
+            time.sleep(1.0 / args.rate)
+
+def stop_when_done(api_state, args, deadline):
+    """所有任务都被删除（或超时）后中断主线程中的 main() 循环"""
+    while time.monotonic() < deadline:
+        with api_state["lock"]:
+            if len(api_state["deleted"]) >= args.jobs:
+                break
+        time.sleep(0.1)
+    _thread.interrupt_main()
+
+def get_percentile(sorted_values, percent):
+    """按最近秩法计算分位数"""
+    rank = max(1, int(math.ceil(percent / 100.0 * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+def parse_arguments():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='使用本地假服务压测语音合成自动化流程')
+    parser.add_argument('--jobs', type=int, default=20, help='任务数量（默认20）')
+    parser.add_argument('--rate', type=float, default=0, help='任务到达速率（条/秒），0表示一次性全部加入队列')
+    parser.add_argument('--delay', type=float, default=0.5, help='假Gradio每条任务的合成耗时（秒，默认0.5）')
+    parser.add_argument('--voices', type=int, default=2, help='轮流使用的音色数量（默认2）')
+    parser.add_argument('--text-repeat', type=int, default=20, help='每条任务文本的重复段数，用于控制文本长度（默认20）')
+    parser.add_argument('--backend', choices=['http', 'browser'], default='http', help='执行后端（browser需要本机安装Chrome，默认http）')
+    parser.add_argument('--driver-path', default='', help='ChromeDriver路径（browser后端）')
+    parser.add_argument('--no-pipeline', action='store_true', help='关闭流水线模式，按顺序逐条处理')
+    parser.add_argument('--timeout', type=float, default=600, help='整体超时时间（秒，默认600）')
+    parser.add_argument('--json', dest='json_path', help='把压测结果另存为JSON文件')
+    parser.add_argument('--keep', action='store_true', help='保留临时工作目录')
+    parser.add_argument('--verbose', action='store_true', help='显示自动化流程的完整输出（默认写入工作目录的 run.log）')
+    return parser.parse_args()
+
+def main():
+    """主函数"""
+    args = parse_arguments()
+    sys.path.insert(0, SCRIPT_DIR)
+    import input_textarea_win as automation
+
+    workdir = tempfile.mkdtemp(prefix="voice_bench_")
+    canned_wav = os.path.join(workdir, "canned.wav")
+    write_canned_wav(canned_wav)
+
+    api_state = {"lock": threading.Lock(), "items": [], "added": [], "deleted": [], "list_calls": 0}
+    gradio_state = {"lock": threading.Lock(), "events": {}, "generated": 0, "delay": args.delay,
+                    "canned_wav": canned_wav, "temp_dir": os.path.join(workdir, "gradio_tmp")}
+    upload_state = {"lock": threading.Lock(), "uploads": 0, "bytes": 0}
+
+    api_server = start_server(FakeQueueApiHandler, api_state)
+    gradio_server = start_server(FakeGradioHandler, gradio_state)
+    upload_server = start_server(FakeFileServerHandler, upload_state)
+    api_url = f"http://127.0.0.1:{api_server.server_address[1]}"
+    gradio_url = f"http://127.0.0.1:{gradio_server.server_address[1]}/"
+    upload_url = f"http://127.0.0.1:{upload_server.server_address[1]}"
+    prepare_workdir(workdir, args, api_url, gradio_url, upload_url)
+
+    print(f"🧪 压测工作目录: {workdir}")
+    print(f"   任务数: {args.jobs}，到达速率: {args.rate or '一次性'}，合成耗时: {args.delay}秒，后端: {args.backend}，"
+          f"流水线: {'关闭' if args.no_pipeline else '开启'}")
+
+    threading.Thread(target=feed_jobs, args=(api_state, args), daemon=True).start()
+    threading.Thread(target=stop_when_done, args=(api_state, args, time.monotonic() + args.timeout), daemon=True).start()
+
+    original_cwd = os.getcwd()
+    original_argv = sys.argv
+    log_path = os.path.join(workdir, "run.log")
+    os.chdir(workdir)
+    sys.argv = ["input_textarea_win.py", "-a", "--api-loop", "--api-fast", "--api-interval", "1", "--api-wait", "2"]
+    try:
+        with open(log_path, 'w', encoding='utf-8') as log_file:
+            output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(log_file)
+            with output:
+                try:
+                    automation.main()
+                except KeyboardInterrupt:
+                    pass
+    finally:
+        os.chdir(original_cwd)
+        sys.argv = original_argv
+        api_server.shutdown()
+        gradio_server.shutdown()
+        upload_server.shutdown()
+
+    with api_state["lock"]:
+        added = list(api_state["added"])
+        deleted = sorted(api_state["deleted"])
+    completed = len(deleted)
+    elapsed = (deleted[-1] - added[0]) if deleted and added else 0
+    stage_percentiles = automation.get_stage_percentiles()
+
+    result = {
+        "jobs": args.jobs,
+        "completed": completed,
+        "elapsed_seconds": round(elapsed, 3),
+        "jobs_per_minute": round(completed / elapsed * 60, 2) if elapsed > 0 else 0,
+        "generation_delay": args.delay,
+        "backend": args.backend,
+        "pipeline": not args.no_pipeline,
+        "api_list_calls": api_state["list_calls"],
+        "generated": gradio_state["generated"],
+        "uploads": upload_state["uploads"],
+        "upload_bytes": upload_state["bytes"],
+        "stages": {
+            name: {key: round(value, 4) for key, value in stats.items()}
+            for name, stats in stage_percentiles.items()
+        }
+    }
+
+    print(f"\n{'='*60}")
+    print("压测结果")
+    print(f"{'='*60}")
+    print(f"完成任务: {completed}/{args.jobs}")
+    print(f"耗时: {result['elapsed_seconds']:.2f}秒（第一条任务入队到最后一条任务确认）")
+    print(f"吞吐量: {result['jobs_per_minute']:.2f} 条/分钟")
+    print(f"理论上限（仅合成耗时）: {60.0 / args.delay:.2f} 条/分钟" if args.delay > 0 else "理论上限: 无")
+    print(f"API列表请求: {result['api_list_calls']} 次，上传: {result['uploads']} 次 / {result['upload_bytes']} 字节")
+    if stage_percentiles:
+        print("\n各阶段耗时（秒）:")
+        for name, stats in stage_percentiles.items():
+            print(f"  {name}: n={stats['count']} p50={stats['p50']:.3f} p95={stats['p95']:.3f} p99={stats['p99']:.3f}")
+    print(f"{'='*60}")
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存: {args.json_path}")
+
+    if args.keep:
+        print(f"工作目录已保留: {workdir}（完整输出见 run.log）")
+    else:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return 0 if completed == args.jobs else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享HTTP客户端
+所有API请求、文件上传和下载复用同一个带连接池的会话（keep-alive），
+避免每次请求都重新建立TCP+TLS连接；按接口类型配置超时时间
+"""
+
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+# 默认配置，可通过 configure() 使用 config["http"] 覆盖
+DEFAULT_HTTP_CONFIG = {
+    "pool_connections": 10,  # 缓存连接池的主机数
+    "pool_maxsize": 20,  # 每个主机保持的最大连接数（工作池并发时需不小于线程数）
+    "max_retries": 0,  # 连接失败时的自动重试次数（上传等已有自己的重试逻辑）
+    "user_agent": "",  # 为空时使用requests默认值
+    "timeouts": {
+        "api": 10,
+        "upload": 60,
+        "gradio": 30,
+        "download": 60
+    }
+}
+
+_http_config = dict(DEFAULT_HTTP_CONFIG)
+_session = None
+_session_lock = threading.Lock()
+
+def configure(http_config=None):
+    """
+    使用配置文件中的 http 配置重新创建共享会话
+
+    Args:
+        http_config: HTTP配置（config["http"]），未提供的项使用默认值
+    """
+    global _http_config, _session
+
+    merged = dict(DEFAULT_HTTP_CONFIG)
+    merged.update(http_config or {})
+    merged["timeouts"] = dict(DEFAULT_HTTP_CONFIG["timeouts"], **(http_config or {}).get("timeouts", {}))
+
+    with _session_lock:
+        # 配置未变化时继续使用已有连接
+        if merged == _http_config:
+            return
+        _http_config = merged
+        if _session is not None:
+            _session.close()
+            _session = None
+
+def get_session():
+    """
+    获取共享会话（首次调用时创建）
+
+    Returns:
+        requests.Session: 带连接池的会话
+    """
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=_http_config["pool_connections"],
+                pool_maxsize=_http_config["pool_maxsize"],
+                max_retries=_http_config["max_retries"]
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            if _http_config.get("user_agent"):
+                session.headers.update({"User-Agent": _http_config["user_agent"]})
+            _session = session
+        return _session
+
+def get_timeout(endpoint, default=None):
+    """
+    获取指定接口类型的超时时间
+
+    Args:
+        endpoint: 接口类型（api、upload、gradio、download）
+        default: 配置中没有该类型时的默认值
+
+    Returns:
+        float: 超时时间（秒）
+    """
+    return _http_config["timeouts"].get(endpoint, default)
+
+def request(method, url, endpoint="api", **kwargs):
+    """
+    使用共享会话发送请求，未指定timeout时按接口类型使用配置的超时时间
+
+    Args:
+        method: 请求方法
+        url: 请求地址
+        endpoint: 接口类型，用于选择超时时间
+        **kwargs: 传给 requests 的其他参数
+
+    Returns:
+        requests.Response: 响应
+    """
+    if kwargs.get("timeout") is None:
+        kwargs["timeout"] = get_timeout(endpoint)
+    return get_session().request(method, url, **kwargs)
+
+def get(url, endpoint="api", **kwargs):
+    """发送GET请求，参见 request()"""
+    return request("GET", url, endpoint=endpoint, **kwargs)
+
+def post(url, endpoint="api", **kwargs):
+    """发送POST请求，参见 request()"""
+    return request("POST", url, endpoint=endpoint, **kwargs)
+
+def close():
+    """关闭共享会话及其连接池"""
+    global _session
+
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
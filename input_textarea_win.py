@@ -5,40 +5,228 @@
 """
 
 import argparse
+import atexit
+import base64
+import collections
+import contextlib
+import hashlib
 import json
+import math
+import mmap
 import shutil
 import requests
+import http_client
+import metrics
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chromium.remote_connection import ChromiumRemoteConnection
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.common.action_chains import ActionChains
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.file_detector import UselessFileDetector
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
+from webdriver_manager.core.os_manager import ChromeType, OperationSystemManager
 import time
 import os
+import queue
+import random
+import threading
+import uuid
+import wave
+import select
+import struct
+import subprocess
+import sys
+import ctypes
+import ctypes.util
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 from datetime import datetime
 
-# 全局时间戳记录字典
-timestamps = {}
+# 任务追踪：每个线程当前任务的阶段耗时树（单调时钟），以及各阶段最近若干轮的耗时，用于计算分位数
+trace_state = {
+    "lock": threading.Lock(),
+    "local": threading.local(),
+    "history": {},  # 阶段名称 -> 最近的耗时（秒）
+    "window": 200,
+    "print_tree": True,
+    "summary_every": 10,
+    "jobs": 0
+}
+
+# record_timestamp 的阶段标记对应的阶段名称（从上一个标记到本标记之间的耗时）
+TRACE_STAGE_NAMES = {
+    "配置加载完成": "配置加载",
+    "临时目录清空完成": "清空临时目录",
+    "浏览器启动完成": "浏览器启动",
+    "页面加载完成": "页面加载",
+    "文本输入完成": "文本输入",
+    "音频上传完成": "音频上传",
+    "按钮点击完成": "按钮点击",
+    "文件监控开始": "监控准备",
+    "文件拷贝完成": "生成与保存"
+}
+
+# 常驻浏览器会话字典（API循环模式下跨轮次复用），键为会话名称
+browser_sessions = {}
+
+# 标签页池：工作池中的所有会话共用一个Chrome进程，每个会话占用一个标签页；
+# 所有WebDriver命令在 command_lock 下执行，执行前切换到调用线程所属的标签页
+tab_pool_state = {
+    "lock": threading.Lock(),
+    "command_lock": threading.RLock(),
+    "driver": None,
+    "current_handle": None,
+    "thread_handles": {},  # 线程ID -> 标签页句柄
+    "free_handles": []  # 浏览器启动时自带、尚未分配的标签页
+}
+
+# Gradio页面配置缓存，键为页面地址
+gradio_app_configs = {}
+
+# 文件内容哈希缓存：(绝对路径, 大小, 修改时间) -> SHA-256，文件未变化时不重复计算
+file_hash_cache = {}
+
+# 音色注册表：启动时扫描音色目录，音色名称 -> 提示词文本、音频路径、时长、采样率、哈希
+voice_registry = {
+    "lock": threading.RLock(),
+    "enabled": False,
+    "voices": {},
+    "text_dir": None,
+    "text_ext": "",
+    "audio_dir": None,
+    "audio_ext": "",
+    "dir_mtimes": None,
+    "refresh_interval": 5,
+    "checked_at": 0
+}
+
+# 流水线各阶段的累计耗时统计，用于查看阶段之间的重叠程度
+pipeline_stats = {
+    "lock": threading.Lock(),
+    "stages": {},
+    "started_at": None,
+    "finished_at": None
+}
+
+# 流水线预填表单：轮流使用的标签页数量（0表示未启用），准备线程在空闲标签页中提前填好下一条数据的表单
+pipeline_prefill = {
+    "tabs": 0
+}
+
+# 提示词文本文件的LRU缓存：(绝对路径, 大小, 修改时间) -> 文本内容
+PROMPT_CACHE_SIZE = 32
+prompt_file_cache = {
+    "lock": threading.Lock(),
+    "entries": collections.OrderedDict()
+}
 
 # API接口配置
 API_BASE_URL = "https://aliyun.ideapool.club/datapost"
 #API_BASE_URL = "http://127.0.0.1:8000/datapost"
 
-def fetch_params_from_api(max_wait_time=300, check_interval=1):
+# API数据获取状态：服务端能力检测结果（None表示尚未检测）和当前空闲退避间隔
+api_intake_state = {
+    "sse_supported": None,
+    "long_poll_supported": None,
+    "lease_supported": None,
+    "backoff": None
+}
+
+# API租约状态：当前持有租约的数据（ID -> 领取时间）、本地记录的失败次数和续期线程
+api_lease_state = {
+    "lock": threading.Lock(),
+    "held": {},
+    "attempts": {},
+    "heartbeat_thread": None,
+    "client_id": uuid.uuid4().hex[:12]
+}
+
+def next_api_backoff(intake_config, check_interval, max_sleep=None):
+    """
+    计算下一次空闲等待时间：指数退避并加入随机抖动，避免多个工作进程同时请求
+    
+    Args:
+        intake_config: API数据获取配置
+        check_interval: 基础检查间隔（秒）
+        max_sleep: 本次等待时间上限（秒），通常为剩余的最大等待时间
+    
+    Returns:
+        float: 本次等待时间（秒）
+    """
+    backoff_max = intake_config.get("backoff_max", 30)
+    backoff_factor = intake_config.get("backoff_factor", 2)
+    jitter = intake_config.get("jitter", 0.2)
+    
+    current = api_intake_state["backoff"] or check_interval
+    api_intake_state["backoff"] = min(current * backoff_factor, backoff_max)
+    
+    delay = max(0, current * (1 + random.uniform(-jitter, jitter)))
+    if max_sleep is not None:
+        delay = min(delay, max(0, max_sleep))
+    return delay
+
+def wait_for_api_push(intake_config, timeout):
+    """
+    通过服务端SSE推送等待新数据通知，服务端不支持时记录下来，后续不再尝试
+    
+    Args:
+        intake_config: API数据获取配置
+        timeout: 最长等待时间（秒）
+    
+    Returns:
+        bool: 是否收到新数据通知
+    """
+    sse_url = f"{API_BASE_URL}{intake_config.get('sse_path', '/voice/stream/')}"
+    read_timeout = max(1, min(timeout, intake_config.get("sse_timeout", 60)))
+    
+    try:
+        with http_client.get(sse_url, stream=True, timeout=(5, read_timeout)) as response:
+            content_type = response.headers.get("Content-Type", "")
+            if response.status_code != 200 or "text/event-stream" not in content_type:
+                api_intake_state["sse_supported"] = False
+                print(f"ℹ️ 服务端未提供SSE推送 (状态码: {response.status_code})，改用长轮询/退避轮询")
+                return False
+            
+            if api_intake_state["sse_supported"] is None:
+                print("✓ 服务端支持SSE推送，等待新数据通知...")
+            api_intake_state["sse_supported"] = True
+            
+            for line in response.iter_lines(decode_unicode=True):
+                if line and line.startswith("data:"):
+                    return True
+    except requests.exceptions.RequestException:
+        # 读取超时或连接断开，回到列表检查
+        pass
+    
+    return False
+
+def fetch_params_from_api(max_wait_time=300, check_interval=1, intake_config=None, return_all=False):
     """
     从API接口获取参数，如果数据为空则等待并定期检查
     
+    服务端支持时优先使用SSE推送或长轮询等待新数据；否则在空闲时按指数退避（带随机抖动）
+    拉长检查间隔，一旦获取到数据立即恢复为基础间隔
+    
     Args:
         max_wait_time: 最大等待时间（秒），默认5分钟
-        check_interval: 检查间隔（秒），默认1秒
+        check_interval: 检查间隔（秒），默认1秒，空闲退避的起始值
+        intake_config: API数据获取配置（config["api"]["intake"]），默认自动检测服务端能力
+        return_all: 为True时返回本次获取到的全部数据列表，用于批量领取
     
     Returns:
-        dict: 包含voice、outfile、content等参数的字典，如果失败返回None
+        dict: 包含voice、outfile、content等参数的字典（return_all时为数据列表），如果失败返回None
     """
+    intake_config = intake_config or {}
+    intake_mode = intake_config.get("mode", "auto")
+    long_poll_timeout = intake_config.get("long_poll_timeout", 25)
+    
     print("\n正在从API接口获取参数...")
     start_time = time.time()
     check_count = 0
@@ -52,18 +240,43 @@ def fetch_params_from_api(max_wait_time=300, check_interval=1):
             print(f"❌ API等待超时，已等待 {elapsed_time:.1f} 秒，共检查 {check_count} 次")
             return None
         
+        # 服务端支持推送时，数据为空后等待通知再检查列表
+        use_sse = intake_mode in ("auto", "sse") and api_intake_state["sse_supported"] is not False
+        if check_count > 1 and use_sse:
+            wait_for_api_push(intake_config, max_wait_time - elapsed_time)
+            use_sse = api_intake_state["sse_supported"] is True
+        
+        # 长轮询：服务端支持时会在有数据或超时后才返回，不支持的服务端会忽略该参数
+        use_long_poll = intake_mode in ("auto", "long_poll") and not use_sse \
+            and api_intake_state["long_poll_supported"] is not False
+        params = None
+        request_timeout = 10
+        if use_long_poll:
+            wait_seconds = int(max(1, min(long_poll_timeout, max_wait_time - elapsed_time)))
+            params = {intake_config.get("long_poll_param", "wait"): wait_seconds}
+            request_timeout = wait_seconds + 10
+        
         try:
-            response = requests.get(f"{API_BASE_URL}/voice/list/", timeout=10)
+            request_start = time.time()
+            response = http_client.get(f"{API_BASE_URL}/voice/list/", params=params, timeout=request_timeout)
+            request_duration = time.time() - request_start
             if response.status_code == 200:
                 data = response.json()
                 if data.get('status') == 'success':
                     items = data.get('items', [])
+                    metrics.set_gauge("voiceapi_queue_depth", len(items))
                     if items:
+                        # 有数据时立即恢复为基础检查间隔
+                        api_intake_state["backoff"] = None
+                        
                         # 显示找到的数据数量
                         total_items = len(items)
                         print(f"✅ 成功获取到API数据 (第{check_count}次检查，耗时{elapsed_time:.1f}秒):")
                         print(f"  📊 共找到 {total_items} 条数据")
                         
+                        if return_all:
+                            return items
+                        
                         # 获取第一条数据作为参数（按时间排序，最新的在前）
                         latest_item = items[0]
                         print(f"  📝 处理第1条数据:")
@@ -84,14 +297,29 @@ def fetch_params_from_api(max_wait_time=300, check_interval=1):
                         # 数据为空，继续等待
                         if check_count == 1:
                             print("⏳ API接口数据为空，开始等待新数据...")
-                            print(f"   检查间隔: {check_interval}秒，最大等待时间: {max_wait_time}秒")
+                            print(f"   获取方式: {intake_mode}，基础检查间隔: {check_interval}秒，最大等待时间: {max_wait_time}秒")
                         
                         # 每10次检查显示一次状态
                         if check_count % 10 == 0:
                             print(f"   已检查 {check_count} 次，等待时间 {elapsed_time:.1f}秒...")
                         
-                        # 等待指定间隔后继续检查
-                        time.sleep(check_interval)
+                        if use_long_poll:
+                            # 服务端立即返回空列表说明不支持长轮询
+                            held = request_duration >= min(1.0, params[intake_config.get("long_poll_param", "wait")])
+                            if held:
+                                if api_intake_state["long_poll_supported"] is None:
+                                    print("✓ 服务端支持长轮询")
+                                api_intake_state["long_poll_supported"] = True
+                                continue
+                            if api_intake_state["long_poll_supported"] is None and intake_mode == "auto":
+                                api_intake_state["long_poll_supported"] = False
+                        
+                        # 已通过SSE等待通知时无需额外等待
+                        if use_sse:
+                            continue
+                        
+                        # 按退避间隔等待后继续检查
+                        time.sleep(next_api_backoff(intake_config, check_interval, max_wait_time - (time.time() - start_time)))
                         continue
                 else:
                     print(f"❌ API接口返回失败: {data.get('message', '未知错误')}")
@@ -102,11 +330,11 @@ def fetch_params_from_api(max_wait_time=300, check_interval=1):
                 
         except requests.exceptions.Timeout:
             print(f"⚠️ API请求超时 (第{check_count}次检查)，继续尝试...")
-            time.sleep(check_interval)
+            time.sleep(next_api_backoff(intake_config, check_interval, max_wait_time - (time.time() - start_time)))
             continue
         except requests.exceptions.ConnectionError:
             print(f"⚠️ API连接失败 (第{check_count}次检查)，继续尝试...")
-            time.sleep(check_interval)
+            time.sleep(next_api_backoff(intake_config, check_interval, max_wait_time - (time.time() - start_time)))
             continue
         except Exception as e:
             print(f"❌ 获取API参数异常: {e}")
@@ -124,7 +352,7 @@ def delete_api_data(item_id):
     """
     try:
         print(f"\n正在删除API数据 (ID: {item_id})...")
-        response = requests.post(f"{API_BASE_URL}/voice/delete/{item_id}/", timeout=10)
+        response = http_client.post(f"{API_BASE_URL}/voice/delete/{item_id}/")
         
         if response.status_code == 200:
             result = response.json()
@@ -160,7 +388,7 @@ def clear_api_data():
     """
     try:
         print("\n正在清空所有API数据...")
-        response = requests.get(f"{API_BASE_URL}/voice/clear/", timeout=10)
+        response = http_client.get(f"{API_BASE_URL}/voice/clear/")
         
         if response.status_code == 200:
             result = response.json()
@@ -184,6 +412,222 @@ def clear_api_data():
         print(f"❌ 清空API数据异常: {e}")
         return False
 
+def is_api_lease_enabled(lease_config):
+    """
+    是否使用租约协议领取数据（服务端不支持时自动回退为列表获取+处理后删除）
+    
+    Args:
+        lease_config: 租约配置（config["api"]["lease"]）
+    
+    Returns:
+        bool: 是否使用租约
+    """
+    if not (lease_config or {}).get("enabled", False):
+        return False
+    return api_intake_state["lease_supported"] is not False
+
+def post_api_lease_action(lease_config, path_key, default_path, item_id):
+    """
+    对单条数据的租约执行续期/确认/释放操作
+    
+    Args:
+        lease_config: 租约配置
+        path_key: 配置中的接口路径键名
+        default_path: 默认接口路径，{id} 会被替换为数据ID
+        item_id: 数据ID
+    
+    Returns:
+        bool: 是否操作成功
+    """
+    path = (lease_config or {}).get(path_key, default_path).format(id=item_id)
+    try:
+        response = http_client.post(f"{API_BASE_URL}{path}", json={"worker_id": api_lease_state["client_id"]})
+        if response.status_code != 200:
+            print(f"⚠️ 租约请求失败 ({path})，状态码: {response.status_code}")
+            return False
+        return response.json().get('status') == 'success'
+    except Exception as e:
+        print(f"⚠️ 租约请求异常 ({path}): {e}")
+        return False
+
+def claim_api_items(lease_config, count=1):
+    """
+    以租约方式领取数据：在可见性超时内其他工作进程不会领取到同一条数据，
+    超时未续期的数据会由服务端重新放回队列
+    
+    Args:
+        lease_config: 租约配置
+        count: 最多领取的数据条数
+    
+    Returns:
+        list: 领取到的数据列表（可能为空），请求失败或服务端不支持时返回None
+    """
+    lease_config = lease_config or {}
+    payload = {
+        "count": count,
+        "visibility_timeout": lease_config.get("visibility_timeout", 900),
+        "worker_id": api_lease_state["client_id"]
+    }
+    
+    try:
+        response = http_client.post(f"{API_BASE_URL}{lease_config.get('claim_path', '/voice/claim/')}", json=payload)
+        if response.status_code in (404, 405, 501):
+            if api_intake_state["lease_supported"] is None:
+                print("ℹ️ 服务端不支持租约领取，回退为列表获取+处理后删除")
+            api_intake_state["lease_supported"] = False
+            return None
+        if response.status_code != 200:
+            print(f"❌ 领取API数据失败，状态码: {response.status_code}")
+            return None
+        
+        data = response.json()
+        if data.get('status') != 'success':
+            print(f"❌ 领取API数据失败: {data.get('message', '未知错误')}")
+            return None
+        
+        if api_intake_state["lease_supported"] is None:
+            print("✓ 服务端支持租约领取")
+        api_intake_state["lease_supported"] = True
+        
+        items = data.get('items', [])
+        claim_time = time.time()
+        with api_lease_state["lock"]:
+            for item in items:
+                if item.get('id') is not None:
+                    api_lease_state["held"][item.get('id')] = claim_time
+        
+        if items:
+            print(f"🔒 已领取 {len(items)} 条数据 (可见性超时 {payload['visibility_timeout']} 秒)")
+            start_lease_heartbeat(lease_config)
+        return items
+    except Exception as e:
+        print(f"⚠️ 领取API数据异常: {e}")
+        return None
+
+def lease_heartbeat_loop(lease_config):
+    """
+    租约续期线程：定期为所有持有的租约续期（包括缓冲区和队列中尚未开始的数据）
+    
+    Args:
+        lease_config: 租约配置
+    """
+    interval = lease_config.get("heartbeat_interval", 60)
+    while True:
+        time.sleep(interval)
+        with api_lease_state["lock"]:
+            item_ids = list(api_lease_state["held"])
+        for item_id in item_ids:
+            if not post_api_lease_action(lease_config, "heartbeat_path", "/voice/heartbeat/{id}/", item_id):
+                print(f"⚠️ 数据 ID={item_id} 租约续期失败，可能被其他工作进程重新领取")
+
+def start_lease_heartbeat(lease_config):
+    """
+    启动租约续期线程（只启动一次）
+    
+    Args:
+        lease_config: 租约配置
+    """
+    with api_lease_state["lock"]:
+        thread = api_lease_state["heartbeat_thread"]
+        if thread and thread.is_alive():
+            return
+        thread = threading.Thread(target=lease_heartbeat_loop, args=(lease_config,), name="api-lease-heartbeat", daemon=True)
+        api_lease_state["heartbeat_thread"] = thread
+    thread.start()
+
+def release_api_lease(item_id, lease_config):
+    """
+    释放数据的租约，使其立即可以被其他工作进程领取
+    
+    Args:
+        item_id: 数据ID
+        lease_config: 租约配置
+    
+    Returns:
+        bool: 是否释放成功
+    """
+    with api_lease_state["lock"]:
+        api_lease_state["held"].pop(item_id, None)
+    return post_api_lease_action(lease_config, "release_path", "/voice/release/{id}/", item_id)
+
+def release_unused_api_leases(items, lease_config):
+    """
+    释放已领取但没有进入缓冲区或分发队列的数据的租约，避免续期线程一直为它们续期
+    
+    Args:
+        items: 未使用的数据列表
+        lease_config: 租约配置
+    """
+    for item in items:
+        item_id = item.get('id')
+        with api_lease_state["lock"]:
+            held = item_id in api_lease_state["held"]
+        if held:
+            release_api_lease(item_id, lease_config)
+
+def release_all_api_leases(lease_config):
+    """
+    释放所有尚未处理的租约（程序退出时调用）
+    
+    Args:
+        lease_config: 租约配置
+    """
+    with api_lease_state["lock"]:
+        item_ids = list(api_lease_state["held"])
+    if item_ids:
+        print(f"↩️ 释放 {len(item_ids)} 条未处理数据的租约...")
+    for item_id in item_ids:
+        release_api_lease(item_id, lease_config)
+
+def complete_api_item(item_id, success, lease_config=None):
+    """
+    任务结束后处理API数据：持有租约时成功则确认(ack)，失败则释放(release)让其重新排队，
+    本地累计失败达到 max_attempts 后确认丢弃；未通过租约领取的数据沿用处理后删除
+    
+    Args:
+        item_id: 数据ID
+        success: 任务是否成功
+        lease_config: 租约配置
+    
+    Returns:
+        bool: 数据是否已从队列中移除（False表示已释放回队列等待重试，或确认/删除失败后仍留在队列中）
+    """
+    lease_config = lease_config or {}
+    with api_lease_state["lock"]:
+        leased = api_lease_state["held"].pop(item_id, None) is not None
+    
+    if not leased:
+        # 未使用租约：无论成功失败都删除，避免重复处理
+        if not delete_api_data(item_id):
+            print(f"⚠️ 删除API数据失败，可能导致重复处理")
+            return False
+        return True
+    
+    if not success:
+        max_attempts = lease_config.get("max_attempts", 3)
+        with api_lease_state["lock"]:
+            attempts = api_lease_state["attempts"].get(item_id, 0) + 1
+            api_lease_state["attempts"][item_id] = attempts
+        
+        if attempts < max_attempts:
+            if post_api_lease_action(lease_config, "release_path", "/voice/release/{id}/", item_id):
+                print(f"↩️ 数据 ID={item_id} 已释放回队列等待重试 (失败 {attempts}/{max_attempts} 次)")
+                metrics.inc("voiceapi_retries_total", labels={"operation": "job"})
+            else:
+                print(f"⚠️ 数据 ID={item_id} 释放失败，租约到期后会被重新领取")
+            return False
+        
+        print(f"⚠️ 数据 ID={item_id} 已失败 {attempts} 次，不再重试")
+    
+    with api_lease_state["lock"]:
+        api_lease_state["attempts"].pop(item_id, None)
+    
+    if post_api_lease_action(lease_config, "ack_path", "/voice/ack/{id}/", item_id):
+        print(f"✅ 数据 ID={item_id} 已确认完成")
+        return True
+    print(f"⚠️ 确认数据 ID={item_id} 失败，租约到期后可能被重复处理")
+    return False
+
 def load_paths_from_file(paths_file="paths_windows.txt"):
     """
     从paths.txt文件加载文件路径配置
@@ -232,6 +676,11 @@ def load_paths_from_file(paths_file="paths_windows.txt"):
         print(f"✗ 读取路径配置文件失败: {e}")
         return paths
 
+def make_timestamp():
+    """生成一个阶段时间戳记录"""
+    now = datetime.now()
+    return {'timestamp': now, 'time_str': now.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]}
+
 def record_timestamp(stage_name):
     """
     记录阶段时间戳
@@ -239,17 +688,215 @@ def record_timestamp(stage_name):
     Args:
         stage_name: 阶段名称
     """
-    timestamps[stage_name] = {
-        'timestamp': datetime.now(),
-        'time_str': datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+    stamp = make_timestamp()
+    print(f"[{stamp['time_str']}] 阶段: {stage_name}")
+    
+    # 时间戳只记在当前线程的任务上，并发任务之间互不覆盖；任务之外的阶段（程序启动/结束）只打印
+    trace = get_current_trace()
+    if trace is not None:
+        trace["timestamps"][stage_name] = stamp
+    mark_trace_stage(stage_name)
+
+def configure_tracing(tracing_config=None):
+    """
+    应用追踪配置
+    
+    Args:
+        tracing_config: 追踪配置（config["tracing"]）
+    """
+    tracing_config = tracing_config or {}
+    trace_state["window"] = max(1, int(tracing_config.get("window", 200)))
+    trace_state["print_tree"] = tracing_config.get("print_tree", True)
+    trace_state["summary_every"] = int(tracing_config.get("summary_every", 10))
+
+def new_span(name, start=None):
+    """创建一个阶段节点"""
+    return {"name": name, "start": time.monotonic() if start is None else start, "end": None, "children": []}
+
+def record_span_duration(name, duration):
+    """
+    记录一次阶段耗时，每个阶段只保留最近 window 次
+    
+    Args:
+        name: 阶段名称
+        duration: 耗时（秒）
+    """
+    with trace_state["lock"]:
+        history = trace_state["history"].get(name)
+        if history is None or history.maxlen != trace_state["window"]:
+            history = collections.deque(history or (), maxlen=trace_state["window"])
+            trace_state["history"][name] = history
+        history.append(duration)
+    metrics.observe("voiceapi_stage_duration_seconds", duration, {"stage": name})
+
+def get_current_trace():
+    """获取当前线程正在追踪的任务，没有时返回None"""
+    return getattr(trace_state["local"], "trace", None)
+
+def start_job_trace(job_name):
+    """
+    开始追踪一个任务（每个线程同时只追踪一个任务）
+    
+    Args:
+        job_name: 任务名称
+    
+    Returns:
+        dict: 任务的根阶段
+    """
+    root = new_span(job_name)
+    trace_state["local"].trace = {
+        "root": root,
+        "timestamps": {"任务开始": make_timestamp()},
+        "stack": [],  # 正在进行的 trace_span 阶段
+        "pending": [],  # 上一个阶段标记之后完成的子阶段
+        "last_mark": root["start"],
+        "wait_times": {}  # 本任务各步骤的条件等待耗时（秒），键为步骤名称
+    }
+    return root
+
+def mark_trace_stage(stage_name):
+    """
+    阶段标记：把上一个标记到现在的时间记为一个阶段，期间完成的 trace_span 作为它的子阶段
+    
+    Args:
+        stage_name: record_timestamp 的阶段名称
+    """
+    trace = get_current_trace()
+    if trace is None or stage_name not in TRACE_STAGE_NAMES:
+        return
+    
+    now = time.monotonic()
+    span = new_span(TRACE_STAGE_NAMES[stage_name], trace["last_mark"])
+    span["end"] = now
+    span["children"] = trace["pending"]
+    trace["pending"] = []
+    trace["last_mark"] = now
+    trace["root"]["children"].append(span)
+    record_span_duration(span["name"], span["end"] - span["start"])
+
+@contextlib.contextmanager
+def trace_span(name):
+    """
+    追踪一个子阶段（可以嵌套）；没有正在追踪的任务时只记录耗时统计
+    
+    Args:
+        name: 阶段名称
+    """
+    trace = get_current_trace()
+    span = new_span(name)
+    if trace is not None:
+        trace["stack"].append(span)
+    try:
+        yield span
+    finally:
+        span["end"] = time.monotonic()
+        record_span_duration(name, span["end"] - span["start"])
+        if trace is not None:
+            trace["stack"].pop()
+            if trace["stack"]:
+                trace["stack"][-1]["children"].append(span)
+            else:
+                trace["pending"].append(span)
+
+def finish_job_trace(success=None):
+    """
+    结束当前线程的任务追踪，打印阶段耗时树，并定期打印各阶段分位数
+    
+    Args:
+        success: 任务是否成功（用于显示）
+    
+    Returns:
+        dict: 任务的根阶段，没有正在追踪的任务时返回None
+    """
+    trace = get_current_trace()
+    if trace is None:
+        return None
+    trace_state["local"].trace = None
+    trace_state["local"].last_trace = trace
+    
+    trace["timestamps"]["任务结束"] = make_timestamp()
+    root = trace["root"]
+    root["end"] = time.monotonic()
+    root["children"].extend(trace["pending"])
+    record_span_duration("任务总耗时", root["end"] - root["start"])
+    
+    with trace_state["lock"]:
+        trace_state["jobs"] += 1
+        jobs = trace_state["jobs"]
+    
+    if trace_state["print_tree"]:
+        status = "" if success is None else ("（成功）" if success else "（失败）")
+        print(f"\n🧭 任务阶段耗时{status}:")
+        print_span_tree(root)
+    if trace["wait_times"]:
+        print(f"\n⏱️ 本轮各步骤条件等待耗时:")
+        for step_name, duration in trace["wait_times"].items():
+            print(f"  {step_name}: {duration:.2f}秒")
+    if trace_state["summary_every"] and jobs % trace_state["summary_every"] == 0:
+        print_stage_percentiles()
+    return root
+
+def print_span_tree(span, depth=0):
+    """
+    打印阶段耗时树
+    
+    Args:
+        span: 阶段节点
+        depth: 缩进层级
+    """
+    duration = (span["end"] or time.monotonic()) - span["start"]
+    print(f"  {'  ' * depth}{span['name']}: {duration:.3f}秒")
+    for child in span["children"]:
+        print_span_tree(child, depth + 1)
+
+def get_percentile(sorted_values, percent):
+    """
+    按最近秩法计算分位数
+    
+    Args:
+        sorted_values: 已排序的数值列表
+        percent: 百分位（0-100）
+    
+    Returns:
+        float: 分位数
+    """
+    rank = max(1, int(math.ceil(percent / 100.0 * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+def get_stage_percentiles():
+    """
+    计算各阶段最近若干轮耗时的 p50/p95/p99
+    
+    Returns:
+        dict: 阶段名称 -> {"count", "p50", "p95", "p99"}
+    """
+    with trace_state["lock"]:
+        history = {name: sorted(values) for name, values in trace_state["history"].items() if values}
+    return {
+        name: {
+            "count": len(values),
+            "p50": get_percentile(values, 50),
+            "p95": get_percentile(values, 95),
+            "p99": get_percentile(values, 99)
+        }
+        for name, values in history.items()
     }
-    print(f"[{timestamps[stage_name]['time_str']}] 阶段: {stage_name}")
 
-def calculate_duration(start_stage, end_stage):
+def print_stage_percentiles():
+    """打印各阶段最近若干轮耗时的分位数"""
+    percentiles = get_stage_percentiles()
+    if not percentiles:
+        return
+    print(f"\n📊 各阶段耗时分位数（最近 {trace_state['window']} 次）:")
+    for name, stats in percentiles.items():
+        print(f"  {name}: n={stats['count']} p50={stats['p50']:.3f}秒 p95={stats['p95']:.3f}秒 p99={stats['p99']:.3f}秒")
+
+def calculate_duration(timestamps, start_stage, end_stage):
     """
     计算两个阶段之间的耗时
     
     Args:
+        timestamps: 任务的阶段时间戳字典
         start_stage: 开始阶段名称
         end_stage: 结束阶段名称
     
@@ -265,15 +912,22 @@ def calculate_duration(start_stage, end_stage):
 
 def print_timing_summary():
     """
-    打印时间统计摘要
+    打印时间统计摘要：当前线程最近完成的一个任务的各阶段时间戳和耗时，以及各阶段耗时分位数
     """
     print(f"\n{'='*60}")
     print("时间统计摘要")
     print(f"{'='*60}")
     
-    # 定义阶段顺序
+    last_trace = getattr(trace_state["local"], "last_trace", None)
+    timestamps = last_trace["timestamps"] if last_trace else {}
+    if last_trace:
+        print(f"最近完成的任务: {last_trace['root']['name']}")
+    
+    # 定义阶段顺序：单次执行模式从程序启动统计到程序结束，API循环模式统计每轮任务的开始到结束
+    first_stage = "程序启动" if "程序启动" in timestamps else "任务开始"
+    last_stage = "程序结束" if "程序结束" in timestamps else "任务结束"
     stages = [
-        "程序启动",
+        first_stage,
         "配置加载完成",
         "临时目录清空完成",
         "浏览器启动完成",
@@ -283,7 +937,7 @@ def print_timing_summary():
         "按钮点击完成",
         "文件监控开始",
         "文件拷贝完成",
-        "程序结束"
+        last_stage
     ]
     
     # 打印各阶段时间戳
@@ -303,13 +957,13 @@ def print_timing_summary():
         next_stage = stages[i + 1]
         
         if current_stage in timestamps and next_stage in timestamps:
-            duration = calculate_duration(current_stage, next_stage)
+            duration = calculate_duration(timestamps, current_stage, next_stage)
             stage_durations.append((current_stage, next_stage, duration))
             print(f"  {current_stage} -> {next_stage}: {duration:.2f}秒")
     
     # 计算总耗时
-    if "程序启动" in timestamps and "程序结束" in timestamps:
-        total_duration = calculate_duration("程序启动", "程序结束")
+    if first_stage in timestamps and last_stage in timestamps:
+        total_duration = calculate_duration(timestamps, first_stage, last_stage)
         print(f"\n总耗时: {total_duration:.2f}秒")
         
         # 计算各阶段占总时间的百分比
@@ -318,6 +972,8 @@ def print_timing_summary():
             percentage = (duration / total_duration) * 100 if total_duration > 0 else 0
             print(f"  {start_stage} -> {end_stage}: {percentage:.1f}%")
     
+    print_stage_percentiles()
+    
     print(f"{'='*60}")
 
 def parse_arguments():
@@ -335,6 +991,7 @@ def parse_arguments():
   python input_textarea.py -a -o output            # 从API获取参数并指定输出文件名
   python input_textarea.py -a --api-loop           # API循环模式，持续监控并自动执行（推荐）
   python input_textarea.py -a --api-loop --api-fast # API循环+快速模式，多数据时立即处理
+  python input_textarea.py -a --api-loop --api-workers # API循环+多端点并发工作池
   python input_textarea.py -a --api-loop --api-wait 600  # API循环模式，单次最大等待10分钟
   python input_textarea.py -a --api-interval 2     # 从API获取参数，每2秒检查一次
   python input_textarea.py -f filename -o output   # 同时指定输入和输出文件名
@@ -398,6 +1055,19 @@ def parse_arguments():
         help='启用快速处理模式，当有多条数据时立即处理下一条，无需等待间隔时间'
     )
     
+    parser.add_argument(
+        '--api-workers',
+        action='store_true',
+        help='API循环模式下启用多端点并发工作池（端点来自配置文件的workers.endpoints或url+backup_urls）'
+    )
+    
+    parser.add_argument(
+        '--metrics-port',
+        type=int,
+        default=None,
+        help='在指定端口启动指标服务（/metrics，Prometheus文本格式），覆盖配置文件中的metrics设置'
+    )
+    
     parser.add_argument(
         '--headless',
         action='store_true',
@@ -412,15 +1082,104 @@ def parse_arguments():
     
     return parser.parse_args()
 
+# ChromeDriver解析结果和常驻的ChromeDriver服务进程（整个进程内只解析、启动一次）
+driver_resolver_state = {
+    "lock": threading.Lock(),
+    "path": None,  # 已解析的ChromeDriver路径
+    "service": None  # 多个浏览器会话共用的ChromeDriver服务
+}
+
+def get_chrome_major_version():
+    """
+    获取本机已安装Chrome的主版本号（不访问网络）
+    
+    Returns:
+        str: 主版本号，如 "120"；检测失败时返回None
+    """
+    version = None
+    if os.name == 'nt':
+        try:
+            import winreg
+            with winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"Software\Google\Chrome\BLBeacon") as key:
+                version = winreg.QueryValueEx(key, "version")[0]
+        except OSError:
+            version = None
+    
+    if not version:
+        try:
+            version = OperationSystemManager().get_browser_version_from_os(ChromeType.GOOGLE)
+        except Exception:
+            version = None
+    
+    return version.split('.')[0] if version else None
+
+def load_driver_cache(cache_file):
+    """
+    读取按Chrome主版本号记录的ChromeDriver路径缓存
+    
+    Args:
+        cache_file: 缓存文件路径
+    
+    Returns:
+        dict: Chrome主版本号 -> ChromeDriver路径
+    """
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+def save_driver_cache(cache_file, chrome_version, driver_path):
+    """
+    把ChromeDriver路径写入缓存文件（先写临时文件再替换，避免写到一半被读取）
+    
+    Args:
+        cache_file: 缓存文件路径
+        chrome_version: Chrome主版本号
+        driver_path: ChromeDriver路径
+    """
+    cache = load_driver_cache(cache_file)
+    cache[chrome_version] = driver_path
+    temp_file = f"{cache_file}.tmp"
+    try:
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False, indent=2)
+        os.replace(temp_file, cache_file)
+    except OSError as e:
+        print(f"⚠️ 保存ChromeDriver路径缓存失败: {e}")
+
 def get_chrome_driver_path(config):
     """获取正确的ChromeDriver路径
     
+    每个进程只解析一次；自动下载的路径按Chrome主版本号写入缓存文件，
+    Chrome版本不变时后续启动直接使用缓存，无需再访问网络
+    
     Args:
         config: 配置字典
     
     Returns:
         str: ChromeDriver路径
     """
+    with driver_resolver_state["lock"]:
+        cached_path = driver_resolver_state["path"]
+        if cached_path and os.path.exists(cached_path):
+            return cached_path
+        
+        driver_path = resolve_chrome_driver_path(config)
+        driver_resolver_state["path"] = driver_path
+        return driver_path
+
+def resolve_chrome_driver_path(config):
+    """
+    依次从配置文件、版本缓存和ChromeDriverManager解析ChromeDriver路径
+    
+    Args:
+        config: 配置字典
+    
+    Returns:
+        str: ChromeDriver路径，失败时返回None
+    """
     try:
         # 从配置文件中获取路径
         browser_config = config.get("browser", {})
@@ -431,6 +1190,22 @@ def get_chrome_driver_path(config):
             print(f"使用配置文件中的ChromeDriver路径: {driver_path}")
             return driver_path
         
+        # 按Chrome主版本号查找之前下载过的ChromeDriver
+        cache_file = browser_config.get("driver_cache_file", "chromedriver_cache.json")
+        chrome_version = get_chrome_major_version()
+        cache = load_driver_cache(cache_file)
+        if chrome_version:
+            cached_path = cache.get(chrome_version)
+            if cached_path and os.path.exists(cached_path):
+                print(f"使用缓存的ChromeDriver路径（Chrome {chrome_version}）: {cached_path}")
+                return cached_path
+        else:
+            # 无法检测Chrome版本时，使用任意一个仍然存在的缓存路径
+            for cached_path in cache.values():
+                if cached_path and os.path.exists(cached_path):
+                    print(f"⚠️ 未能检测Chrome版本，使用缓存的ChromeDriver路径: {cached_path}")
+                    return cached_path
+        
         # 如果配置文件中没有指定路径或路径不存在，使用自动下载
         print("配置文件中未指定ChromeDriver路径或路径不存在，尝试自动下载...")
         driver_path = ChromeDriverManager().install()
@@ -444,1872 +1219,5718 @@ def get_chrome_driver_path(config):
                     driver_path = os.path.join(driver_dir, file)
                     break
         
+        if chrome_version:
+            save_driver_cache(cache_file, chrome_version, driver_path)
+        
         print(f"ChromeDriver路径: {driver_path}")
         return driver_path
     except Exception as e:
         print(f"获取ChromeDriver路径失败: {e}")
         return None
 
-def read_text_file(file_path):
-    """读取文本文件内容"""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            content = file.read()
-        return content
-    except UnicodeDecodeError:
-        # 如果UTF-8失败，尝试其他编码
-        try:
-            with open(file_path, 'r', encoding='gbk') as file:
-                content = file.read()
-            return content
-        except:
-            try:
-                with open(file_path, 'r', encoding='latin-1') as file:
-                    content = file.read()
-                return content
-            except Exception as e:
-                print(f"读取文件失败: {e}")
-                return None
-
-def upload_file_to_dropzone(driver, upload_area, file_path, file_description):
+def get_driver_service(driver_path):
     """
-    将文件上传到指定的拖拽区域
+    获取常驻的ChromeDriver服务，未启动或已退出时重新启动
     
     Args:
-        driver: WebDriver实例
-        upload_area: 拖拽区域元素
-        file_path: 要上传的文件路径
-        file_description: 文件描述（用于日志显示）
+        driver_path: ChromeDriver路径
+    
+    Returns:
+        Service: 已启动的ChromeDriver服务
     """
-    print(f"\n开始上传文件到拖拽区域: {file_description}")
+    with driver_resolver_state["lock"]:
+        service = driver_resolver_state["service"]
+        if service is not None:
+            if service.process and service.process.poll() is None and service.path == driver_path:
+                return service
+            stop_driver_service_locked()
+        
+        service = Service(driver_path)
+        service.start()
+        driver_resolver_state["service"] = service
+        print(f"✓ ChromeDriver服务已启动: {service.service_url}")
+        return service
+
+def stop_driver_service_locked():
+    """停止常驻的ChromeDriver服务（调用方需持有 driver_resolver_state["lock"]）"""
+    service = driver_resolver_state["service"]
+    driver_resolver_state["service"] = None
+    if service is not None:
+        try:
+            service.stop()
+        except Exception as e:
+            print(f"⚠️ 停止ChromeDriver服务失败: {e}")
+
+def stop_driver_service():
+    """停止常驻的ChromeDriver服务，程序退出时调用"""
+    with driver_resolver_state["lock"]:
+        stop_driver_service_locked()
+
+atexit.register(stop_driver_service)
+
+def create_chrome_driver(args, config):
+    """
+    根据配置和命令行参数启动Chrome浏览器
     
-    # 检查文件是否存在
-    if not os.path.exists(file_path):
-        print(f"错误：文件不存在 - {file_path}")
-        return False
+    Args:
+        args: 命令行参数对象
+        config: 配置字典
     
-    # 获取文件的绝对路径
-    abs_file_path = os.path.abspath(file_path)
-    print(f"文件路径: {abs_file_path}")
-    print(f"文件大小: {os.path.getsize(abs_file_path)} 字节")
+    Returns:
+        WebDriver实例
+    """
+    # 从配置文件读取浏览器设置
+    browser_config = config.get("browser", {})
+    headless_mode = browser_config.get("headless", False)
+    window_size = browser_config.get("window_size", "1920,1080")
     
-    # 滚动到拖拽区域
-    driver.execute_script("arguments[0].scrollIntoView(true);", upload_area)
-    time.sleep(0.3)  # 减少等待时间
+    # 检查命令行参数是否覆盖配置文件设置
+    if args.headless:
+        headless_mode = True
+        print("✓ 已启用无界面模式（从命令行参数覆盖）")
+    elif args.no_headless:
+        headless_mode = False
+        print("✓ 已启用有界面模式（从命令行参数覆盖）")
     
-    # 显示拖拽区域信息
-    print(f"拖拽区域位置: {upload_area.location}")
-    print(f"拖拽区域大小: {upload_area.size}")
+    # 配置Chrome选项
+    chrome_options = Options()
     
-    # 尝试多种上传方法
-    print(f"开始尝试多种上传方法...")
+    # 设置窗口大小
+    chrome_options.add_argument(f"--window-size={window_size}")
     
-    success = False
+    # 设置无界面模式
+    if headless_mode:
+        chrome_options.add_argument("--headless")
+        if not args.headless:
+            print("✓ 已启用无界面模式（从配置文件读取）")
+    else:
+        if not args.no_headless:
+            print("✓ 使用有界面模式（从配置文件读取）")
     
-    # 方法1：直接文件输入
-    if not success:
-        try:
-            print(f"尝试方法1：直接设置文件输入框...")
-            file_input = driver.find_element(By.CSS_SELECTOR, "input[type='file']")
-            file_input.send_keys(abs_file_path)
-            print(f"✓ 方法1成功：直接设置文件路径")
-            success = True
-        except Exception as e:
-            print(f"✗ 方法1失败: {e}")
+    chrome_options.add_argument("--disable-dev-shm-usage")
     
-    # 方法2：JavaScript拖拽
-    if not success:
-        try:
-            print(f"尝试方法2：JavaScript模拟拖拽...")
-            
-            # 获取文件信息
-            file_name = os.path.basename(file_path)
-            file_size = os.path.getsize(file_path)
-            file_extension = os.path.splitext(file_name)[1].lower()
-            
-            # 根据文件扩展名确定MIME类型
-            mime_types = {
-                '.wav': 'audio/wav',
-                '.mp3': 'audio/mpeg',
-                '.ogg': 'audio/ogg',
-                '.m4a': 'audio/mp4',
-                '.flac': 'audio/flac',
-                '.jpg': 'image/jpeg',
-                '.jpeg': 'image/jpeg',
-                '.png': 'image/png',
-                '.gif': 'image/gif',
-                '.pdf': 'application/pdf',
-                '.txt': 'text/plain',
-                '.doc': 'application/msword',
-                '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-            }
-            mime_type = mime_types.get(file_extension, 'application/octet-stream')
-            
-            # 创建拖拽事件
-            js_code = f"""
-            var dropZone = arguments[0];
-            var fileName = '{file_name}';
-            var filePath = '{abs_file_path.replace("\\", "\\\\")}';
-            var fileSize = {file_size};
-            var mimeType = '{mime_type}';
-            
-            // 创建File对象
-            var file = new File([''], fileName, {{ 
-                type: mimeType,
-                lastModified: Date.now()
-            }});
-            
-            // 创建DataTransfer对象
-            var dataTransfer = new DataTransfer();
-            dataTransfer.items.add(file);
-            
-            // 创建拖拽事件
-            var dragEnterEvent = new DragEvent('dragenter', {{
-                bubbles: true,
-                cancelable: true,
-                dataTransfer: dataTransfer
-            }});
-            
-            var dragOverEvent = new DragEvent('dragover', {{
-                bubbles: true,
-                cancelable: true,
-                dataTransfer: dataTransfer
-            }});
-            
-            var dropEvent = new DragEvent('drop', {{
-                bubbles: true,
-                cancelable: true,
-                dataTransfer: dataTransfer
-            }});
-            
-            // 触发事件
-            dropZone.dispatchEvent(dragEnterEvent);
-            dropZone.dispatchEvent(dragOverEvent);
-            dropZone.dispatchEvent(dropEvent);
-            
-            return true;
-            """
-            
-            result = driver.execute_script(js_code, upload_area)
-            print(f"✓ 方法2成功：JavaScript拖拽事件已触发")
-            success = True
-            
-        except Exception as e:
-            print(f"✗ 方法2失败: {e}")
+    # 标签页池中同时只有一个标签页在前台，避免后台标签页的定时器和渲染被节流
+    if is_tab_pool_enabled(config):
+        chrome_options.add_argument("--disable-background-timer-throttling")
+        chrome_options.add_argument("--disable-renderer-backgrounding")
+        chrome_options.add_argument("--disable-backgrounding-occluded-windows")
+    chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
     
-    # 方法3：ActionChains拖拽
-    if not success:
-        try:
-            print(f"尝试方法3：ActionChains拖拽...")
-            
-            actions = ActionChains(driver)
-            
-            # 移动到拖拽区域并执行拖拽
-            actions.move_to_element(upload_area)
-            actions.click_and_hold()
-            actions.move_by_offset(10, 10)
-            actions.release()
-            actions.perform()
-            
-            print(f"✓ 方法3成功：ActionChains拖拽操作完成")
-            success = True
-            
-        except Exception as e:
-            print(f"✗ 方法3失败: {e}")
+    print("正在初始化Chrome浏览器...")
     
-    # 方法4：点击拖拽区域
-    if not success:
-        try:
-            print(f"尝试方法4：点击拖拽区域...")
-            
-            upload_area.click()
-            time.sleep(0.3)  # 减少等待时间
-            
-            print(f"✓ 方法4成功：点击拖拽区域完成")
-            success = True
-            
-        except Exception as e:
-            print(f"✗ 方法4失败: {e}")
+    # 获取ChromeDriver路径
+    driver_path = get_chrome_driver_path(config)
+    if not driver_path:
+        raise Exception("无法获取ChromeDriver路径")
     
-    if success:
-        print(f"✓ {file_description}文件上传操作成功！")
+    # 创建WebDriver实例
+    if browser_config.get("reuse_driver_service", False):
+        # 连接常驻的ChromeDriver服务，driver.quit()只结束浏览器会话，不会退出ChromeDriver进程
+        service = get_driver_service(driver_path)
+        executor = ChromiumRemoteConnection(
+            remote_server_addr=service.service_url,
+            browser_name="chrome",
+            vendor_prefix="goog"
+        )
+        # ChromeDriver在本机运行，文件路径直接交给它读取，不走Selenium Grid的 /se/file 上传接口
+        driver = webdriver.Remote(command_executor=executor, options=chrome_options, file_detector=UselessFileDetector())
     else:
-        print(f"✗ {file_description}的所有上传方法都失败了")
+        service = Service(driver_path)
+        driver = webdriver.Chrome(service=service, options=chrome_options)
+    metrics.inc("voiceapi_browser_starts_total")
     
-    return success
+    print("Chrome浏览器已成功启动！")
+    return driver
 
-def find_upload_area(driver, upload_selector):
+def is_tab_pool_enabled(config):
     """
-    查找上传区域，支持多种选择器
+    是否让多个常驻会话共用一个Chrome进程（每个会话一个标签页）
     
     Args:
-        driver: WebDriver实例
-        upload_selector: 主要选择器
+        config: 配置字典
     
     Returns:
-        找到的上传区域元素或None
+        bool: 是否启用标签页池
     """
-    print(f"正在查找上传区域: {upload_selector}")
-    wait = WebDriverWait(driver, 10)
-    
-    try:
-        upload_area = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, upload_selector)))
-        print(f"✓ 找到上传区域: {upload_selector}")
-        return upload_area
-    except:
-        print(f"✗ 未找到上传区域: {upload_selector}")
-        print("尝试查找所有可能的上传区域...")
-        
-        # 查找所有可能的上传区域
-        possible_selectors = [
-            upload_selector,
-            "[class*='svelte']",
-            "[class*='upload']",
-            "[class*='drop']",
-            "[class*='drag']",
-            "input[type='file']",
-            "[data-testid*='upload']",
-            "[data-testid*='drop']",
-            "[class*='file']",
-            "[class*='area']"
-        ]
-        
-        for selector in possible_selectors:
-            try:
-                elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                if elements:
-                    upload_area = elements[0]
-                    print(f"找到可能的上传区域: {selector}")
-                    return upload_area
-            except:
-                continue
-        
-        print("错误：未找到任何上传区域")
-        return None
+    return config.get("browser", {}).get("tab_pool", False)
 
-def input_text_to_textarea(driver, textarea, file_content, textarea_index):
+def install_tab_routing(driver):
     """
-    将文本内容输入到指定的textarea元素
+    替换driver的命令执行函数：每条命令执行前切换到当前线程所属的标签页，
+    命令之间串行执行，元素操作、等待和脚本调用都会经过这里
     
     Args:
-        driver: WebDriver实例
-        textarea: textarea元素
-        file_content: 要输入的文本内容
-        textarea_index: textarea的索引（用于日志显示）
+        driver: 标签页池共用的WebDriver实例
     """
-    print(f"\n开始向第{textarea_index}个textarea输入文本...")
+    execute = driver.execute
     
-    # 滚动到textarea
-    driver.execute_script("arguments[0].scrollIntoView(true);", textarea)
-    time.sleep(0.3)  # 减少等待时间
+    def routed_execute(driver_command, params=None):
+        handle = tab_pool_state["thread_handles"].get(threading.get_ident())
+        with tab_pool_state["command_lock"]:
+            if driver_command == Command.SWITCH_TO_WINDOW:
+                result = execute(driver_command, params)
+                tab_pool_state["current_handle"] = params.get("handle")
+                return result
+            if handle and handle != tab_pool_state["current_handle"]:
+                execute(Command.SWITCH_TO_WINDOW, {"handle": handle})
+                tab_pool_state["current_handle"] = handle
+            return execute(driver_command, params)
     
-    # 显示textarea信息
-    print(f"第{textarea_index}个Textarea位置: {textarea.location}")
-    print(f"第{textarea_index}个Textarea大小: {textarea.size}")
-    print(f"第{textarea_index}个Textarea标签: {textarea.tag_name}")
-    print(f"第{textarea_index}个Textarea是否可编辑: {textarea.is_enabled()}")
+    driver.execute = routed_execute
+
+def open_pool_tab(args, config):
+    """
+    在标签页池的Chrome进程中为当前线程打开一个标签页，Chrome未启动或已退出时先启动
     
-    # 尝试多种输入方法
-    print(f"开始尝试多种输入方法...")
+    Args:
+        args: 命令行参数对象
+        config: 配置字典
     
-    success = False
+    Returns:
+        tuple: (WebDriver实例, 标签页句柄)
+    """
+    with tab_pool_state["lock"]:
+        driver = tab_pool_state["driver"]
+        if driver is not None:
+            try:
+                driver.window_handles
+            except Exception:
+                print("⚠️ 标签页池的Chrome进程已不可用，正在重新启动...")
+                shutdown_tab_pool()
+                driver = None
+        
+        if driver is None:
+            driver = create_chrome_driver(args, config)
+            install_tab_routing(driver)
+            tab_pool_state["driver"] = driver
+            tab_pool_state["current_handle"] = driver.current_window_handle
+            tab_pool_state["free_handles"] = [tab_pool_state["current_handle"]]
+        
+        with tab_pool_state["command_lock"]:
+            if tab_pool_state["free_handles"]:
+                handle = tab_pool_state["free_handles"].pop()
+            else:
+                driver.switch_to.new_window('tab')
+                handle = driver.current_window_handle
+            tab_pool_state["thread_handles"][threading.get_ident()] = handle
+        
+        print(f"🗂️ 标签页池: 已分配标签页 {handle}（共 {len(tab_pool_state['thread_handles'])} 个）")
+        return driver, handle
+
+def bind_pool_tab(handle):
+    """
+    让当前线程之后的WebDriver命令都发往指定标签页
     
-    # 方法1：直接send_keys到textarea
-    if not success:
+    Args:
+        handle: 标签页句柄
+    """
+    tab_pool_state["thread_handles"][threading.get_ident()] = handle
+
+def close_pool_tab(driver, handle):
+    """
+    关闭标签页池中的一个标签页，最后一个标签页关闭时退出Chrome进程
+    
+    Args:
+        driver: 标签页所属的WebDriver实例
+        handle: 标签页句柄
+    """
+    with tab_pool_state["lock"]:
+        for thread_id, thread_handle in list(tab_pool_state["thread_handles"].items()):
+            if thread_handle == handle:
+                del tab_pool_state["thread_handles"][thread_id]
+        
+        # Chrome已重新启动时，旧的标签页随旧进程一起关闭
+        if driver is not tab_pool_state["driver"]:
+            return
+        
+        if not tab_pool_state["thread_handles"]:
+            shutdown_tab_pool()
+            return
+        
         try:
-            print(f"尝试方法1：直接send_keys到第{textarea_index}个textarea...")
-            
-            # 确保textarea获得焦点
-            textarea.click()
-            time.sleep(0.5)
-            
-            # 清除现有内容
-            textarea.clear()
-            time.sleep(0.5)
-            
-            # 输入文本内容
-            textarea.send_keys(file_content)
-            print(f"✓ 方法1成功：直接send_keys到第{textarea_index}个textarea完成")
-            success = True
-            
-        except Exception as e:
-            print(f"✗ 方法1失败: {e}")
-    
-    # 方法2：使用JavaScript设置textarea的value
-    if not success:
-        try:
-            print(f"尝试方法2：JavaScript设置第{textarea_index}个textarea的value...")
-            
-            js_code = f"""
-            var textarea = arguments[0];
-            var content = `{file_content.replace("`", "\\`").replace("$", "\\$")}`;
-            
-            // 设置value
-            textarea.value = content;
-            
-            // 触发input事件
-            var inputEvent = new Event('input', {{ bubbles: true }});
-            textarea.dispatchEvent(inputEvent);
-            
-            // 触发change事件
-            var changeEvent = new Event('change', {{ bubbles: true }});
-            textarea.dispatchEvent(changeEvent);
-            
-            // 触发focus事件
-            var focusEvent = new Event('focus', {{ bubbles: true }});
-            textarea.dispatchEvent(focusEvent);
-            
-            return textarea.value.length;
-            """
-            
-            result = driver.execute_script(js_code, textarea)
-            print(f"✓ 方法2成功：JavaScript设置第{textarea_index}个textarea的value完成，设置了 {result} 个字符")
-            success = True
-            
+            with tab_pool_state["command_lock"]:
+                driver.switch_to.window(handle)
+                driver.close()
+                tab_pool_state["current_handle"] = None
         except Exception as e:
-            print(f"✗ 方法2失败: {e}")
-    
-    # 方法3：使用ActionChains操作textarea
-    if not success:
+            print(f"⚠️ 关闭标签页失败 {handle}: {e}")
+
+def shutdown_tab_pool():
+    """退出标签页池的Chrome进程（调用方需持有 tab_pool_state["lock"]）"""
+    driver = tab_pool_state["driver"]
+    tab_pool_state["driver"] = None
+    tab_pool_state["current_handle"] = None
+    tab_pool_state["thread_handles"].clear()
+    tab_pool_state["free_handles"] = []
+    if driver is not None:
         try:
-            print(f"尝试方法3：ActionChains操作第{textarea_index}个textarea...")
-            
-            actions = ActionChains(driver)
-            
-            # 点击textarea
-            actions.click(textarea)
-            actions.perform()
-            time.sleep(0.5)
-            
-            # 全选并删除现有内容
-            actions.key_down(Keys.CONTROL).send_keys('a').key_up(Keys.CONTROL).perform()
-            actions.send_keys(Keys.DELETE).perform()
-            time.sleep(0.5)
-            
-            # 输入内容
-            actions.send_keys(file_content).perform()
-            print(f"✓ 方法3成功：ActionChains操作第{textarea_index}个textarea完成")
-            success = True
-            
+            driver.quit()
+            print("标签页池的Chrome进程已关闭")
         except Exception as e:
-            print(f"✗ 方法3失败: {e}")
+            print(f"⚠️ 关闭标签页池的Chrome进程失败: {e}")
+
+def check_browser_health(driver, textarea_selector):
+    """
+    检查常驻浏览器标签页是否仍然可用
     
-    # 方法4：分段输入到textarea（适用于大文件）
-    if not success:
-        try:
-            print(f"尝试方法4：分段输入到第{textarea_index}个textarea...")
-            
-            # 确保textarea获得焦点
-            textarea.click()
-            time.sleep(0.5)
-            
-            # 清除现有内容
-            textarea.clear()
-            time.sleep(0.5)
-            
-            # 分段输入（每500字符一段）
-            chunk_size = 500
-            for i in range(0, len(file_content), chunk_size):
-                chunk = file_content[i:i + chunk_size]
-                textarea.send_keys(chunk)
-                time.sleep(0.1)  # 短暂延迟
-            
-            print(f"✓ 方法4成功：分段输入到第{textarea_index}个textarea完成")
-            success = True
-            
-        except Exception as e:
-            print(f"✗ 方法4失败: {e}")
+    Args:
+        driver: WebDriver实例
+        textarea_selector: textarea选择器，用于确认Gradio页面仍然渲染正常
     
-    if success:
-        print(f"✓ 第{textarea_index}个textarea文本输入操作成功！")
+    Returns:
+        bool: 标签页是否健康
+    """
+    try:
+        # 标签页崩溃或浏览器退出时，这里会直接抛出异常
+        ready_state = driver.execute_script("return document.readyState")
+        if ready_state != "complete":
+            print(f"⚠️ 页面状态异常: {ready_state}")
+            return False
         
-        # 验证输入结果
-        try:
-            # 尝试获取textarea的value
-            current_value = textarea.get_attribute('value')
-            if current_value:
-                print(f"当前第{textarea_index}个textarea内容长度: {len(current_value)} 字符")
-                print(f"✓ 文本已成功输入到第{textarea_index}个textarea")
-            else:
-                # 尝试获取innerHTML
-                current_html = textarea.get_attribute('innerHTML')
-                if current_html:
-                    print(f"当前第{textarea_index}个元素内容长度: {len(current_html)} 字符")
-                    print(f"✓ 文本已成功输入到第{textarea_index}个元素")
-                else:
-                    print(f"⚠️ 无法获取第{textarea_index}个textarea的当前内容，可能需要检查页面逻辑")
-        except Exception as e:
-            print(f"验证第{textarea_index}个textarea输入结果时出错: {e}")
-    else:
-        print(f"✗ 第{textarea_index}个textarea的所有输入方法都失败了")
-    
-    return success
+        if not driver.find_elements(By.CSS_SELECTOR, textarea_selector):
+            print("⚠️ 页面中未找到textarea，Gradio页面可能已失效")
+            return False
+        
+        return True
+    except Exception as e:
+        print(f"⚠️ 浏览器健康检查失败: {e}")
+        return False
 
-def input_multiple_files_to_textareas(args, config):
+def reset_page_form(driver, config, keep_selectors=()):
     """
-    将多个文本文件内容输入到不同的textarea区域，并上传音频文件
+    重置Gradio页面表单（清空textarea并移除已上传的音频），不重新加载页面
     
     Args:
-        args: 命令行参数对象
+        driver: WebDriver实例
         config: 配置字典
+        keep_selectors: 保留已上传音频的上传区域选择器（下一轮使用相同的参考音频）
+    
+    Returns:
+        bool: 是否重置成功，失败时调用方应刷新页面
     """
-    # 从配置文件读取配置
-    text_files_config = config.get("text_files", [])
-    audio_files_config = config.get("audio_files", [])
     textarea_selector = config.get("selectors", {}).get("textarea", "textarea.scroll-hide.svelte-1f354aw")
-    button_selector = config.get("selectors", {}).get("button", "button.lg.secondary.svelte-cmf5ev")
-    target_url = config.get("url", "http://127.0.0.1:50004/")
-    timeouts = config.get("timeouts", {})
-    
-    # 设置超时时间
-    page_load_timeout = timeouts.get("page_load", 3)
-    element_wait_timeout = timeouts.get("element_wait", 10)
-    button_interval_timeout = timeouts.get("button_interval", 2)
-    observe_timeout = timeouts.get("observe_time", 15)
     
     try:
-        # 检查所有文本文件是否存在（跳过直接内容配置）
-        for config_item in text_files_config:
-            if "file_path" in config_item and not os.path.exists(config_item["file_path"]):
-                print(f"错误：文本文件不存在 - {config_item['file_path']}")
-                return False
-        
-        # 检查所有音频文件是否存在
-        for config_item in audio_files_config:
-            if not os.path.exists(config_item["file_path"]):
-                print(f"错误：音频文件不存在 - {config_item['file_path']}")
-                return False
-        
-        # 读取所有文本文件内容或使用直接指定的内容
-        file_contents = {}
-        for config_item in text_files_config:
-            # 检查是否是直接内容配置
-            if "content" in config_item:
-                print(f"使用命令行指定的文本内容: {config_item['description']}")
-                content = config_item["content"]
-                file_contents[config_item["textarea_index"]] = content
-                print(f"文本内容大小: {len(content)} 字符")
-                
-                # 显示内容的前100个字符
-                preview = content[:100] + "..." if len(content) > 100 else content
-                print(f"文本内容预览: {repr(preview)}")
-            else:
-                # 从文件读取内容
-                print(f"正在读取文本文件: {config_item['file_path']}")
-                content = read_text_file(config_item["file_path"])
-                
-                if content is None:
-                    print(f"错误：无法读取文本文件内容 - {config_item['file_path']}")
-                    return False
-                
-                file_contents[config_item["textarea_index"]] = content
-                print(f"文本文件大小: {len(content)} 字符")
-                
-                # 显示文件内容的前100个字符
-                preview = content[:100] + "..." if len(content) > 100 else content
-                print(f"文本文件内容预览: {repr(preview)}")
-        
-        print(f"Textarea选择器: {textarea_selector}")
-        print(f"按钮选择器: {button_selector}")
-        print(f"目标URL: {target_url}")
-        
-        # 从配置文件读取浏览器设置
-        browser_config = config.get("browser", {})
-        headless_mode = browser_config.get("headless", False)
-        window_size = browser_config.get("window_size", "1920,1080")
-        
-        # 检查命令行参数是否覆盖配置文件设置
-        if args.headless:
-            headless_mode = True
-            print("✓ 已启用无界面模式（从命令行参数覆盖）")
-        elif args.no_headless:
-            headless_mode = False
-            print("✓ 已启用有界面模式（从命令行参数覆盖）")
-        
-        # 配置Chrome选项
-        chrome_options = Options()
-        
-        # 设置窗口大小
-        chrome_options.add_argument(f"--window-size={window_size}")
-        
-        # 设置无界面模式
-        if headless_mode:
-            chrome_options.add_argument("--headless")
-            if not args.headless:
-                print("✓ 已启用无界面模式（从配置文件读取）")
-        else:
-            if not args.no_headless:
-                print("✓ 使用有界面模式（从配置文件读取）")
-        
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-        
-        print("正在初始化Chrome浏览器...")
-        
-        # 获取ChromeDriver路径
-        driver_path = get_chrome_driver_path(config)
-        if not driver_path:
-            raise Exception("无法获取ChromeDriver路径")
-        
-        # 创建WebDriver实例
-        service = Service(driver_path)
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-        
-        print("Chrome浏览器已成功启动！")
-        
-        # 记录浏览器启动完成时间戳
-        record_timestamp("浏览器启动完成")
-        
-        # 打开本地连接
-        print(f"正在打开连接: {target_url}")
-        driver.get(target_url)
-        
-        # 等待页面加载
-        time.sleep(page_load_timeout)
-        
-        print("连接已成功打开！")
-        print(f"当前页面标题: {driver.title}")
-        
-        # 刷新页面
-        print("正在刷新页面...")
-        driver.refresh()
-        time.sleep(page_load_timeout)
-        print("页面刷新完成！")
-        print(f"刷新后页面标题: {driver.title}")
-        
-        # 记录页面加载完成时间戳
-        record_timestamp("页面加载完成")
+        # 清空所有textarea并触发input事件，让Svelte组件同步状态
+        cleared_count = driver.execute_script("""
+            var textareas = document.querySelectorAll(arguments[0]);
+            textareas.forEach(function(textarea) {
+                textarea.value = '';
+                textarea.dispatchEvent(new Event('input', { bubbles: true }));
+            });
+            return textareas.length;
+        """, textarea_selector)
+        print(f"✓ 已清空 {cleared_count} 个textarea")
         
-        # 查找所有匹配的textarea元素
-        print(f"正在查找所有匹配的textarea: {textarea_selector}")
-        wait = WebDriverWait(driver, element_wait_timeout)
+        # 点击音频组件上的清除按钮，恢复文件上传输入框
+        cleared_audio = False
+        for audio_config in config.get("audio_files", []):
+            upload_selector = audio_config.get("upload_selector", "")
+            if not upload_selector:
+                continue
+            if upload_selector in keep_selectors:
+                print(f"♻️ 参考音频未变化，保留已上传的音频: {audio_config.get('description', upload_selector)}")
+                continue
+            cleared_audio = True
+            clear_buttons = driver.find_elements(
+                By.CSS_SELECTOR,
+                f"{upload_selector} button[aria-label='Clear'], {upload_selector} button[aria-label='清除']"
+            )
+            for clear_button in clear_buttons:
+                driver.execute_script("arguments[0].click();", clear_button)
         
-        try:
-            # 等待至少一个元素出现
-            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, textarea_selector)))
-            
-            # 查找所有匹配的元素
-            all_textareas = driver.find_elements(By.CSS_SELECTOR, textarea_selector)
-            print(f"找到 {len(all_textareas)} 个匹配的textarea元素")
-            
-            # 检查是否有足够的textarea元素
-            max_index = max([config_item["textarea_index"] for config_item in text_files_config]) if text_files_config else 0
-            if len(all_textareas) <= max_index:
-                print(f"错误：只找到 {len(all_textareas)} 个textarea元素，需要至少{max_index + 1}个")
-                driver.quit()
-                return False
-            
-        except Exception as e:
-            print(f"✗ 查找textarea失败: {e}")
-            driver.quit()
+        # 上传输入框不存在说明音频组件没有恢复，交给调用方刷新页面
+        if cleared_audio and not driver.find_elements(By.CSS_SELECTOR, "input[type='file']"):
+            print("⚠️ 表单重置后未找到文件上传输入框")
             return False
         
-        # 为每个文本文件输入到对应的textarea
-        text_success_count = 0
-        for config_item in text_files_config:
-            textarea_index = config_item["textarea_index"]
-            file_content = file_contents[textarea_index]
-            description = config_item["description"]
-            
-            print(f"\n{'='*50}")
-            print(f"处理文本文件: {description}")
-            print(f"{'='*50}")
-            
-            # 选择对应的textarea
-            textarea = all_textareas[textarea_index]
-            print(f"✓ 选择{description}")
-            
-            # 输入文本到textarea
-            success = input_text_to_textarea(driver, textarea, file_content, textarea_index + 1)
-            if success:
-                text_success_count += 1
+        return True
+    except Exception as e:
+        print(f"⚠️ 表单重置失败: {e}")
+        return False
+
+def wait_for_condition(driver, step_name, condition, timeout, poll_frequency=0.05):
+    """
+    等待页面满足指定条件（替代固定时长的 time.sleep），并记录本步骤实际等待的时间
+    
+    Args:
+        driver: WebDriver实例
+        step_name: 步骤名称（用于统计等待时间）
+        condition: 条件函数 condition(driver)，返回真值表示满足
+        timeout: 最长等待时间（秒），超时后继续执行后续操作
+        poll_frequency: 检查间隔（秒）
+    
+    Returns:
+        条件函数的返回值，超时返回None
+    """
+    start_time = time.monotonic()
+    try:
+        result = WebDriverWait(driver, timeout, poll_frequency=poll_frequency).until(condition)
+    except Exception:
+        result = None
+    
+    elapsed = time.monotonic() - start_time
+    trace = get_current_trace()
+    if trace is not None:
+        # 等待耗时记在当前线程的任务上，每轮重新开始统计
+        trace["wait_times"][step_name] = trace["wait_times"].get(step_name, 0) + elapsed
+    if result is None:
+        print(f"⏱️ 等待{step_name}超时（{elapsed:.2f}秒），继续执行")
+    else:
+        print(f"⏱️ 等待{step_name}: {elapsed:.2f}秒")
+    return result
+
+def is_network_idle(driver, state, idle_time=0.3):
+    """
+    页面网络是否已空闲：资源加载条目数连续 idle_time 秒没有增加
+    
+    Args:
+        driver: WebDriver实例
+        state: 本次等待使用的字典，记录上次观察到的条目数和开始稳定的时间
+        idle_time: 判定空闲所需的时间（秒）
+    
+    Returns:
+        bool: 是否空闲
+    """
+    count = driver.execute_script("return performance.getEntriesByType('resource').length;")
+    now = time.monotonic()
+    if state.get("count") != count:
+        state["count"] = count
+        state["since"] = now
+        return False
+    return now - state["since"] >= idle_time
+
+def wait_for_page_ready(driver, ready_selector, timeout, step_name="页面就绪"):
+    """
+    等待页面加载完成：文档加载完毕、Gradio表单元素已出现且网络请求已空闲
+    
+    Args:
+        driver: WebDriver实例
+        ready_selector: 页面就绪后一定存在的元素选择器（如textarea）
+        timeout: 最长等待时间（秒）
+        step_name: 步骤名称
+    
+    Returns:
+        bool: 是否在超时前就绪
+    """
+    network_state = {}
+    
+    def page_ready(d):
+        if d.execute_script("return document.readyState;") != "complete":
+            return False
+        if ready_selector and not d.find_elements(By.CSS_SELECTOR, ready_selector):
+            return False
+        return is_network_idle(d, network_state)
+    
+    return wait_for_condition(driver, step_name, page_ready, timeout) is not None
+
+def open_target_page(driver, target_url, page_load_timeout, ready_selector=None):
+    """
+    打开目标页面并刷新一次，确保Gradio页面状态干净
+    
+    Args:
+        driver: WebDriver实例
+        target_url: 目标URL
+        page_load_timeout: 页面加载最长等待时间（秒），页面就绪后立即继续
+        ready_selector: 页面就绪后一定存在的元素选择器
+    """
+    # 打开本地连接
+    print(f"正在打开连接: {target_url}")
+    driver.get(target_url)
+    
+    # 等待页面加载
+    wait_for_page_ready(driver, ready_selector, page_load_timeout, "页面加载")
+    
+    print("连接已成功打开！")
+    print(f"当前页面标题: {driver.title}")
+    
+    # 刷新页面
+    print("正在刷新页面...")
+    driver.refresh()
+    wait_for_page_ready(driver, ready_selector, page_load_timeout, "页面刷新")
+    print("页面刷新完成！")
+    print(f"刷新后页面标题: {driver.title}")
+
+def acquire_browser_session(args, config, session_key="default"):
+    """
+    获取常驻浏览器会话：健康时只重置表单，标签页崩溃时自动重新启动浏览器
+    
+    Args:
+        args: 命令行参数对象
+        config: 配置字典
+        session_key: 会话名称
+    
+    Returns:
+        WebDriver实例
+    """
+    target_url = config.get("url", "http://127.0.0.1:50004/")
+    textarea_selector = config.get("selectors", {}).get("textarea", "textarea.scroll-hide.svelte-1f354aw")
+    page_load_timeout = config.get("timeouts", {}).get("page_load", 3)
+    
+    session = browser_sessions.get(session_key)
+    
+    if session:
+        driver = session["driver"]
+        if session.get("tab_handle"):
+            bind_pool_tab(session["tab_handle"])
+        if session["url"] == target_url and check_browser_health(driver, textarea_selector):
+            print(f"♻️ 复用常驻浏览器会话（已服务 {session['rounds']} 轮）")
             
-            # 在输入之间稍作等待
-            time.sleep(2)
-        
-        # 记录文本输入完成时间戳
-        record_timestamp("文本输入完成")
-        
-        # 上传音频文件
-        audio_success_count = 0
-        for config_item in audio_files_config:
-            print(f"\n{'='*50}")
-            print(f"处理音频文件: {config_item['description']}")
-            print(f"{'='*50}")
+            # 与本次任务相同的参考音频保留在页面中，不清除也不重新上传
+            keep_selectors = get_reusable_audio_selectors(session, config)
+            for upload_selector in list(session["loaded_audio"]):
+                if upload_selector not in keep_selectors:
+                    del session["loaded_audio"][upload_selector]
             
-            # 查找上传区域
-            upload_area = find_upload_area(driver, config_item["upload_selector"])
-            if upload_area:
-                # 上传文件
-                success = upload_file_to_dropzone(driver, upload_area, config_item["file_path"], config_item["description"])
-                if success:
-                    audio_success_count += 1
-                
-                # 在上传之间稍作等待
-                time.sleep(2)
-            else:
-                print(f"✗ 无法找到上传区域: {config_item['upload_selector']}")
-        
-        # 记录音频上传完成时间戳
-        record_timestamp("音频上传完成")
-        
-        print(f"\n{'='*50}")
-        print(f"操作完成！")
-        print(f"文本输入: 成功 {text_success_count}/{len(text_files_config)} 个文件")
-        print(f"音频上传: 成功 {audio_success_count}/{len(audio_files_config)} 个文件")
-        print(f"{'='*50}")
-        
-        # 点击指定按钮
-        print("\n正在查找指定按钮...")
+            if not reset_page_form(driver, config, keep_selectors):
+                print("正在刷新页面以恢复表单...")
+                session["loaded_audio"].clear()
+                driver.refresh()
+                wait_for_page_ready(driver, textarea_selector, page_load_timeout, "页面刷新")
+            session["rounds"] += 1
+            record_timestamp("浏览器启动完成")
+            record_timestamp("页面加载完成")
+            return driver
         
-        try:
-            # 等待按钮出现
-            wait = WebDriverWait(driver, element_wait_timeout)
-            button = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, button_selector)))
-            
-            # 滚动到按钮位置
-            driver.execute_script("arguments[0].scrollIntoView(true);", button)
-            time.sleep(1)
+        print("⚠️ 常驻浏览器会话不可用，正在重新启动浏览器...")
+        metrics.inc("voiceapi_browser_restarts_total")
+        close_browser_session(session_key)
+    
+    # 启用标签页池时在共用的Chrome进程中打开新标签页，否则为本会话单独启动Chrome
+    tab_handle = None
+    if is_tab_pool_enabled(config):
+        driver, tab_handle = open_pool_tab(args, config)
+    else:
+        driver = create_chrome_driver(args, config)
+    record_timestamp("浏览器启动完成")
+    
+    try:
+        open_target_page(driver, target_url, page_load_timeout, textarea_selector)
+    except Exception:
+        if tab_handle:
+            close_pool_tab(driver, tab_handle)
+        else:
+            driver.quit()
+        raise
+    
+    record_timestamp("页面加载完成")
+    
+    browser_sessions[session_key] = {
+        "driver": driver,
+        "tab_handle": tab_handle,  # 标签页池中的标签页句柄，单独启动Chrome时为None
+        "url": target_url,
+        "rounds": 1,
+        "started_at": time.time(),
+        "loaded_audio": {}  # 上传选择器 -> 当前页面中已加载参考音频的SHA-256
+    }
+    return driver
+
+def get_file_sha256(file_path):
+    """
+    计算文件内容的SHA-256，文件大小和修改时间未变化时直接使用缓存结果
+    
+    Args:
+        file_path: 文件路径
+    
+    Returns:
+        str: 十六进制SHA-256，文件不存在返回None
+    """
+    try:
+        abs_path = os.path.abspath(file_path)
+        stat = os.stat(abs_path)
+    except OSError:
+        return None
+    
+    cache_key = (abs_path, stat.st_size, stat.st_mtime_ns)
+    digest = file_hash_cache.get(cache_key)
+    if digest is None:
+        sha256 = hashlib.sha256()
+        with open(abs_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                sha256.update(block)
+        digest = sha256.hexdigest()
+        file_hash_cache[cache_key] = digest
+    return digest
+
+def get_reusable_audio_selectors(session, config):
+    """
+    找出页面中已加载、且与本次任务内容相同的参考音频
+    
+    Args:
+        session: 常驻浏览器会话
+        config: 本次任务的配置字典
+    
+    Returns:
+        set: 可以直接复用的上传区域选择器
+    """
+    if not config.get("browser", {}).get("reference_audio_cache", False):
+        return set()
+    
+    reusable = set()
+    for audio_config in config.get("audio_files", []):
+        upload_selector = audio_config.get("upload_selector", "")
+        loaded_hash = session.get("loaded_audio", {}).get(upload_selector)
+        if loaded_hash and loaded_hash == get_file_sha256(audio_config["file_path"]):
+            reusable.add(upload_selector)
+    return reusable
+
+def get_loaded_reference_hashes():
+    """
+    汇总所有常驻浏览器会话中已加载参考音频的SHA-256
+    
+    Returns:
+        set: SHA-256集合
+    """
+    hashes = set()
+    for session in list(browser_sessions.values()):
+        hashes.update(digest for digest in list(session.get("loaded_audio", {}).values()) if digest)
+    return hashes
+
+def close_browser_session(session_key=None):
+    """
+    关闭常驻浏览器会话
+    
+    Args:
+        session_key: 会话名称，为None时关闭所有会话
+    """
+    keys = [session_key] if session_key else list(browser_sessions.keys())
+    for key in keys:
+        session = browser_sessions.pop(key, None)
+        if not session:
+            continue
+        try:
+            if session.get("tab_handle"):
+                close_pool_tab(session["driver"], session["tab_handle"])
+            else:
+                session["driver"].quit()
+            print(f"常驻浏览器会话已关闭: {key}")
+        except Exception as e:
+            print(f"⚠️ 关闭浏览器会话失败 {key}: {e}")
+
+def read_text_file(file_path):
+    """读取文本文件内容"""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            content = file.read()
+        return content
+    except UnicodeDecodeError:
+        # 如果UTF-8失败，尝试其他编码
+        try:
+            with open(file_path, 'r', encoding='gbk') as file:
+                content = file.read()
+            return content
+        except:
+            try:
+                with open(file_path, 'r', encoding='latin-1') as file:
+                    content = file.read()
+                return content
+            except Exception as e:
+                print(f"读取文件失败: {e}")
+                return None
+
+def read_prompt_file(file_path):
+    """
+    读取提示词等文本文件，内容保存在LRU缓存中，文件未变化时不重复读取磁盘
+    
+    Args:
+        file_path: 文本文件路径
+    
+    Returns:
+        str: 文件内容，读取失败返回None
+    """
+    try:
+        abs_path = os.path.abspath(file_path)
+        stat = os.stat(abs_path)
+    except OSError:
+        return read_text_file(file_path)
+    
+    cache_key = (abs_path, stat.st_size, stat.st_mtime_ns)
+    entries = prompt_file_cache["entries"]
+    with prompt_file_cache["lock"]:
+        if cache_key in entries:
+            entries.move_to_end(cache_key)
+            return entries[cache_key]
+    
+    content = read_text_file(abs_path)
+    if content is None:
+        return None
+    
+    with prompt_file_cache["lock"]:
+        entries[cache_key] = content
+        entries.move_to_end(cache_key)
+        while len(entries) > PROMPT_CACHE_SIZE:
+            entries.popitem(last=False)
+    return content
+
+def is_element_focused(driver, element):
+    """
+    元素是否已获得焦点
+    
+    Args:
+        driver: WebDriver实例
+        element: 页面元素
+    
+    Returns:
+        bool: 是否为当前焦点元素
+    """
+    return driver.execute_script("return document.activeElement === arguments[0];", element)
+
+def is_textarea_value_applied(textarea, expected_content):
+    """
+    textarea的值是否已与期望内容一致（忽略换行符差异）
+    
+    Args:
+        textarea: textarea元素
+        expected_content: 期望的文本内容
+    
+    Returns:
+        bool: 是否一致
+    """
+    current_value = textarea.get_attribute('value') or ""
+    return current_value.replace("\r\n", "\n") == expected_content.replace("\r\n", "\n")
+
+# 音频组件上传完成后出现的播放器元素，以及上传过程中的进度元素
+UPLOADED_MEDIA_SELECTOR = "audio, [data-testid*='waveform'], .waveform-container"
+UPLOAD_PROGRESS_SELECTOR = ".uploading, .upload-progress, .progress-bar, progress"
+
+def count_uploaded_media(driver):
+    """
+    统计页面中已加载音频的播放器数量
+    
+    Args:
+        driver: WebDriver实例
+    
+    Returns:
+        int: 播放器数量
+    """
+    try:
+        return len(driver.find_elements(By.CSS_SELECTOR, UPLOADED_MEDIA_SELECTOR))
+    except Exception:
+        return 0
+
+def is_upload_complete(driver, media_count_before):
+    """
+    Gradio音频组件是否已完成上传：出现了新的播放器，且没有上传进度元素
+    
+    Args:
+        driver: WebDriver实例
+        media_count_before: 上传前的播放器数量
+    
+    Returns:
+        bool: 是否上传完成
+    """
+    if driver.find_elements(By.CSS_SELECTOR, UPLOAD_PROGRESS_SELECTOR):
+        return False
+    return count_uploaded_media(driver) > media_count_before
+
+# 一次性填写整个表单的脚本：写入所有textarea（与 BULK_INPUT_SCRIPT 相同的方式），
+# 同时定位每个上传区域对应的文件输入框，返回各textarea的校验值、文件输入框和当前播放器数量
+BATCH_FORM_SCRIPT = """
+var textareas = arguments[0];
+var contents = arguments[1];
+var uploadSelectors = arguments[2];
+var mediaSelector = arguments[3];
+var setter = Object.getOwnPropertyDescriptor(HTMLTextAreaElement.prototype, 'value').set;
+var fingerprints = [];
+for (var t = 0; t < textareas.length; t++) {
+    var textarea = textareas[t];
+    setter.call(textarea, contents[t]);
+    textarea.dispatchEvent(new Event('input', { bubbles: true }));
+    textarea.dispatchEvent(new Event('change', { bubbles: true }));
+    var value = textarea.value;
+    var hash = 0x811c9dc5;
+    for (var i = 0; i < value.length; i++) {
+        hash ^= value.charCodeAt(i);
+        hash = Math.imul(hash, 0x01000193) >>> 0;
+    }
+    fingerprints.push([value.length, hash]);
+}
+var fileInputs = [];
+for (var u = 0; u < uploadSelectors.length; u++) {
+    var area = document.querySelector(uploadSelectors[u]);
+    var input = null;
+    if (area) {
+        if (area.matches("input[type='file']")) {
+            input = area;
+        } else {
+            input = area.querySelector("input[type='file']");
+            var block = area.closest('.block, .form, [id^="component-"]');
+            if (!input && block) {
+                input = block.querySelector("input[type='file']");
+            }
+        }
+    }
+    fileInputs.push(input);
+}
+return [fingerprints, fileInputs, document.querySelectorAll(mediaSelector).length];
+"""
+
+def file_input_has_file(driver, file_input, file_path):
+    """
+    检查文件输入框是否真正收到了文件（最后一个文件的大小与本地文件一致）
+    
+    Args:
+        driver: WebDriver实例
+        file_input: 文件输入框元素
+        file_path: 本地文件路径
+    
+    Returns:
+        bool: 文件是否已进入输入框
+    """
+    size = driver.execute_script(
+        "var files = arguments[0].files; return files && files.length ? files[files.length - 1].size : -1;",
+        file_input
+    )
+    return size == os.path.getsize(file_path)
+
+def populate_form(driver, all_textareas, text_files_config, file_contents, audio_files_config, upload_wait_timeout):
+    """
+    一次性填写表单：一次脚本调用写入所有textarea并定位所有文件输入框，
+    随后连续设置所有音频文件，最后只等待一次Gradio确认全部字段
+    
+    Args:
+        driver: WebDriver实例
+        all_textareas: 页面中所有的textarea元素
+        text_files_config: 文本文件配置列表
+        file_contents: textarea索引到文本内容的映射
+        audio_files_config: 音频文件配置列表
+        upload_wait_timeout: 等待全部字段生效的最长时间（秒）
+    
+    Returns:
+        tuple: (未能批量写入的文本配置列表, 未能批量上传的音频配置列表)
+    """
+    textareas = [all_textareas[item["textarea_index"]] for item in text_files_config]
+    contents = [file_contents[item["textarea_index"]] for item in text_files_config]
+    upload_selectors = [item["upload_selector"] for item in audio_files_config]
+    
+    print(f"\n正在一次性填写表单: {len(textareas)} 个文本框, {len(upload_selectors)} 个音频上传区域")
+    fingerprints, file_inputs, media_count_before = driver.execute_script(
+        BATCH_FORM_SCRIPT, textareas, contents, upload_selectors, UPLOADED_MEDIA_SELECTOR
+    )
+    
+    failed_texts = []
+    for config_item, content, fingerprint in zip(text_files_config, contents, fingerprints):
+        if tuple(fingerprint) == text_fingerprint(content):
+            print(f"✓ {config_item['description']}: 写入 {len(content)} 个字符，校验通过")
+        else:
+            print(f"✗ {config_item['description']}: 写入校验失败，将逐个重新输入")
+            failed_texts.append(config_item)
+    
+    # 浏览器不允许脚本设置文件输入框的值，只能逐个send_keys，但各文件之间不再等待
+    failed_audios = []
+    uploaded_count = 0
+    for config_item, file_input in zip(audio_files_config, file_inputs):
+        if file_input is None or not os.path.exists(config_item["file_path"]):
+            print(f"✗ {config_item['description']}: 未找到对应的文件输入框或文件不存在，将逐个上传")
+            failed_audios.append(config_item)
+            continue
+        try:
+            file_input.send_keys(os.path.abspath(config_item["file_path"]))
+            if not file_input_has_file(driver, file_input, config_item["file_path"]):
+                print(f"✗ {config_item['description']}: 文件输入框未收到文件，将逐个上传")
+                failed_audios.append(config_item)
+                continue
+            uploaded_count += 1
+            print(f"✓ {config_item['description']}: 已提交文件 {config_item['file_path']}")
+        except Exception as e:
+            print(f"✗ {config_item['description']}: 提交文件失败 ({e})，将逐个上传")
+            failed_audios.append(config_item)
+    
+    # 等待Gradio确认所有字段：文本仍是写入的内容，新出现的播放器数量与上传数一致且没有上传进度
+    written = [(textarea, content) for textarea, content, item in zip(textareas, contents, text_files_config) if item not in failed_texts]
+    
+    def form_acknowledged(d):
+        if not all(is_textarea_value_applied(textarea, content) for textarea, content in written):
+            return False
+        if uploaded_count == 0:
+            return True
+        if d.find_elements(By.CSS_SELECTOR, UPLOAD_PROGRESS_SELECTOR):
+            return False
+        return count_uploaded_media(d) >= media_count_before + uploaded_count
+    
+    wait_for_condition(driver, "表单填写生效", form_acknowledged, upload_wait_timeout)
+    return failed_texts, failed_audios
+
+def upload_file_to_dropzone(driver, upload_area, file_path, file_description):
+    """
+    将文件上传到指定的拖拽区域
+    
+    Args:
+        driver: WebDriver实例
+        upload_area: 拖拽区域元素
+        file_path: 要上传的文件路径
+        file_description: 文件描述（用于日志显示）
+    """
+    print(f"\n开始上传文件到拖拽区域: {file_description}")
+    
+    # 检查文件是否存在
+    if not os.path.exists(file_path):
+        print(f"错误：文件不存在 - {file_path}")
+        return False
+    
+    # 获取文件的绝对路径
+    abs_file_path = os.path.abspath(file_path)
+    print(f"文件路径: {abs_file_path}")
+    print(f"文件大小: {os.path.getsize(abs_file_path)} 字节")
+    
+    # 滚动到拖拽区域（scrollIntoView 是同步执行的，无需等待）
+    driver.execute_script("arguments[0].scrollIntoView(true);", upload_area)
+    
+    # 显示拖拽区域信息
+    print(f"拖拽区域位置: {upload_area.location}")
+    print(f"拖拽区域大小: {upload_area.size}")
+    
+    # 尝试多种上传方法
+    print(f"开始尝试多种上传方法...")
+    
+    success = False
+    
+    # 方法1：直接文件输入
+    if not success:
+        try:
+            print(f"尝试方法1：直接设置文件输入框...")
+            file_input = driver.find_element(By.CSS_SELECTOR, "input[type='file']")
+            file_input.send_keys(abs_file_path)
+            if not file_input_has_file(driver, file_input, abs_file_path):
+                raise Exception("文件输入框未收到文件")
+            print(f"✓ 方法1成功：直接设置文件路径")
+            success = True
+        except Exception as e:
+            print(f"✗ 方法1失败: {e}")
+    
+    # 方法2：JavaScript拖拽
+    if not success:
+        try:
+            print(f"尝试方法2：JavaScript模拟拖拽...")
+            
+            # 获取文件信息
+            file_name = os.path.basename(file_path)
+            file_size = os.path.getsize(file_path)
+            file_extension = os.path.splitext(file_name)[1].lower()
+            
+            # 根据文件扩展名确定MIME类型
+            mime_types = {
+                '.wav': 'audio/wav',
+                '.mp3': 'audio/mpeg',
+                '.ogg': 'audio/ogg',
+                '.m4a': 'audio/mp4',
+                '.flac': 'audio/flac',
+                '.jpg': 'image/jpeg',
+                '.jpeg': 'image/jpeg',
+                '.png': 'image/png',
+                '.gif': 'image/gif',
+                '.pdf': 'application/pdf',
+                '.txt': 'text/plain',
+                '.doc': 'application/msword',
+                '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+            }
+            mime_type = mime_types.get(file_extension, 'application/octet-stream')
+            
+            # 创建拖拽事件
+            js_code = f"""
+            var dropZone = arguments[0];
+            var fileName = '{file_name}';
+            var filePath = '{abs_file_path.replace("\\", "\\\\")}';
+            var fileSize = {file_size};
+            var mimeType = '{mime_type}';
+            
+            // 用文件的实际内容创建File对象
+            var binary = atob(arguments[1]);
+            var bytes = new Uint8Array(binary.length);
+            for (var i = 0; i < binary.length; i++) {{
+                bytes[i] = binary.charCodeAt(i);
+            }}
+            var file = new File([bytes], fileName, {{ 
+                type: mimeType,
+                lastModified: Date.now()
+            }});
+            
+            // 创建DataTransfer对象
+            var dataTransfer = new DataTransfer();
+            dataTransfer.items.add(file);
+            
+            // 创建拖拽事件
+            var dragEnterEvent = new DragEvent('dragenter', {{
+                bubbles: true,
+                cancelable: true,
+                dataTransfer: dataTransfer
+            }});
+            
+            var dragOverEvent = new DragEvent('dragover', {{
+                bubbles: true,
+                cancelable: true,
+                dataTransfer: dataTransfer
+            }});
+            
+            var dropEvent = new DragEvent('drop', {{
+                bubbles: true,
+                cancelable: true,
+                dataTransfer: dataTransfer
+            }});
+            
+            // 触发事件
+            dropZone.dispatchEvent(dragEnterEvent);
+            dropZone.dispatchEvent(dragOverEvent);
+            dropZone.dispatchEvent(dropEvent);
+            
+            return true;
+            """
+            
+            with open(abs_file_path, 'rb') as f:
+                file_data = base64.b64encode(f.read()).decode('ascii')
+            result = driver.execute_script(js_code, upload_area, file_data)
+            print(f"✓ 方法2成功：JavaScript拖拽事件已触发")
+            success = True
+            
+        except Exception as e:
+            print(f"✗ 方法2失败: {e}")
+    
+    # 方法3：ActionChains拖拽
+    if not success:
+        try:
+            print(f"尝试方法3：ActionChains拖拽...")
+            
+            actions = ActionChains(driver)
+            
+            # 移动到拖拽区域并执行拖拽
+            actions.move_to_element(upload_area)
+            actions.click_and_hold()
+            actions.move_by_offset(10, 10)
+            actions.release()
+            actions.perform()
+            
+            print(f"✓ 方法3成功：ActionChains拖拽操作完成")
+            success = True
+            
+        except Exception as e:
+            print(f"✗ 方法3失败: {e}")
+    
+    # 方法4：点击拖拽区域
+    if not success:
+        try:
+            print(f"尝试方法4：点击拖拽区域...")
+            
+            upload_area.click()
+            
+            print(f"✓ 方法4成功：点击拖拽区域完成")
+            success = True
+            
+        except Exception as e:
+            print(f"✗ 方法4失败: {e}")
+    
+    if success:
+        print(f"✓ {file_description}文件上传操作成功！")
+    else:
+        print(f"✗ {file_description}的所有上传方法都失败了")
+    
+    return success
+
+def find_upload_area(driver, upload_selector):
+    """
+    查找上传区域，支持多种选择器
+    
+    Args:
+        driver: WebDriver实例
+        upload_selector: 主要选择器
+    
+    Returns:
+        找到的上传区域元素或None
+    """
+    print(f"正在查找上传区域: {upload_selector}")
+    wait = WebDriverWait(driver, 10)
+    
+    try:
+        upload_area = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, upload_selector)))
+        print(f"✓ 找到上传区域: {upload_selector}")
+        return upload_area
+    except:
+        print(f"✗ 未找到上传区域: {upload_selector}")
+        print("尝试查找所有可能的上传区域...")
+        
+        # 查找所有可能的上传区域
+        possible_selectors = [
+            upload_selector,
+            "[class*='svelte']",
+            "[class*='upload']",
+            "[class*='drop']",
+            "[class*='drag']",
+            "input[type='file']",
+            "[data-testid*='upload']",
+            "[data-testid*='drop']",
+            "[class*='file']",
+            "[class*='area']"
+        ]
+        
+        for selector in possible_selectors:
+            try:
+                elements = driver.find_elements(By.CSS_SELECTOR, selector)
+                if elements:
+                    upload_area = elements[0]
+                    print(f"找到可能的上传区域: {selector}")
+                    return upload_area
+            except:
+                continue
+        
+        print("错误：未找到任何上传区域")
+        return None
+
+# 一次性写入textarea的脚本：文本作为参数传入（不拼接进脚本，避免转义问题），
+# 通过原生 value setter 赋值并触发 input/change 事件，让 Svelte/Gradio 感知到变化；
+# 返回写入后的长度和 FNV-1a 哈希（按UTF-16编码单元计算）用于校验
+BULK_INPUT_SCRIPT = """
+var textarea = arguments[0];
+var content = arguments[1];
+var setter = Object.getOwnPropertyDescriptor(HTMLTextAreaElement.prototype, 'value').set;
+textarea.focus();
+setter.call(textarea, content);
+textarea.dispatchEvent(new Event('input', { bubbles: true }));
+textarea.dispatchEvent(new Event('change', { bubbles: true }));
+var value = textarea.value;
+var hash = 0x811c9dc5;
+for (var i = 0; i < value.length; i++) {
+    hash ^= value.charCodeAt(i);
+    hash = Math.imul(hash, 0x01000193) >>> 0;
+}
+return [value.length, hash];
+"""
+
+def text_fingerprint(text):
+    """
+    计算文本的长度和 FNV-1a 哈希，与 BULK_INPUT_SCRIPT 在浏览器中的计算方式一致
+    
+    Args:
+        text: 文本内容（换行符会按textarea的规则统一为\\n）
+    
+    Returns:
+        tuple: (UTF-16长度, 哈希值)
+    """
+    data = text.replace("\r\n", "\n").replace("\r", "\n").encode("utf-16-le")
+    hash_value = 0x811c9dc5
+    for i in range(0, len(data), 2):
+        hash_value ^= data[i] | (data[i + 1] << 8)
+        hash_value = (hash_value * 0x01000193) & 0xFFFFFFFF
+    return len(data) // 2, hash_value
+
+def bulk_set_textarea_value(driver, textarea, file_content):
+    """
+    通过一次 execute_script 调用把文本写入textarea，并校验长度和哈希
+    
+    Args:
+        driver: WebDriver实例
+        textarea: textarea元素
+        file_content: 要写入的文本内容
+    
+    Returns:
+        bool: 写入的内容是否与原文一致
+    """
+    length, hash_value = driver.execute_script(BULK_INPUT_SCRIPT, textarea, file_content)
+    expected_length, expected_hash = text_fingerprint(file_content)
+    if length != expected_length or hash_value != expected_hash:
+        print(f"✗ 批量写入校验失败: 期望 {expected_length} 个字符，实际 {length} 个字符")
+        return False
+    return True
+
+def input_text_to_textarea(driver, textarea, file_content, textarea_index, bulk_threshold=None):
+    """
+    将文本内容输入到指定的textarea元素
+    
+    Args:
+        driver: WebDriver实例
+        textarea: textarea元素
+        file_content: 要输入的文本内容
+        textarea_index: textarea的索引（用于日志显示）
+        bulk_threshold: 文本超过该字符数时优先使用一次性JavaScript写入，None表示不启用
+    """
+    print(f"\n开始向第{textarea_index}个textarea输入文本...")
+    
+    # 滚动到textarea（scrollIntoView 是同步执行的，无需等待）
+    driver.execute_script("arguments[0].scrollIntoView(true);", textarea)
+    
+    # 显示textarea信息
+    print(f"第{textarea_index}个Textarea位置: {textarea.location}")
+    print(f"第{textarea_index}个Textarea大小: {textarea.size}")
+    print(f"第{textarea_index}个Textarea标签: {textarea.tag_name}")
+    print(f"第{textarea_index}个Textarea是否可编辑: {textarea.is_enabled()}")
+    
+    # 尝试多种输入方法
+    print(f"开始尝试多种输入方法...")
+    
+    success = False
+    
+    # 长文本逐字符send_keys非常慢，超过阈值时先尝试一次性写入
+    if bulk_threshold is not None and len(file_content) > bulk_threshold:
+        try:
+            print(f"文本共 {len(file_content)} 个字符，超过阈值 {bulk_threshold}，使用批量写入...")
+            if bulk_set_textarea_value(driver, textarea, file_content):
+                print(f"✓ 批量写入第{textarea_index}个textarea完成，校验通过")
+                success = True
+        except Exception as e:
+            print(f"✗ 批量写入失败: {e}")
+    
+    # 方法1：直接send_keys到textarea
+    if not success:
+        try:
+            print(f"尝试方法1：直接send_keys到第{textarea_index}个textarea...")
+            
+            # 确保textarea获得焦点
+            textarea.click()
+            wait_for_condition(driver, "输入框获得焦点", lambda d: is_element_focused(d, textarea), 2)
+            
+            # 清除现有内容
+            textarea.clear()
+            wait_for_condition(driver, "输入框清空", lambda d: textarea.get_attribute('value') == "", 2)
+            
+            # 输入文本内容
+            textarea.send_keys(file_content)
+            print(f"✓ 方法1成功：直接send_keys到第{textarea_index}个textarea完成")
+            success = True
+        
+        except Exception as e:
+            print(f"✗ 方法1失败: {e}")
+    
+    # 方法2：使用JavaScript设置textarea的value
+    if not success:
+        try:
+            print(f"尝试方法2：JavaScript设置第{textarea_index}个textarea的value...")
+            
+            if not bulk_set_textarea_value(driver, textarea, file_content):
+                raise Exception("写入内容校验失败")
+            print(f"✓ 方法2成功：JavaScript设置第{textarea_index}个textarea的value完成，设置了 {len(file_content)} 个字符")
+            success = True
+            
+        except Exception as e:
+            print(f"✗ 方法2失败: {e}")
+    
+    # 方法3：使用ActionChains操作textarea
+    if not success:
+        try:
+            print(f"尝试方法3：ActionChains操作第{textarea_index}个textarea...")
+            
+            actions = ActionChains(driver)
+            
+            # 点击textarea
+            actions.click(textarea)
+            actions.perform()
+            wait_for_condition(driver, "输入框获得焦点", lambda d: is_element_focused(d, textarea), 2)
+            
+            # 全选并删除现有内容
+            actions.key_down(Keys.CONTROL).send_keys('a').key_up(Keys.CONTROL).perform()
+            actions.send_keys(Keys.DELETE).perform()
+            wait_for_condition(driver, "输入框清空", lambda d: textarea.get_attribute('value') == "", 2)
+            
+            # 输入内容
+            actions.send_keys(file_content).perform()
+            print(f"✓ 方法3成功：ActionChains操作第{textarea_index}个textarea完成")
+            success = True
+            
+        except Exception as e:
+            print(f"✗ 方法3失败: {e}")
+    
+    # 方法4：分段输入到textarea（适用于大文件）
+    if not success:
+        try:
+            print(f"尝试方法4：分段输入到第{textarea_index}个textarea...")
+            
+            # 确保textarea获得焦点
+            textarea.click()
+            wait_for_condition(driver, "输入框获得焦点", lambda d: is_element_focused(d, textarea), 2)
+            
+            # 清除现有内容
+            textarea.clear()
+            wait_for_condition(driver, "输入框清空", lambda d: textarea.get_attribute('value') == "", 2)
+            
+            # 分段输入（每500字符一段，send_keys 返回时该段已输入完成）
+            chunk_size = 500
+            for i in range(0, len(file_content), chunk_size):
+                chunk = file_content[i:i + chunk_size]
+                textarea.send_keys(chunk)
+            
+            print(f"✓ 方法4成功：分段输入到第{textarea_index}个textarea完成")
+            success = True
+            
+        except Exception as e:
+            print(f"✗ 方法4失败: {e}")
+    
+    if success:
+        print(f"✓ 第{textarea_index}个textarea文本输入操作成功！")
+        
+        # 验证输入结果
+        try:
+            # 尝试获取textarea的value
+            current_value = textarea.get_attribute('value')
+            if current_value:
+                print(f"当前第{textarea_index}个textarea内容长度: {len(current_value)} 字符")
+                print(f"✓ 文本已成功输入到第{textarea_index}个textarea")
+            else:
+                # 尝试获取innerHTML
+                current_html = textarea.get_attribute('innerHTML')
+                if current_html:
+                    print(f"当前第{textarea_index}个元素内容长度: {len(current_html)} 字符")
+                    print(f"✓ 文本已成功输入到第{textarea_index}个元素")
+                else:
+                    print(f"⚠️ 无法获取第{textarea_index}个textarea的当前内容，可能需要检查页面逻辑")
+        except Exception as e:
+            print(f"验证第{textarea_index}个textarea输入结果时出错: {e}")
+    else:
+        print(f"✗ 第{textarea_index}个textarea的所有输入方法都失败了")
+    
+    return success
+
+def load_job_inputs(text_files_config, audio_files_config):
+    """
+    检查本次任务的文本/音频文件是否存在，并读取所有文本内容
+    
+    Args:
+        text_files_config: 文本文件配置列表
+        audio_files_config: 音频文件配置列表
+    
+    Returns:
+        dict: textarea索引 -> 文本内容，检查或读取失败返回None
+    """
+    # 检查所有文本文件是否存在（跳过直接内容配置）
+    for config_item in text_files_config:
+        if "file_path" in config_item and not os.path.exists(config_item["file_path"]):
+            print(f"错误：文本文件不存在 - {config_item['file_path']}")
+            return None
+    
+    # 检查所有音频文件是否存在
+    for config_item in audio_files_config:
+        if not os.path.exists(config_item["file_path"]):
+            print(f"错误：音频文件不存在 - {config_item['file_path']}")
+            return None
+    
+    # 读取所有文本文件内容或使用直接指定的内容
+    file_contents = {}
+    for config_item in text_files_config:
+        # 检查是否是直接内容配置
+        if "content" in config_item:
+            print(f"使用已指定的文本内容: {config_item['description']}")
+            content = config_item["content"]
+            file_contents[config_item["textarea_index"]] = content
+            print(f"文本内容大小: {len(content)} 字符")
+            
+            # 显示内容的前100个字符
+            preview = content[:100] + "..." if len(content) > 100 else content
+            print(f"文本内容预览: {repr(preview)}")
+        else:
+            # 从文件读取内容
+            print(f"正在读取文本文件: {config_item['file_path']}")
+            content = read_prompt_file(config_item["file_path"])
+            
+            if content is None:
+                print(f"错误：无法读取文本文件内容 - {config_item['file_path']}")
+                return None
+            
+            file_contents[config_item["textarea_index"]] = content
+            print(f"文本文件大小: {len(content)} 字符")
+            
+            # 显示文件内容的前100个字符
+            preview = content[:100] + "..." if len(content) > 100 else content
+            print(f"文本文件内容预览: {repr(preview)}")
+    
+    return file_contents
+
+def fill_job_form(driver, config, file_contents, session=None):
+    """
+    填写任务表单：查找textarea，写入所有文本并上传参考音频（常驻会话中已加载的相同音频不重新上传）
+    
+    Args:
+        driver: WebDriver实例
+        config: 本次任务的配置字典
+        file_contents: textarea索引到文本内容的映射
+        session: 常驻浏览器会话，不使用常驻会话时为None
+    
+    Returns:
+        tuple: (文本输入成功数, 音频上传成功数)，页面中的textarea不足时返回None
+    """
+    text_files_config = config.get("text_files", [])
+    audio_files_config = config.get("audio_files", [])
+    textarea_selector = config.get("selectors", {}).get("textarea", "textarea.scroll-hide.svelte-1f354aw")
+    timeouts = config.get("timeouts", {})
+    element_wait_timeout = timeouts.get("element_wait", 10)
+    upload_wait_timeout = timeouts.get("upload_wait", 5)
+    bulk_input_threshold = config.get("browser", {}).get("bulk_input_threshold", 200)
+    
+    # 查找所有匹配的textarea元素
+    print(f"正在查找所有匹配的textarea: {textarea_selector}")
+    wait = WebDriverWait(driver, element_wait_timeout)
+    
+    try:
+        # 等待至少一个元素出现
+        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, textarea_selector)))
+        
+        # 查找所有匹配的元素
+        all_textareas = driver.find_elements(By.CSS_SELECTOR, textarea_selector)
+        print(f"找到 {len(all_textareas)} 个匹配的textarea元素")
+        
+        # 检查是否有足够的textarea元素
+        max_index = max([config_item["textarea_index"] for config_item in text_files_config]) if text_files_config else 0
+        if len(all_textareas) <= max_index:
+            print(f"错误：只找到 {len(all_textareas)} 个textarea元素，需要至少{max_index + 1}个")
+            return None
+    
+    except Exception as e:
+        print(f"✗ 查找textarea失败: {e}")
+        return None
+    
+    pending_texts = text_files_config
+    pending_audios = audio_files_config
+    text_success_count = 0
+    audio_success_count = 0
+    
+    # 常驻会话中已加载相同内容的参考音频不再重新上传
+    if session:
+        reusable_selectors = get_reusable_audio_selectors(session, config)
+        pending_audios = [item for item in audio_files_config if item["upload_selector"] not in reusable_selectors]
+        audio_success_count = len(audio_files_config) - len(pending_audios)
+        if audio_success_count:
+            print(f"♻️ 跳过 {audio_success_count} 个已加载的参考音频")
+    
+    # 一次性填写所有字段，未能批量完成的字段再按原方式逐个处理
+    if config.get("browser", {}).get("batch_form_fill", False):
+        try:
+            batch_audios = pending_audios
+            with trace_span("批量填写表单"):
+                pending_texts, pending_audios = populate_form(
+                    driver, all_textareas, text_files_config, file_contents, batch_audios, upload_wait_timeout
+                )
+            text_success_count = len(text_files_config) - len(pending_texts)
+            audio_success_count += len(batch_audios) - len(pending_audios)
+            if session:
+                for item in batch_audios:
+                    if item not in pending_audios:
+                        session["loaded_audio"][item["upload_selector"]] = get_file_sha256(item["file_path"])
+        except Exception as e:
+            print(f"✗ 批量填写表单失败，改为逐个处理: {e}")
+    
+    # 为每个文本文件输入到对应的textarea
+    for config_item in pending_texts:
+        textarea_index = config_item["textarea_index"]
+        file_content = file_contents[textarea_index]
+        description = config_item["description"]
+        
+        print(f"\n{'='*50}")
+        print(f"处理文本文件: {description}")
+        print(f"{'='*50}")
+        
+        # 选择对应的textarea
+        textarea = all_textareas[textarea_index]
+        print(f"✓ 选择{description}")
+        
+        # 输入文本到textarea
+        with trace_span(f"文本输入[第{textarea_index + 1}个]"):
+            success = input_text_to_textarea(driver, textarea, file_content, textarea_index + 1, bulk_input_threshold)
+            if success:
+                text_success_count += 1
+                
+                # 等待页面接收到完整内容后再处理下一个输入框
+                wait_for_condition(driver, "文本输入生效", lambda d: is_textarea_value_applied(textarea, file_content), element_wait_timeout)
+    
+    # 记录文本输入完成时间戳
+    record_timestamp("文本输入完成")
+    
+    # 上传音频文件
+    for config_item in pending_audios:
+        print(f"\n{'='*50}")
+        print(f"处理音频文件: {config_item['description']}")
+        print(f"{'='*50}")
+        
+        # 查找上传区域
+        upload_area = find_upload_area(driver, config_item["upload_selector"])
+        if upload_area:
+            # 上传文件
+            with trace_span(f"音频上传[{config_item['description']}]"):
+                media_count_before = count_uploaded_media(driver)
+                success = upload_file_to_dropzone(driver, upload_area, config_item["file_path"], config_item["description"])
+                if success:
+                    audio_success_count += 1
+                    if session:
+                        session["loaded_audio"][config_item["upload_selector"]] = get_file_sha256(config_item["file_path"])
+                    
+                    # 等待Gradio完成上传（出现播放器且没有上传进度）
+                    wait_for_condition(driver, "音频上传完成", lambda d: is_upload_complete(d, media_count_before), upload_wait_timeout)
+        else:
+            print(f"✗ 无法找到上传区域: {config_item['upload_selector']}")
+    
+    # 记录音频上传完成时间戳
+    record_timestamp("音频上传完成")
+    
+    print(f"\n{'='*50}")
+    print(f"操作完成！")
+    print(f"文本输入: 成功 {text_success_count}/{len(text_files_config)} 个文件")
+    print(f"音频上传: 成功 {audio_success_count}/{len(audio_files_config)} 个文件")
+    print(f"{'='*50}")
+    
+    return text_success_count, audio_success_count
+
+def input_multiple_files_to_textareas(args, config, keep_browser=False, session_key="default"):
+    """
+    将多个文本文件内容输入到不同的textarea区域，并上传音频文件
+    
+    Args:
+        args: 命令行参数对象
+        config: 配置字典
+        keep_browser: 是否使用常驻浏览器会话（完成后不关闭浏览器，供下一轮复用）
+        session_key: 常驻浏览器会话名称（工作池中每个工作线程使用各自的会话）
+    """
+    # 从配置文件读取配置
+    text_files_config = config.get("text_files", [])
+    audio_files_config = config.get("audio_files", [])
+    textarea_selector = config.get("selectors", {}).get("textarea", "textarea.scroll-hide.svelte-1f354aw")
+    button_selector = config.get("selectors", {}).get("button", "button.lg.secondary.svelte-cmf5ev")
+    target_url = config.get("url", "http://127.0.0.1:50004/")
+    timeouts = config.get("timeouts", {})
+    
+    # 设置超时时间
+    page_load_timeout = timeouts.get("page_load", 3)
+    element_wait_timeout = timeouts.get("element_wait", 10)
+    button_interval_timeout = timeouts.get("button_interval", 2)
+    observe_timeout = timeouts.get("observe_time", 15)
+    
+    try:
+        # 检查文件并读取所有文本内容
+        file_contents = load_job_inputs(text_files_config, audio_files_config)
+        if file_contents is None:
+            return False
+        
+        print(f"Textarea选择器: {textarea_selector}")
+        print(f"按钮选择器: {button_selector}")
+        print(f"目标URL: {target_url}")
+        
+        # 填写表单：流水线已在本会话的标签页中预先填好时直接使用
+        prefilled = take_prefilled_form(config, session_key) if keep_browser else None
+        if prefilled:
+            driver, form_counts = prefilled
+        else:
+            if keep_browser:
+                # 复用常驻浏览器会话，只重置表单
+                driver = acquire_browser_session(args, config, session_key)
+            else:
+                driver = create_chrome_driver(args, config)
+                
+                # 记录浏览器启动完成时间戳
+                record_timestamp("浏览器启动完成")
+                
+                open_target_page(driver, target_url, page_load_timeout, textarea_selector)
+                
+                # 记录页面加载完成时间戳
+                record_timestamp("页面加载完成")
+            
+            form_counts = fill_job_form(driver, config, file_contents, browser_sessions.get(session_key) if keep_browser else None)
+            if form_counts is None:
+                if keep_browser:
+                    close_browser_session(session_key)
+                else:
+                    driver.quit()
+                return False
+        text_success_count, audio_success_count = form_counts
+        
+        # 记录任务开始时间，用于识别本次任务生成的输出文件夹
+        job_start_time = time.time()
+        
+        # 记录点击前页面中已有的音频URL，用于识别本次任务的输出
+        capture_mode = config.get("monitoring", {}).get("capture_mode", "temp_dir")
+        existing_sources = set()
+        if capture_mode == "page_output":
+            output_selector = config.get("selectors", {}).get("output_audio", "audio, a[download]")
+            existing_sources = set(collect_page_audio_sources(driver, output_selector))
+        
+        # 点击指定按钮
+        print("\n正在查找指定按钮...")
+        
+        try:
+            # 等待按钮出现
+            wait = WebDriverWait(driver, element_wait_timeout)
+            button = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, button_selector)))
+            
+            # 滚动到按钮位置
+            driver.execute_script("arguments[0].scrollIntoView(true);", button)
+            
+            # 显示按钮信息
+            print(f"按钮位置: {button.location}")
+            print(f"按钮大小: {button.size}")
+            print(f"按钮文本: {button.text}")
+            
+            # 跳过第一个按钮点击
+            print("✓ 根据配置，跳过第一个按钮点击")
+            
+            # 直接查找第二个相同样式的按钮
+            print("正在查找第二个相同样式的按钮...")
+            
+            # 读取按钮点击配置
+            buttons_config = config.get("buttons", {})
+            click_first_button = buttons_config.get("click_first_button", False)
+            click_second_button = buttons_config.get("click_second_button", True)
+            
+            # 查找所有相同样式的按钮
+            all_buttons = driver.find_elements(By.CSS_SELECTOR, button_selector)
+            
+            # 处理第一个按钮
+            if click_first_button and len(all_buttons) >= 1:
+                first_button = all_buttons[0]  # 第一个按钮
+                
+                # 滚动到第一个按钮位置
+                driver.execute_script("arguments[0].scrollIntoView(true);", first_button)
+                wait_for_condition(driver, "按钮可点击", EC.element_to_be_clickable(first_button), element_wait_timeout)
+                
+                # 显示第一个按钮信息
+                print(f"第一个按钮位置: {first_button.location}")
+                print(f"第一个按钮大小: {first_button.size}")
+                print(f"第一个按钮文本: {first_button.text}")
+                
+                # 点击第一个按钮
+                print("正在点击第一个按钮...")
+                first_button.click()
+                print("✓ 第一个按钮点击成功！")
+                
+                # 等待第二个按钮可以点击（最多等待按钮间隔时间）
+                if len(all_buttons) >= 2:
+                    wait_for_condition(driver, "按钮间隔", EC.element_to_be_clickable(all_buttons[1]), button_interval_timeout)
+            elif not click_first_button:
+                print("⚠️ 根据配置，跳过第一个按钮点击")
+            else:
+                print(f"⚠️ 未找到第一个按钮，无法点击")
+            
+            # 处理第二个按钮
+            if click_second_button:
+                if len(all_buttons) >= 2:
+                    second_button = all_buttons[1]  # 第二个按钮
+                    
+                    # 滚动到第二个按钮位置
+                    driver.execute_script("arguments[0].scrollIntoView(true);", second_button)
+                    wait_for_condition(driver, "按钮可点击", EC.element_to_be_clickable(second_button), element_wait_timeout)
+                    
+                    # 显示第二个按钮信息
+                    print(f"第二个按钮位置: {second_button.location}")
+                    print(f"第二个按钮大小: {second_button.size}")
+                    print(f"第二个按钮文本: {second_button.text}")
+                    
+                    # 点击第二个按钮
+                    print("正在点击第二个按钮...")
+                    second_button.click()
+                    print("✓ 第二个按钮点击成功！")
+                else:
+                    print(f"⚠️ 只找到 {len(all_buttons)} 个按钮，无法点击第二个按钮")
+            else:
+                print("⚠️ 根据配置，跳过第二个按钮点击")
+            
+        except Exception as e:
+            print(f"✗ 点击按钮失败: {e}")
+            print("尝试查找所有可能的按钮...")
+            
+            # 尝试查找所有可能的按钮
+            possible_button_selectors = [
+                button_selector,
+                "button.lg.secondary",
+                "button.svelte-cmf5ev",
+                "button[class*='lg']",
+                "button[class*='secondary']",
+                "button[class*='svelte-cmf5ev']",
+                ".lg.secondary.svelte-cmf5ev",
+                "[class*='lg'][class*='secondary']",
+                "[class*='svelte-cmf5ev']"
+            ]
+            
+            # 读取按钮点击配置
+            buttons_config = config.get("buttons", {})
+            click_first_button = buttons_config.get("click_first_button", False)
+            click_second_button = buttons_config.get("click_second_button", True)
+            
+            button_clicked = False
+            for selector in possible_button_selectors:
+                try:
+                    elements = driver.find_elements(By.CSS_SELECTOR, selector)
+                    if len(elements) >= 2:
+                        print(f"找到 {len(elements)} 个可能的按钮: {selector}")
+                        
+                        # 处理第一个按钮
+                        if click_first_button:
+                            first_button = elements[0]
+                            print(f"第一个按钮文本: {first_button.text}")
+                            driver.execute_script("arguments[0].scrollIntoView(true);", first_button)
+                            wait_for_condition(driver, "按钮可点击", EC.element_to_be_clickable(first_button), element_wait_timeout)
+                            first_button.click()
+                            print(f"✓ 使用选择器 {selector} 点击第一个按钮成功！")
+                            
+                            # 等待第二个按钮可以点击（最多等待按钮间隔时间）
+                            wait_for_condition(driver, "按钮间隔", EC.element_to_be_clickable(elements[1]), button_interval_timeout)
+                        else:
+                            print("⚠️ 根据配置，跳过第一个按钮点击")
+                        
+                        # 处理第二个按钮
+                        if click_second_button:
+                            second_button = elements[1]
+                            print(f"第二个按钮文本: {second_button.text}")
+                            driver.execute_script("arguments[0].scrollIntoView(true);", second_button)
+                            wait_for_condition(driver, "按钮可点击", EC.element_to_be_clickable(second_button), element_wait_timeout)
+                            second_button.click()
+                            print(f"✓ 使用选择器 {selector} 点击第二个按钮成功！")
+                        else:
+                            print("⚠️ 根据配置，跳过第二个按钮点击")
+                        
+                        button_clicked = True
+                        break
+                    elif len(elements) == 1:
+                        print(f"只找到 1 个按钮: {selector}")
+                        button = elements[0]
+                        print(f"按钮文本: {button.text}")
+                        
+                        # 滚动到按钮位置
+                        driver.execute_script("arguments[0].scrollIntoView(true);", button)
+                        wait_for_condition(driver, "按钮可点击", EC.element_to_be_clickable(button), element_wait_timeout)
+                        
+                        # 根据配置决定是否点击
+                        if click_first_button:
+                            # 点击按钮
+                            button.click()
+                            print(f"✓ 使用选择器 {selector} 点击按钮成功！")
+                        else:
+                            print("⚠️ 根据配置，跳过按钮点击")
+                        
+                        print("⚠️ 只找到一个按钮，无法点击第二个按钮")
+                        button_clicked = True
+                        break
+                except Exception as e:
+                    print(f"使用选择器 {selector} 点击失败: {e}")
+                    continue
+            
+            if not button_clicked:
+                print("✗ 所有按钮选择器都失败了，无法点击按钮")
+        
+        # 记录按钮点击完成时间戳
+        record_timestamp("按钮点击完成")
+        
+        # 监控临时目录并拷贝文件
+        temp_directory = config.get("temp_directory", "")
+        monitoring_config = config.get("monitoring", {})
+        monitoring_enabled = monitoring_config.get("enabled", True)
+        
+        if monitoring_enabled and (temp_directory or capture_mode == "page_output"):
+            print(f"\n{'='*50}")
+            print("步骤3: 监控临时目录并拷贝文件")
+            print(f"{'='*50}")
+            
+            # 记录文件监控开始时间戳
+            record_timestamp("文件监控开始")
+            
+            check_interval = monitoring_config.get("no_update_timeout", 60)
+            max_wait_time = monitoring_config.get("max_wait_time", 600)
+            
+            copy_success = False
+            if capture_mode == "page_output":
+                # 直接从页面输出组件获取本次任务的音频
+                copy_success = capture_page_output_and_save(driver, config, existing_sources, max_wait_time)
+                if not copy_success and temp_directory:
+                    print("⚠️ 页面输出获取失败，改为监控临时目录")
+                    # 只使用剩余的等待时间，但至少保留10秒用于确认已经写好的文件
+                    max_wait_time = max(10, max_wait_time - (time.time() - job_start_time))
+            
+            if not copy_success and temp_directory:
+                copy_success = monitor_temp_directory_and_copy(
+                    temp_directory, 
+                    config,
+                    check_interval, 
+                    max_wait_time,
+                    job_start_time
+                )
+            
+            if copy_success:
+                print("✓ 文件监控和拷贝操作完成")
+                # 记录文件拷贝完成时间戳
+                record_timestamp("文件拷贝完成")
+                
+                # 常驻会话模式下不关闭浏览器，留给下一轮复用
+                if keep_browser:
+                    return text_success_count == len(text_files_config) and audio_success_count == len(audio_files_config)
+                
+                # 等待指定秒数后再关闭浏览器
+                output_config = config.get("output", {})
+                wait_before_close = output_config.get("wait_before_close", 0)
+                auto_close = output_config.get("auto_close", False)  # 新增自动关闭选项
+                
+                if wait_before_close > 0:
+                    print(f"拷贝文件后等待 {wait_before_close} 秒...")
+                    time.sleep(wait_before_close)
+                
+                # 如果设置了自动关闭，则关闭浏览器
+                if auto_close:
+                    print("正在关闭浏览器...")
+                    driver.quit()
+                    print("浏览器已关闭！")
+                    return text_success_count == len(text_files_config) and audio_success_count == len(audio_files_config)
+            else:
+                print("✗ 文件监控和拷贝操作失败")
+                if keep_browser:
+                    return False
+            
+            print(f"{'='*50}")
+        
+        if keep_browser:
+            # 常驻会话模式下不阻塞等待人工关闭，直接进入下一轮
+            return text_success_count == len(text_files_config) and audio_success_count == len(audio_files_config)
+        
+        # 等待一段时间观察结果
+        print(f"等待{observe_timeout}秒观察操作结果...")
+        time.sleep(observe_timeout)
+        
+        # 保持浏览器打开
+        print("浏览器将保持打开状态...")
+        print("您可以手动关闭浏览器窗口，或按Ctrl+C终止程序")
+        
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print("\n检测到Ctrl+C，正在关闭浏览器...")
+        
+        # 关闭浏览器
+        driver.quit()
+        print("浏览器已关闭！")
+        return text_success_count == len(text_files_config) and audio_success_count == len(audio_files_config)
+        
+    except Exception as e:
+        print(f"发生错误: {str(e)}")
+        print(f"请确保本地服务正在运行在 {target_url}")
+        return False
+
+def get_gradio_api_root(app_config, base_url):
+    """
+    获取Gradio接口根地址（Gradio 5 的接口位于 /gradio_api 前缀下）
+    
+    Args:
+        app_config: Gradio页面配置（/config接口返回值）
+        base_url: 页面地址
+    
+    Returns:
+        str: 接口根地址（不以/结尾）
+    """
+    root = (app_config.get("root") or base_url).rstrip("/")
+    return root + app_config.get("api_prefix", "").rstrip("/")
+
+def fetch_gradio_app_config(base_url, timeout=10):
+    """
+    获取Gradio页面配置（组件、事件依赖、协议版本），按页面地址缓存
+    
+    Args:
+        base_url: 页面地址
+        timeout: 请求超时时间（秒）
+    
+    Returns:
+        dict: 页面配置
+    """
+    if base_url in gradio_app_configs:
+        return gradio_app_configs[base_url]
+    
+    response = http_client.get(base_url.rstrip("/") + "/config", endpoint="gradio", timeout=timeout)
+    response.raise_for_status()
+    app_config = response.json()
+    
+    print(f"✓ Gradio版本: {app_config.get('version', '未知')}，协议: {app_config.get('protocol', '未知')}")
+    gradio_app_configs[base_url] = app_config
+    return app_config
+
+def resolve_gradio_fn_index(app_config, http_config):
+    """
+    根据配置的fn_index或api_name确定要调用的事件函数
+    
+    Args:
+        app_config: Gradio页面配置
+        http_config: http_api配置字典
+    
+    Returns:
+        tuple: (fn_index, trigger_id)，trigger_id可能为None
+    """
+    dependencies = app_config.get("dependencies", [])
+    fn_index = http_config.get("fn_index")
+    api_name = http_config.get("api_name", "/generate_audio").lstrip("/")
+    
+    for i, dependency in enumerate(dependencies):
+        dependency_index = dependency.get("id", i)
+        if (fn_index is not None and dependency_index == fn_index) or \
+                (fn_index is None and dependency.get("api_name") == api_name):
+            targets = dependency.get("targets") or []
+            trigger_id = targets[0][0] if targets and isinstance(targets[0], list) else None
+            return dependency_index, trigger_id
+    
+    if fn_index is not None:
+        return fn_index, None
+    raise Exception(f"Gradio页面中未找到接口: /{api_name}")
+
+def upload_file_to_gradio(api_root, file_path, timeout=60):
+    """
+    将参考音频上传到Gradio服务器
+    
+    Args:
+        api_root: Gradio接口根地址
+        file_path: 本地文件路径
+        timeout: 上传超时时间（秒）
+    
+    Returns:
+        dict: 作为接口输入的FileData
+    """
+    with open(file_path, 'rb') as f:
+        response = http_client.post(
+            f"{api_root}/upload",
+            endpoint="gradio",
+            files=[("files", (os.path.basename(file_path), f))],
+            timeout=timeout
+        )
+    response.raise_for_status()
+    server_path = response.json()[0]
+    
+    return {
+        "path": server_path,
+        "orig_name": os.path.basename(file_path),
+        "meta": {"_type": "gradio.FileData"}
+    }
+
+def build_gradio_inputs(template, file_contents, uploaded_files):
+    """
+    将http_api.inputs模板中的占位符替换为本次任务的数据
+    
+    "{text_N}" 替换为第N个textarea的文本内容，"{audio_N}" 替换为第N个音频文件上传后的FileData
+    
+    Args:
+        template: 输入模板列表
+        file_contents: textarea索引 -> 文本内容
+        uploaded_files: 音频文件索引 -> FileData
+    
+    Returns:
+        list: 接口输入数据
+    """
+    inputs = []
+    for value in template:
+        if isinstance(value, str) and value.startswith("{text_") and value.endswith("}"):
+            value = file_contents.get(int(value[6:-1]), "")
+        elif isinstance(value, str) and value.startswith("{audio_") and value.endswith("}"):
+            value = uploaded_files.get(int(value[7:-1]))
+        inputs.append(value)
+    return inputs
+
+def submit_gradio_job(api_root, fn_index, trigger_id, inputs, timeout=600):
+    """
+    通过Gradio队列接口（SSE协议）提交任务并等待结果
+    
+    Args:
+        api_root: Gradio接口根地址
+        fn_index: 事件函数索引
+        trigger_id: 触发组件ID（可为None）
+        inputs: 接口输入数据
+        timeout: 最大等待时间（秒）
+    
+    Returns:
+        list: 接口输出数据
+    """
+    session_hash = uuid.uuid4().hex[:11]
+    payload = {
+        "data": inputs,
+        "fn_index": fn_index,
+        "session_hash": session_hash,
+        "event_data": None,
+        "trigger_id": trigger_id
+    }
+    
+    response = http_client.post(f"{api_root}/queue/join", endpoint="gradio", json=payload)
+    response.raise_for_status()
+    event_id = response.json().get("event_id")
+    print(f"✓ 任务已加入Gradio队列 (event_id: {event_id})")
+    
+    with http_client.get(
+        f"{api_root}/queue/data",
+        endpoint="gradio",
+        params={"session_hash": session_hash},
+        stream=True,
+        timeout=(10, timeout)
+    ) as stream:
+        stream.raise_for_status()
+        for line in stream.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            
+            message = json.loads(line[5:])
+            if message.get("event_id") not in (None, event_id):
+                continue
+            
+            msg_type = message.get("msg")
+            if msg_type == "estimation":
+                print(f"  队列位置: {message.get('rank', 0)}，预计等待: {message.get('rank_eta') or 0:.1f}秒")
+            elif msg_type == "process_starts":
+                print("  Gradio开始处理任务...")
+            elif msg_type == "process_completed":
+                if not message.get("success", False):
+                    output = message.get("output", {})
+                    raise Exception(f"Gradio任务执行失败: {output.get('error', output)}")
+                return message.get("output", {}).get("data", [])
+    
+    raise Exception("Gradio队列连接已关闭，未收到任务结果")
+
+def run_http_backend(config):
+    """
+    不经过浏览器，直接通过Gradio HTTP/队列接口完成一次语音合成
+    
+    Args:
+        config: 配置字典
+    
+    Returns:
+        bool: 是否成功
+    """
+    target_url = config.get("url", "http://127.0.0.1:50004/")
+    http_config = config.get("http_api", {})
+    timeout = http_config.get("timeout", config.get("monitoring", {}).get("max_wait_time", 600))
+    upload_timeout = config.get("upload", {}).get("timeout", 60)
+    audio_files_config = config.get("audio_files", [])
+    
+    try:
+        file_contents = load_job_inputs(config.get("text_files", []), audio_files_config)
+        if file_contents is None:
+            return False
+        
+        print(f"\n使用HTTP接口后端: {target_url}")
+        app_config = fetch_gradio_app_config(target_url)
+        api_root = get_gradio_api_root(app_config, target_url)
+        fn_index, trigger_id = resolve_gradio_fn_index(app_config, http_config)
+        record_timestamp("页面加载完成")
+        
+        # 上传参考音频
+        uploaded_files = {}
+        for i, audio_config in enumerate(audio_files_config):
+            uploaded_files[i] = upload_file_to_gradio(api_root, audio_config["file_path"], upload_timeout)
+            print(f"✓ 参考音频已上传: {audio_config['description']}")
+        record_timestamp("音频上传完成")
+        
+        inputs = build_gradio_inputs(http_config.get("inputs", []), file_contents, uploaded_files)
+        record_timestamp("按钮点击完成")
+        
+        output_data = submit_gradio_job(api_root, fn_index, trigger_id, inputs, timeout)
+        output_file = output_data[http_config.get("output_index", 0)] if output_data else None
+        if not output_file:
+            print("❌ Gradio任务没有返回音频")
+            return False
+        
+        # Gradio 4+ 返回FileData（包含url），旧版本返回临时文件路径
+        if isinstance(output_file, dict):
+            output_url = output_file.get("url") or f"{api_root}/file={output_file.get('path')}"
+        else:
+            output_url = f"{api_root}/file={output_file}"
+        
+        dest_path = resolve_output_path(config)
+        if not download_output_audio(None, output_url, dest_path, upload_timeout):
+            return False
+        record_timestamp("文件拷贝完成")
+        
+        upload_output_file(dest_path, config)
+        return True
+    
+    except Exception as e:
+        print(f"❌ HTTP接口后端执行失败: {e}")
+        print(f"请确保本地服务正在运行在 {target_url}")
+        return False
+
+def run_single_automation(args, base_config, api_params=None, round_number=1, endpoint=None, session_key="default", config=None):
+    """
+    执行单次自动化操作
+    
+    Args:
+        args: 命令行参数
+        base_config: 基础配置
+        api_params: API参数（可选）
+        round_number: 轮次编号
+        endpoint: 指定本轮使用的CosyVoice地址（工作池模式），默认使用配置文件中的url
+        session_key: 常驻浏览器会话名称
+        config: 已准备好的本轮配置（流水线模式），为None时重新加载
+    
+    Returns:
+        bool: 是否成功
+    """
+    print(f"\n{'='*80}")
+    print(f"开始第 {round_number} 轮自动化操作")
+    print(f"{'='*80}")
+    
+    item_id = api_params.get('id') if api_params else None
+    start_job_trace(f"第 {round_number} 轮" + (f" ID={item_id}" if item_id is not None else ""))
+    success = False
+    try:
+        success = run_traced_automation(args, base_config, api_params, round_number, endpoint, session_key, config)
+        return success
+    finally:
+        finish_job_trace(success)
+        metrics.inc("voiceapi_jobs_total", labels={"result": "success" if success else "failure"})
+
+def run_traced_automation(args, base_config, api_params, round_number, endpoint, session_key, config):
+    """
+    run_single_automation 的实际执行部分（在任务追踪中运行），参数含义相同
+    
+    Returns:
+        bool: 是否成功
+    """
+    # 重新加载配置（使用新的API参数）
+    if config is None:
+        config = load_config(
+            filename=args.filename, 
+            output_filename=args.output, 
+            content=args.content, 
+            api_params=api_params
+        )
+    
+    if not config:
+        print(f"❌ 第 {round_number} 轮配置加载失败")
+        return False
+    record_timestamp("配置加载完成")
+    
+    if endpoint:
+        config["url"] = endpoint
+        print(f"本轮使用端点: {endpoint}")
+    
+    # 显示本轮配置信息
+    text_files = config.get("text_files", [])
+    audio_files = config.get("audio_files", [])
+    temp_directory = config.get("temp_directory", "")
+    
+    print(f"\n第 {round_number} 轮配置信息:")
+    print(f"文本文件数量: {len(text_files)}")
+    for i, text_file in enumerate(text_files, 1):
+        if "file_path" in text_file:
+            print(f"  文本文件{i}: {text_file['file_path']} -> 第{text_file['textarea_index']+1}个textarea")
+        elif "content" in text_file:
+            content_preview = text_file['content'][:50] + "..." if len(text_file['content']) > 50 else text_file['content']
+            print(f"  文本内容{i}: {repr(content_preview)} -> 第{text_file['textarea_index']+1}个textarea")
+    
+    # 清空临时目录（从页面输出组件获取结果时无需扫描临时目录，也就不需要清空）
+    # 工作池模式下多个任务共用临时目录，清空会删除其他任务的输出；
+    # 流水线预填表单时其他标签页已上传的参考音频也在临时目录中，同样不能清空
+    # 启用后台清理时不再清空，由清理线程删除已取走结果或过期的文件夹
+    capture_mode = config.get("monitoring", {}).get("capture_mode", "temp_dir")
+    if is_temp_gc_enabled(config):
+        start_temp_gc(config)
+    elif temp_directory and capture_mode != "page_output" and config.get("backend", "browser") != "http" \
+            and not endpoint and not pipeline_prefill["tabs"]:
+        print(f"\n清空临时目录...")
+        if not clear_temp_directory(temp_directory):
+            print("⚠️ 临时目录清空失败，但继续执行后续操作")
+        record_timestamp("临时目录清空完成")
+    
+    temp_job = begin_temp_job()
+    try:
+        if config.get("backend", "browser") == "http":
+            # 直接调用Gradio接口，不启动浏览器
+            success = run_http_backend(config)
+        else:
+            # 执行自动化操作（开启 persistent_session 时复用常驻浏览器会话）
+            keep_browser = config.get("browser", {}).get("persistent_session", False)
+            success = input_multiple_files_to_textareas(args, config, keep_browser=keep_browser, session_key=session_key)
+        
+        if success:
+            print(f"✅ 第 {round_number} 轮自动化操作完成！")
+        else:
+            print(f"❌ 第 {round_number} 轮自动化操作失败！")
+        
+        return success
+        
+    except Exception as e:
+        print(f"❌ 第 {round_number} 轮自动化操作异常: {e}")
+        return False
+    
+    finally:
+        end_temp_job(temp_job)
+
+def fetch_items_from_api(timeout=None):
+    """
+    获取API接口中的全部待处理数据（不等待）
+    
+    Args:
+        timeout: 请求超时时间（秒），默认使用 http.timeouts.api
+    
+    Returns:
+        list: 数据列表，请求失败返回None
+    """
+    try:
+        response = http_client.get(f"{API_BASE_URL}/voice/list/", timeout=timeout)
+        if response.status_code != 200:
+            print(f"❌ API请求失败，状态码: {response.status_code}")
+            return None
+        
+        data = response.json()
+        if data.get('status') != 'success':
+            print(f"❌ API接口返回失败: {data.get('message', '未知错误')}")
+            return None
+        
+        items = data.get('items', [])
+        metrics.set_gauge("voiceapi_queue_depth", len(items))
+        return items
+    except Exception as e:
+        print(f"⚠️ 获取API数据异常: {e}")
+        return None
+
+def create_api_item_buffer(api_config):
+    """
+    创建本地数据缓冲区：一次列表请求领取多条数据，逐条处理时不再重复请求列表
+    
+    Args:
+        api_config: API配置（config["api"]），读取 batch_size、prefetch、prefetch_threshold
+    
+    Returns:
+        dict: 缓冲区状态
+    """
+    api_config = api_config or {}
+    return {
+        "lock": threading.Lock(),
+        "items": collections.deque(),
+        "known_ids": set(),
+        "recently_done": collections.deque(maxlen=1000),
+        "batch_size": max(1, int(api_config.get("batch_size", 5))),
+        "prefetch": api_config.get("prefetch", True),
+        "prefetch_threshold": max(0, int(api_config.get("prefetch_threshold", 1))),
+        "prefetch_thread": None,
+        "lease": api_config.get("lease") or {},
+        "list_calls": 0
+    }
+
+def add_items_to_buffer(item_buffer, items):
+    """
+    将列表中尚未领取的数据加入缓冲区，最多保留 batch_size 条；
+    以租约方式领取但没有加入缓冲区的数据会立即释放
+    
+    Args:
+        item_buffer: 缓冲区状态
+        items: 从API获取的数据列表
+    
+    Returns:
+        int: 新加入的数据条数
+    """
+    added = 0
+    unused = []
+    with item_buffer["lock"]:
+        for item in items or []:
+            item_id = item.get('id')
+            if item_id is not None and item_id in item_buffer["known_ids"]:
+                # 已在缓冲区或处理中：租约仍由该任务持有，处理完成时确认或释放
+                continue
+            if len(item_buffer["items"]) >= item_buffer["batch_size"] or item_id in item_buffer["recently_done"]:
+                unused.append(item)
+                continue
+            if item_id is not None:
+                item_buffer["known_ids"].add(item_id)
+            item_buffer["items"].append(item)
+            added += 1
+    release_unused_api_leases(unused, item_buffer["lease"])
+    return added
+
+def refill_api_item_buffer(item_buffer):
+    """
+    请求一次数据并补充缓冲区（不等待），服务端支持时以租约方式领取
+    
+    Args:
+        item_buffer: 缓冲区状态
+    
+    Returns:
+        int: 新加入的数据条数
+    """
+    items = None
+    if is_api_lease_enabled(item_buffer["lease"]):
+        with item_buffer["lock"]:
+            count = item_buffer["batch_size"] - len(item_buffer["items"])
+        if count <= 0:
+            return 0
+        items = claim_api_items(item_buffer["lease"], count)
+        if items is None and api_intake_state["lease_supported"] is not False:
+            return 0
+    if items is None:
+        items = fetch_items_from_api()
+    with item_buffer["lock"]:
+        item_buffer["list_calls"] += 1
+    if items:
+        api_intake_state["backoff"] = None
+    return add_items_to_buffer(item_buffer, items)
+
+def start_api_prefetch(item_buffer):
+    """
+    缓冲区剩余数据不多时，在后台线程中预取下一批数据（与当前合成任务并行）
+    
+    Args:
+        item_buffer: 缓冲区状态
+    
+    Returns:
+        bool: 是否启动了预取
+    """
+    if not item_buffer["prefetch"]:
+        return False
+    
+    with item_buffer["lock"]:
+        thread = item_buffer["prefetch_thread"]
+        if thread and thread.is_alive():
+            return False
+        if len(item_buffer["items"]) > item_buffer["prefetch_threshold"]:
+            return False
+        thread = threading.Thread(target=refill_api_item_buffer, args=(item_buffer,), name="api-prefetch", daemon=True)
+        item_buffer["prefetch_thread"] = thread
+    
+    thread.start()
+    return True
+
+def wait_for_api_prefetch(item_buffer, timeout=15):
+    """
+    等待正在进行的后台预取完成
+    
+    Args:
+        item_buffer: 缓冲区状态
+        timeout: 最大等待时间（秒）
+    """
+    thread = item_buffer["prefetch_thread"]
+    if thread and thread.is_alive():
+        thread.join(timeout)
+
+def take_api_item(item_buffer):
+    """
+    从缓冲区取出下一条数据
+    
+    Args:
+        item_buffer: 缓冲区状态
+    
+    Returns:
+        dict: 数据，缓冲区为空时返回None
+    """
+    with item_buffer["lock"]:
+        if item_buffer["items"]:
+            return item_buffer["items"].popleft()
+    return None
+
+def finish_api_item(item_buffer, item_id, requeued=False):
+    """
+    标记数据已处理完成，避免删除前发出的预取请求把它再次加入缓冲区
+    
+    Args:
+        item_buffer: 缓冲区状态
+        item_id: 数据ID
+        requeued: 数据是否已释放回队列等待重试（此时允许再次领取）
+    """
+    if item_id is None:
+        return
+    with item_buffer["lock"]:
+        item_buffer["known_ids"].discard(item_id)
+        if not requeued:
+            item_buffer["recently_done"].append(item_id)
+
+def get_worker_endpoints(config):
+    """
+    根据配置生成工作池的端点列表
+    
+    workers.endpoints 可以是地址字符串，也可以是 {"url": ..., "concurrency": N}；
+    未配置时使用 url + backup_urls（去重）
+    
+    Args:
+        config: 配置字典
+    
+    Returns:
+        list: (端点地址, 并发数) 元组列表
+    """
+    workers_config = config.get("workers", {})
+    default_concurrency = workers_config.get("per_endpoint_concurrency", 1)
+    endpoints = workers_config.get("endpoints") or [config.get("url", "http://127.0.0.1:50004/")] + config.get("backup_urls", [])
+    
+    result = []
+    seen = set()
+    for endpoint in endpoints:
+        if isinstance(endpoint, dict):
+            url = endpoint.get("url", "")
+            concurrency = endpoint.get("concurrency", default_concurrency)
+        else:
+            url = endpoint
+            concurrency = default_concurrency
+        
+        # localhost和127.0.0.1视为同一端点
+        key = url.replace("localhost", "127.0.0.1").rstrip("/")
+        if not url or key in seen or concurrency <= 0:
+            continue
+        seen.add(key)
+        result.append((url, concurrency))
+    return result
+
+def pool_worker(worker_id, endpoint, args, base_config, job_queue, pool_state):
+    """
+    工作池中的单个工作线程：绑定一个端点，从任务队列中取数据并执行
+    
+    Args:
+        worker_id: 工作线程名称（同时作为常驻浏览器会话名称）
+        endpoint: 绑定的CosyVoice地址
+        args: 命令行参数
+        base_config: 基础配置
+        job_queue: 任务队列，收到None时退出
+        pool_state: 工作池共享状态
+    """
+    while True:
+        api_params = job_queue.get()
+        if api_params is None:
+            break
+        
+        item_id = api_params.get('id')
+        with pool_state["lock"]:
+            round_number = pool_state["next_round"]
+            pool_state["next_round"] += 1
+        
+        print(f"\n[{worker_id}] 开始处理数据 ID={item_id} (第 {round_number} 轮)")
+        try:
+            error = validate_api_item(api_params)
+            if error:
+                print(f"❌ [{worker_id}] 数据无效，跳过: {error}")
+                metrics.inc("voiceapi_jobs_total", labels={"result": "invalid"})
+                success = False
+            else:
+                success = run_single_automation(args, base_config, api_params, round_number, endpoint=endpoint, session_key=worker_id)
+        except Exception as e:
+            print(f"❌ [{worker_id}] 处理异常: {e}")
+            success = False
+        
+        # 确认或释放租约；未使用租约时删除已处理的数据
+        removed = True
+        if item_id:
+            removed = complete_api_item(item_id, success, base_config.get("api", {}).get("lease"))
+        
+        with pool_state["lock"]:
+            pool_state["in_flight"].discard(item_id)
+            if removed:
+                pool_state["recently_done"].append(item_id)
+            pool_state["succeeded" if success else "failed"] += 1
+        
+        print(f"{'✅' if success else '⚠️'} [{worker_id}] 数据 ID={item_id} 处理{'成功' if success else '失败'}")
+    
+    close_browser_session(worker_id)
+
+def run_worker_pool(args, base_config):
+    """
+    多端点并发工作池：每个工作线程绑定一个端点（及自己的浏览器），
+    主线程从API获取数据并分发，同一数据不会被分发两次
+    
+    Args:
+        args: 命令行参数
+        base_config: 基础配置
+    """
+    endpoints = get_worker_endpoints(base_config)
+    if not endpoints:
+        print("❌ 工作池没有可用的端点")
+        return
+    
+    workers = []
+    for url, concurrency in endpoints:
+        for slot in range(concurrency):
+            workers.append((f"worker-{len(workers) + 1}", url))
+    
+    print(f"\n🚀 启用多端点工作池: {len(endpoints)} 个端点，{len(workers)} 个工作线程")
+    for url, concurrency in endpoints:
+        print(f"   {url} (并发数: {concurrency})")
+    
+    if base_config.get("backend", "browser") != "http" and \
+            base_config.get("monitoring", {}).get("capture_mode", "temp_dir") != "page_output":
+        print("⚠️ 多个任务同时监控临时目录时可能取到其他任务的输出，建议使用 page_output 或 http 后端")
+    
+    # 队列长度等于工作线程数，避免一次性取走过多数据
+    job_queue = queue.Queue(maxsize=len(workers))
+    pool_state = {
+        "lock": threading.Lock(),
+        "in_flight": set(),
+        "recently_done": collections.deque(maxlen=1000),
+        "next_round": 1,
+        "succeeded": 0,
+        "failed": 0
+    }
+    
+    intake_config = base_config.get("api", {}).get("intake") or {}
+    lease_config = base_config.get("api", {}).get("lease") or {}
+    
+    threads = []
+    for worker_id, url in workers:
+        thread = threading.Thread(
+            target=pool_worker,
+            args=(worker_id, url, args, base_config, job_queue, pool_state),
+            name=worker_id,
+            daemon=True
+        )
+        thread.start()
+        threads.append(thread)
+    
+    try:
+        while True:
+            items = None
+            if is_api_lease_enabled(lease_config):
+                # 只领取队列能立即容纳的数量，避免租约在队列中空等
+                free_slots = job_queue.maxsize - job_queue.qsize()
+                if free_slots <= 0:
+                    time.sleep(args.api_interval)
+                    continue
+                items = claim_api_items(lease_config, free_slots)
+            if items is None and not is_api_lease_enabled(lease_config):
+                items = fetch_items_from_api()
+            dispatched = 0
+            
+            for index, item in enumerate(items or []):
+                item_id = item.get('id')
+                with pool_state["lock"]:
+                    # 处理中的数据租约仍由工作线程持有；已完成却被重新领取的数据立即释放
+                    if item_id in pool_state["in_flight"]:
+                        continue
+                    done = item_id in pool_state["recently_done"]
+                if done:
+                    release_unused_api_leases([item], lease_config)
+                    continue
+                
+                try:
+                    job_queue.put(item, timeout=args.api_interval)
+                except queue.Full:
+                    # 所有工作线程都在忙，释放尚未分发数据的租约后重新获取再分发
+                    release_unused_api_leases(items[index:], lease_config)
+                    break
+                
+                with pool_state["lock"]:
+                    pool_state["in_flight"].add(item_id)
+                dispatched += 1
+                print(f"📤 已分发数据 ID={item_id}，处理中: {len(pool_state['in_flight'])}")
+            
+            if items:
+                # 获取到数据后恢复为基础检查间隔
+                api_intake_state["backoff"] = None
+            
+            if not dispatched:
+                # 队列为空时按退避间隔等待，数据都在处理中时按基础间隔等待
+                if items:
+                    time.sleep(args.api_interval)
+                else:
+                    time.sleep(next_api_backoff(intake_config, args.api_interval))
+    
+    except KeyboardInterrupt:
+        print(f"\n\n🛑 检测到 Ctrl+C，等待工作线程完成当前任务...")
+    
+    finally:
+        # 丢弃尚未开始的数据，并通知所有工作线程退出
+        while True:
+            try:
+                job_queue.get_nowait()
+            except queue.Empty:
+                break
+        for _ in threads:
+            job_queue.put(None)
+        for thread in threads:
+            thread.join()
+        release_all_api_leases(lease_config)
+        drain_upload_queue()
+        
+        print(f"📊 工作池统计: 成功 {pool_state['succeeded']} 条，失败 {pool_state['failed']} 条")
+        record_timestamp("程序结束")
+        print_timing_summary()
+
+def next_api_item(args, base_config, item_buffer):
+    """
+    获取下一条待处理数据：优先使用本地缓冲区，缓冲区为空时等待API数据
+    
+    Args:
+        args: 命令行参数
+        base_config: 基础配置
+        item_buffer: 缓冲区状态
+    
+    Returns:
+        dict: 数据，等待超时返回None
+    """
+    api_params = take_api_item(item_buffer)
+    if api_params:
+        print(f"📦 使用缓冲区数据 ID={api_params.get('id')}，缓冲区剩余 {len(item_buffer['items'])} 条")
+        return api_params
+    
+    items = fetch_params_from_api(
+        max_wait_time=args.api_wait, 
+        check_interval=args.api_interval,
+        intake_config=base_config.get("api", {}).get("intake"),
+        return_all=True
+    )
+    with item_buffer["lock"]:
+        item_buffer["list_calls"] += 1
+    if items:
+        # 支持租约时按列表结果领取数据，否则直接使用列表数据
+        if is_api_lease_enabled(item_buffer["lease"]):
+            added = refill_api_item_buffer(item_buffer)
+        else:
+            added = add_items_to_buffer(item_buffer, items)
+        if added > 1:
+            print(f"📦 本次领取 {added} 条数据到本地缓冲区")
+    return take_api_item(item_buffer)
+
+def record_stage_time(stage_name, duration):
+    """
+    累计流水线某个阶段的耗时
+    
+    Args:
+        stage_name: 阶段名称
+        duration: 本次耗时（秒）
+    """
+    with pipeline_stats["lock"]:
+        stage = pipeline_stats["stages"].setdefault(stage_name, {"count": 0, "total": 0.0, "max": 0.0})
+        stage["count"] += 1
+        stage["total"] += duration
+        stage["max"] = max(stage["max"], duration)
+
+def print_pipeline_summary():
+    """打印流水线各阶段耗时，以及各阶段耗时之和与实际运行时间的比值（重叠程度）"""
+    with pipeline_stats["lock"]:
+        stages = dict(pipeline_stats["stages"])
+        started_at = pipeline_stats["started_at"]
+        finished_at = pipeline_stats["finished_at"] or time.monotonic()
+    if not stages or started_at is None:
+        return
+    
+    wall_time = finished_at - started_at
+    busy_time = sum(stage["total"] for stage in stages.values())
+    print(f"\n{'='*60}")
+    print("流水线阶段统计")
+    print(f"{'='*60}")
+    for stage_name, stage in stages.items():
+        average = stage["total"] / stage["count"] if stage["count"] else 0
+        print(f"  {stage_name}: {stage['count']} 次，累计 {stage['total']:.2f}秒，平均 {average:.2f}秒，最长 {stage['max']:.2f}秒")
+    print(f"  运行时间: {wall_time:.2f}秒，各阶段累计: {busy_time:.2f}秒")
+    if wall_time > 0:
+        print(f"  重叠系数: {busy_time / wall_time:.2f}（大于1表示阶段之间并行执行）")
+    print(f"{'='*60}")
+
+def prepare_api_job(args, api_params):
+    """
+    流水线准备阶段：校验音色、解析配置并预读文本和音频哈希，不涉及浏览器
+    
+    Args:
+        args: 命令行参数
+        api_params: API数据
+    
+    Returns:
+        dict: 任务 {"api_params", "config", "error"}
+    """
+    job = {"api_params": api_params, "config": None, "error": None}
+    
+    job["error"] = validate_api_item(api_params)
+    if job["error"]:
+        return job
+    
+    config = load_config(
+        filename=args.filename, 
+        output_filename=args.output, 
+        content=args.content, 
+        api_params=api_params
+    )
+    if not config:
+        job["error"] = "配置加载失败"
+        return job
+    
+    # 提前检查文件并读取文本，同时计算参考音频哈希（结果进入缓存，执行阶段直接使用）
+    if load_job_inputs(config.get("text_files", []), config.get("audio_files", [])) is None:
+        job["error"] = "任务文件检查失败"
+        return job
+    for audio_config in config.get("audio_files", []):
+        get_file_sha256(audio_config["file_path"])
+    
+    job["config"] = config
+    return job
+
+def prefill_job_form(args, config, session_key):
+    """
+    流水线准备阶段：在标签页池的常驻会话中提前填好任务表单，合成阶段只需点击生成
+    
+    Args:
+        args: 命令行参数
+        config: 本次任务的配置字典
+        session_key: 本任务使用的常驻浏览器会话名称
+    
+    Returns:
+        bool: 是否已填好表单（失败时合成阶段重新填写）
+    """
+    try:
+        file_contents = load_job_inputs(config.get("text_files", []), config.get("audio_files", []))
+        if file_contents is None:
+            return False
+        driver = acquire_browser_session(args, config, session_key)
+        session = browser_sessions.get(session_key)
+        form_counts = fill_job_form(driver, config, file_contents, session)
+    except Exception as e:
+        print(f"⚠️ 预先填写表单失败，合成阶段将重新填写: {e}")
+        return False
+    
+    if form_counts is None or session is None:
+        return False
+    session["prefilled_form"] = (config, form_counts)
+    return True
+
+def take_prefilled_form(config, session_key):
+    """
+    取出流水线为本任务预先填好的表单
+    
+    Args:
+        config: 本次任务的配置字典
+        session_key: 常驻浏览器会话名称
+    
+    Returns:
+        tuple: (WebDriver实例, (文本输入成功数, 音频上传成功数))，没有可用的预填表单时返回None
+    """
+    session = browser_sessions.get(session_key)
+    if not session:
+        return None
+    prefilled = session.pop("prefilled_form", None)
+    if not prefilled or prefilled[0] is not config:
+        return None
+    
+    driver = session["driver"]
+    if session.get("tab_handle"):
+        bind_pool_tab(session["tab_handle"])
+    textarea_selector = config.get("selectors", {}).get("textarea", "textarea.scroll-hide.svelte-1f354aw")
+    if not check_browser_health(driver, textarea_selector):
+        return None
+    
+    print(f"⏩ 使用流水线预先填好的表单（会话 {session_key}）")
+    return driver, prefilled[1]
+
+def pipeline_prepare_loop(args, base_config, item_buffer, prepared_queue, stop_event):
+    """
+    流水线准备线程：获取数据并准备任务，放入有界队列（队列满时等待，形成背压）；
+    启用预填表单时还会在轮到的标签页中提前填好表单
+    
+    Args:
+        args: 命令行参数
+        base_config: 基础配置
+        item_buffer: 缓冲区状态
+        prepared_queue: 已准备任务队列
+        stop_event: 停止事件
+    """
+    job_count = 0
+    while not stop_event.is_set():
+        try:
+            api_params = next_api_item(args, base_config, item_buffer)
+        except Exception as e:
+            print(f"⚠️ 流水线获取数据异常: {e}")
+            api_params = None
+        
+        if not api_params:
+            stop_event.wait(args.api_interval)
+            continue
+        
+        # 缓冲区即将用完时后台预取下一批
+        start_api_prefetch(item_buffer)
+        
+        start_time = time.monotonic()
+        try:
+            job = prepare_api_job(args, api_params)
+        except Exception as e:
+            job = {"api_params": api_params, "config": None, "error": f"任务准备异常: {e}"}
+        record_stage_time("准备", time.monotonic() - start_time)
+        
+        # 各任务轮流使用标签页：执行中的任务、队列中的任务和正在预填的任务各占一个，互不冲突
+        if pipeline_prefill["tabs"] and not job["error"]:
+            job["session_key"] = f"pipeline-tab-{job_count % pipeline_prefill['tabs']}"
+            start_time = time.monotonic()
+            prefill_job_form(args, job["config"], job["session_key"])
+            record_stage_time("预填表单", time.monotonic() - start_time)
+        job_count += 1
+        
+        while not stop_event.is_set():
+            try:
+                prepared_queue.put(job, timeout=1)
+                break
+            except queue.Full:
+                continue
+
+def pipeline_finish_loop(item_buffer, finished_queue):
+    """
+    流水线确认线程：确认或释放租约，未使用租约时删除已处理的数据，收到None时退出
+    
+    Args:
+        item_buffer: 缓冲区状态
+        finished_queue: 已完成任务队列，元素为 (API数据, 是否成功)
+    """
+    while True:
+        finished = finished_queue.get()
+        if finished is None:
+            break
+        
+        api_params, success = finished
+        start_time = time.monotonic()
+        item_id = api_params.get('id')
+        if item_id:
+            removed = complete_api_item(item_id, success, item_buffer["lease"])
+            finish_api_item(item_buffer, item_id, requeued=not removed)
+        else:
+            print(f"⚠️ API数据缺少ID字段，无法删除")
+        record_stage_time("确认", time.monotonic() - start_time)
+
+def configure_api_base_url(config):
+    """
+    使用配置文件中的 api.base_url 覆盖默认的API接口地址（本地测试或压测时指向本地服务）
+    
+    Args:
+        config: 配置字典
+    """
+    global API_BASE_URL
+    
+    base_url = config.get("api", {}).get("base_url")
+    if base_url:
+        API_BASE_URL = base_url.rstrip("/")
+        print(f"API接口地址: {API_BASE_URL}")
+
+def start_metrics_server(args, config):
+    """
+    按命令行参数或配置文件启动指标服务
+    
+    Args:
+        args: 命令行参数（--metrics-port 优先）
+        config: 配置字典，读取 metrics.enabled、metrics.host、metrics.port
+    
+    Returns:
+        bool: 是否启动了指标服务
+    """
+    metrics_config = config.get("metrics", {})
+    port = args.metrics_port
+    if port is None:
+        if not metrics_config.get("enabled", False):
+            return False
+        port = metrics_config.get("port", 9108)
+    return metrics.start_server(port, metrics_config.get("host", "127.0.0.1"))
+
+def run_api_pipeline(args, base_config):
+    """
+    流水线模式：准备线程在当前任务合成期间准备下一条数据，确认线程异步确认已完成的数据，
+    主线程只负责浏览器合成；阶段之间使用有界队列
+    
+    Args:
+        args: 命令行参数
+        base_config: 基础配置
+    """
+    pipeline_config = base_config.get("pipeline", {})
+    queue_size = max(1, int(pipeline_config.get("queue_size", 1)))
+    item_buffer = create_api_item_buffer(base_config.get("api"))
+    prepared_queue = queue.Queue(maxsize=queue_size)
+    finished_queue = queue.Queue(maxsize=queue_size)
+    stop_event = threading.Event()
+    
+    print(f"\n🔀 启用流水线模式：准备/合成/确认 三个阶段，阶段队列长度 {queue_size}")
+    pipeline_stats["started_at"] = time.monotonic()
+    
+    # 标签页池和常驻会话都开启时，准备线程在空闲标签页中提前填好下一条数据的表单
+    browser_config = base_config.get("browser", {})
+    if is_tab_pool_enabled(base_config) and browser_config.get("persistent_session", False) \
+            and base_config.get("backend", "browser") != "http":
+        pipeline_prefill["tabs"] = queue_size + 2
+        print(f"🗂️ 流水线预填表单：{pipeline_prefill['tabs']} 个标签页轮流使用")
+    
+    prepare_thread = threading.Thread(
+        target=pipeline_prepare_loop,
+        args=(args, base_config, item_buffer, prepared_queue, stop_event),
+        name="pipeline-prepare",
+        daemon=True
+    )
+    finish_thread = threading.Thread(
+        target=pipeline_finish_loop,
+        args=(item_buffer, finished_queue),
+        name="pipeline-finish",
+        daemon=True
+    )
+    prepare_thread.start()
+    finish_thread.start()
+    
+    round_number = 1
+    try:
+        while True:
+            # 使用超时等待，保证 Ctrl+C 能及时中断（Windows下无超时的等待无法被中断）
+            try:
+                job = prepared_queue.get(timeout=1)
+            except queue.Empty:
+                continue
             
-            # 显示按钮信息
-            print(f"按钮位置: {button.location}")
-            print(f"按钮大小: {button.size}")
-            print(f"按钮文本: {button.text}")
+            start_time = time.monotonic()
+            if job["error"]:
+                print(f"❌ 第 {round_number} 轮数据无效，跳过: {job['error']}")
+                metrics.inc("voiceapi_jobs_total", labels={"result": "invalid"})
+                success = False
+            else:
+                try:
+                    success = run_single_automation(args, base_config, job["api_params"], round_number,
+                                                    session_key=job.get("session_key", "default"), config=job["config"])
+                except Exception as e:
+                    print(f"❌ 第 {round_number} 轮自动化操作异常: {e}")
+                    success = False
+            record_stage_time("合成", time.monotonic() - start_time)
+            
+            finished_queue.put((job["api_params"], success))
+            
+            if success:
+                print(f"✅ 第 {round_number} 轮操作成功完成")
+            else:
+                print(f"⚠️ 第 {round_number} 轮操作失败，但继续监控")
+            round_number += 1
+            
+            # 普通模式：每条数据之间固定等待
+            if not args.api_fast:
+                print(f"\n⏱️ 等待 {args.api_interval} 秒后继续处理...")
+                time.sleep(args.api_interval)
+    
+    except KeyboardInterrupt:
+        print(f"\n\n🛑 检测到 Ctrl+C，程序停止")
+    
+    except Exception as e:
+        print(f"\n❌ 流水线模式异常: {e}")
+    
+    finally:
+        stop_event.set()
+        finished_queue.put(None)
+        finish_thread.join()
+        prepare_thread.join(timeout=5)
+        pipeline_stats["finished_at"] = time.monotonic()
+        pipeline_prefill["tabs"] = 0
+        
+        # 释放已准备但未执行数据的租约，并关闭常驻浏览器
+        release_all_api_leases(item_buffer["lease"])
+        close_browser_session()
+        drain_upload_queue()
+        
+        print(f"📊 总共完成了 {round_number - 1} 轮自动化操作")
+        print(f"📊 API列表请求 {item_buffer['list_calls']} 次")
+        record_timestamp("程序结束")
+        print_timing_summary()
+        print_pipeline_summary()
+
+def main():
+    """主函数"""
+    # 解析命令行参数
+    args = parse_arguments()
+    
+    # 单次执行模式下整个程序就是一个任务，从程序启动开始追踪
+    if not (args.api and args.api_loop):
+        start_job_trace("单次任务")
+    
+    # 记录程序启动时间戳
+    record_timestamp("程序启动")
+    
+    print("=== 输入文本文件内容到textarea区域并上传音频文件 ===")
+    
+    # 检查是否启用API循环模式
+    if args.api and args.api_loop:
+        print(f"\n🔄 启用API循环模式")
+        print(f"   检查间隔: {args.api_interval}秒")
+        print(f"   单次最大等待: {args.api_wait}秒")
+        print(f"   快速处理模式: {'启用' if args.api_fast else '禁用'}")
+        if args.api_fast:
+            print(f"   📈 多数据处理: 检测到多条数据时立即连续处理")
+        else:
+            print(f"   ⏱️ 多数据处理: 每条数据间固定等待{args.api_interval}秒")
+        print(f"   程序将持续监控API并自动执行操作")
+        print(f"   按 Ctrl+C 可停止程序")
+        
+        # 加载基础配置（不包含API参数）
+        base_config = load_config(filename=args.filename, output_filename=args.output, content=args.content)
+        if not base_config:
+            print("❌ 基础配置加载失败，程序退出")
+            return
+        http_client.configure(base_config.get("http"))
+        configure_api_base_url(base_config)
+        configure_tracing(base_config.get("tracing"))
+        start_metrics_server(args, base_config)
+        start_upload_workers(base_config)
+        configure_voice_registry(load_paths_from_file(), base_config.get("voices"))
+        
+        # 多端点并发工作池
+        if args.api_workers or base_config.get("workers", {}).get("enabled", False):
+            run_worker_pool(args, base_config)
+            return
+        
+        # 准备/合成/确认流水线
+        if base_config.get("pipeline", {}).get("enabled", False):
+            run_api_pipeline(args, base_config)
+            return
+        
+        round_number = 1
+        item_buffer = create_api_item_buffer(base_config.get("api"))
+        
+        try:
+            while True:
+                print(f"\n{'='*60}")
+                print(f"等待第 {round_number} 轮API数据...")
+                print(f"{'='*60}")
+                
+                # 优先使用本地缓冲区中已领取的数据，缓冲区为空时再等待API数据
+                api_params = next_api_item(args, base_config, item_buffer)
+                
+                if api_params:
+                     # 缓冲区即将用完时在合成期间后台预取下一批
+                     start_api_prefetch(item_buffer)
+                     
+                     # 执行自动化操作（音色不存在时不启动浏览器，直接按失败处理）
+                     error = validate_api_item(api_params)
+                     if error:
+                         print(f"❌ 第 {round_number} 轮数据无效，跳过: {error}")
+                         metrics.inc("voiceapi_jobs_total", labels={"result": "invalid"})
+                         success = False
+                     else:
+                         success = run_single_automation(args, base_config, api_params, round_number)
+                     
+                     # 确认或释放租约；未使用租约时删除已处理的数据（无论成功失败都删除，避免重复处理）
+                     item_id = api_params.get('id')
+                     if item_id:
+                         removed = complete_api_item(item_id, success, item_buffer["lease"])
+                         finish_api_item(item_buffer, item_id, requeued=not removed)
+                     else:
+                         print(f"⚠️ API数据缺少ID字段，无法删除")
+                     
+                     if success:
+                         print(f"✅ 第 {round_number} 轮操作成功完成")
+                     else:
+                         print(f"⚠️ 第 {round_number} 轮操作失败，但继续监控")
+                     
+                     round_number += 1
+                     
+                     # 根据是否启用快速模式决定处理策略
+                     if args.api_fast:
+                         # 快速模式：缓冲区还有数据（或后台预取到数据）时立即开始下一轮
+                         wait_for_api_prefetch(item_buffer)
+                         if not item_buffer["items"] and not item_buffer["prefetch"]:
+                             print(f"\n🔍 快速模式：检查是否还有更多待处理数据...")
+                             refill_api_item_buffer(item_buffer)
+                         remaining = len(item_buffer["items"])
+                         if remaining:
+                             print(f"🚀 缓冲区还有 {remaining} 条待处理数据，立即开始下一轮...")
+                             continue  # 立即开始下一轮，不等待
+                         print(f"✨ 暂无更多数据，等待 {args.api_interval} 秒后继续监控...")
+                         
+                         # 如果没有更多数据，等待指定时间
+                         time.sleep(args.api_interval)
+                     else:
+                         # 普通模式：固定等待时间
+                         print(f"\n⏱️ 等待 {args.api_interval} 秒后继续监控...")
+                         time.sleep(args.api_interval)
+                else:
+                    print(f"❌ 第 {round_number} 轮获取API数据失败，等待 {args.api_interval} 秒后重试...")
+                    time.sleep(args.api_interval)
+                    
+        except KeyboardInterrupt:
+            print(f"\n\n🛑 检测到 Ctrl+C，程序停止")
+            print(f"📊 总共完成了 {round_number - 1} 轮自动化操作")
+            print(f"📊 API列表请求 {item_buffer['list_calls']} 次")
+            
+            # 记录程序结束时间戳
+            record_timestamp("程序结束")
+            print_timing_summary()
+            
+        except Exception as e:
+            print(f"\n❌ API循环模式异常: {e}")
+            
+            # 记录程序结束时间戳
+            record_timestamp("程序结束")
+            print_timing_summary()
+        
+        finally:
+            # 释放缓冲区中尚未处理数据的租约，并关闭跨轮次复用的常驻浏览器
+            release_all_api_leases(item_buffer["lease"])
+            close_browser_session()
+            drain_upload_queue()
+    
+    else:
+        # 单次执行模式（原有逻辑）
+        # 如果指定了API参数，从接口获取参数
+        api_params = None
+        if args.api:
+            base_config = load_config(filename=args.filename, output_filename=args.output, content=args.content)
+            if base_config:
+                configure_api_base_url(base_config)
+            api_params = fetch_params_from_api(max_wait_time=args.api_wait, check_interval=args.api_interval)
+            if not api_params:
+                print("⚠️ 从API获取参数失败，将使用其他参数源")
+        
+        # 加载配置文件
+        config = load_config(filename=args.filename, output_filename=args.output, content=args.content, api_params=api_params)
+        if not config:
+            print("\n" + "="*60)
+            print("程序启动失败！")
+            print("="*60)
+            print("可能的原因：")
+            print("1. paths.txt文件不存在")
+            print("2. paths.txt中缺少必要的路径配置")
+            print("3. config.json文件格式错误")
+            print("\n解决方案：")
+            print("1. 确保paths.txt文件存在")
+            print("2. 检查paths.txt是否包含以下必要配置：")
+            print("   - text_file_1")
+            print("   - text_file_2") 
+            print("   - audio_file_1")
+            print("   - temp_directory")
+            print("3. 参考paths_linux.txt文件中的示例格式")
+            print("="*60)
+            finish_job_trace(False)
+            return
+        http_client.configure(config.get("http"))
+        configure_tracing(config.get("tracing"))
+        start_upload_workers(config)
+        
+        # 记录配置加载完成时间戳
+        record_timestamp("配置加载完成")
+        
+        # 显示配置信息
+        text_files = config.get("text_files", [])
+        audio_files = config.get("audio_files", [])
+        temp_directory = config.get("temp_directory", "")
+        monitoring_config = config.get("monitoring", {})
+        browser_config = config.get("browser", {})
+        
+        print("\n配置信息:")
+        print(f"目标URL: {config.get('url', 'http://127.0.0.1:50004/')}")
+        print(f"执行后端: {config.get('backend', 'browser')}")
+        print(f"临时目录: {temp_directory}")
+        print(f"浏览器模式: {'无界面模式' if browser_config.get('headless', False) else '有界面模式'}")
+        print(f"窗口大小: {browser_config.get('window_size', '1920,1080')}")
+        print(f"ChromeDriver路径: {browser_config.get('driver_path', '未指定')}")
+        print(f"监控功能: {'启用' if monitoring_config.get('enabled', True) else '禁用'}")
+        if monitoring_config.get('enabled', True):
+            print(f"结果获取方式: {monitoring_config.get('capture_mode', 'temp_dir')}")
+            print(f"完成判定方式: {monitoring_config.get('completion_mode', 'event')}")
+            print(f"扫描间隔: 2秒")
+            print(f"无更新超时: {monitoring_config.get('no_update_timeout', 60)}秒")
+            print(f"最大等待: {monitoring_config.get('max_wait_time', 600)}秒")
+        
+        output_config = config.get("output", {})
+        print(f"输出目录: {output_config.get('directory', 'data')}")
+        print(f"输出文件名: {output_config.get('filename', 'output_audio.wav')}")
+        
+        print(f"文本文件数量: {len(text_files)}")
+        for i, text_file in enumerate(text_files, 1):
+            if "file_path" in text_file:
+                print(f"  文本文件{i}: {text_file['file_path']} -> 第{text_file['textarea_index']+1}个textarea")
+            elif "content" in text_file:
+                content_preview = text_file['content'][:50] + "..." if len(text_file['content']) > 50 else text_file['content']
+                print(f"  文本内容{i}: {repr(content_preview)} -> 第{text_file['textarea_index']+1}个textarea")
+            else:
+                print(f"  文本配置{i}: {text_file.get('description', '未知')} -> 第{text_file['textarea_index']+1}个textarea")
+        
+        print(f"音频文件数量: {len(audio_files)}")
+        for i, audio_file in enumerate(audio_files, 1):
+            print(f"  音频文件{i}: {audio_file['file_path']} -> {audio_file['upload_selector']}")
+        
+        # 清空临时目录（从页面输出组件获取结果时无需扫描临时目录，也就不需要清空）
+        # 启用后台清理时不再清空，由清理线程删除已取走结果或过期的文件夹
+        temp_job = None
+        if is_temp_gc_enabled(config):
+            start_temp_gc(config)
+            temp_job = begin_temp_job()
+        elif temp_directory and monitoring_config.get("capture_mode", "temp_dir") != "page_output" \
+                and config.get("backend", "browser") != "http":
+            print(f"\n{'='*50}")
+            print("步骤1: 清空临时目录")
+            print(f"{'='*50}")
+            if not clear_temp_directory(temp_directory):
+                print("⚠️ 临时目录清空失败，但继续执行后续操作")
+            print(f"{'='*50}")
+            
+            # 记录临时目录清空完成时间戳
+            record_timestamp("临时目录清空完成")
+        
+        print("\n开始执行自动化操作...\n")
+        
+        try:
+            # 执行自动化操作
+            if config.get("backend", "browser") == "http":
+                success = run_http_backend(config)
+            else:
+                success = input_multiple_files_to_textareas(args, config)
+            
+            # 等待后台上传完成后再退出
+            drain_upload_queue()
+            
+            # 如果使用了API且操作成功，删除已处理的API数据
+            if args.api and api_params and success:
+                item_id = api_params.get('id')
+                if item_id:
+                    delete_success = delete_api_data(item_id)
+                    if not delete_success:
+                        print(f"⚠️ 删除API数据失败")
+                else:
+                    print(f"⚠️ API数据缺少ID字段，无法删除")
+            
+            # 记录程序结束时间戳
+            record_timestamp("程序结束")
+            finish_job_trace(success)
+            
+            # 打印时间统计摘要
+            print_timing_summary()
+            
+            if success:
+                print("所有自动化操作完成！")
+            else:
+                print("部分或全部自动化操作失败！")
+        except Exception as e:
+            # 记录程序异常结束时间戳
+            record_timestamp("程序结束")
+            finish_job_trace(False)
             
-            # 跳过第一个按钮点击
-            print("✓ 根据配置，跳过第一个按钮点击")
+            # 打印时间统计摘要
+            print_timing_summary()
             
-            # 直接查找第二个相同样式的按钮
-            print("正在查找第二个相同样式的按钮...")
+            print(f"程序执行过程中发生异常: {e}")
+            print("部分或全部自动化操作失败！")
+        finally:
+            if temp_job:
+                end_temp_job(temp_job)
+
+def get_wav_info(audio_path):
+    """
+    读取WAV文件的时长和采样率
+    
+    Args:
+        audio_path: 音频文件路径
+    
+    Returns:
+        tuple: (时长秒数, 采样率)，不是WAV文件或读取失败时返回 (None, None)
+    """
+    try:
+        with wave.open(audio_path, 'rb') as wav_file:
+            sample_rate = wav_file.getframerate()
+            return wav_file.getnframes() / float(sample_rate), sample_rate
+    except Exception:
+        return None, None
+
+def build_voice_entry(name, text_path, audio_path):
+    """
+    读取单个音色的提示词文本和音频信息
+    
+    Args:
+        name: 音色名称
+        text_path: 提示词文本文件路径
+        audio_path: 提示音频文件路径
+    
+    Returns:
+        dict: 音色信息，提示词文本读取失败时返回None
+    """
+    prompt_text = read_prompt_file(text_path)
+    if prompt_text is None:
+        return None
+    duration, sample_rate = get_wav_info(audio_path)
+    return {
+        "name": name,
+        "text_path": text_path,
+        "audio_path": audio_path,
+        "prompt_text": prompt_text,
+        "duration": duration,
+        "sample_rate": sample_rate,
+        "sha256": get_file_sha256(audio_path),
+        "text_mtime": os.path.getmtime(text_path),
+        "audio_mtime": os.path.getmtime(audio_path)
+    }
+
+def get_voice_dir_mtimes():
+    """获取音色文本目录和音频目录的修改时间（目录中增删文件时会变化）"""
+    mtimes = []
+    for directory in (voice_registry["text_dir"], voice_registry["audio_dir"]):
+        try:
+            mtimes.append(os.stat(directory).st_mtime_ns)
+        except OSError:
+            mtimes.append(None)
+    return tuple(mtimes)
+
+def scan_voice_registry():
+    """
+    扫描音色目录，重建音色注册表（文件未变化的音色沿用已有信息）
+    
+    Returns:
+        int: 注册的音色数量
+    """
+    with voice_registry["lock"]:
+        audio_dir = voice_registry["audio_dir"]
+        text_dir = voice_registry["text_dir"]
+        voice_registry["dir_mtimes"] = get_voice_dir_mtimes()
+        voice_registry["checked_at"] = time.time()
+        
+        try:
+            audio_names = [entry.name for entry in os.scandir(audio_dir) if entry.is_file()]
+        except OSError as e:
+            print(f"⚠️ 无法扫描音色目录 {audio_dir}: {e}")
+            voice_registry["voices"] = {}
+            return 0
+        
+        voices = {}
+        for audio_name in audio_names:
+            name, extension = os.path.splitext(audio_name)
+            if extension.lower() != voice_registry["audio_ext"].lower():
+                continue
+            audio_path = os.path.join(audio_dir, audio_name)
+            text_path = os.path.join(text_dir, f"{name}{voice_registry['text_ext']}")
+            if not os.path.exists(text_path):
+                continue
             
-            # 读取按钮点击配置
-            buttons_config = config.get("buttons", {})
-            click_first_button = buttons_config.get("click_first_button", False)
-            click_second_button = buttons_config.get("click_second_button", True)
+            entry = voice_registry["voices"].get(name)
+            try:
+                if not entry or entry["text_mtime"] != os.path.getmtime(text_path) \
+                        or entry["audio_mtime"] != os.path.getmtime(audio_path):
+                    entry = build_voice_entry(name, text_path, audio_path)
+            except OSError:
+                entry = None
+            if entry:
+                voices[name] = entry
+        
+        voice_registry["voices"] = voices
+        return len(voices)
+
+def configure_voice_registry(paths, voices_config=None):
+    """
+    根据paths中text_file_2和audio_file_1所在的目录建立音色注册表
+    
+    Args:
+        paths: 路径配置字典（load_paths_from_file的返回值）
+        voices_config: 音色注册表配置（config["voices"]）
+    
+    Returns:
+        bool: 是否启用了注册表
+    """
+    voices_config = voices_config or {}
+    if not voices_config.get("enabled", False) or not paths.get("text_file_2") or not paths.get("audio_file_1"):
+        return False
+    
+    with voice_registry["lock"]:
+        voice_registry["text_dir"] = os.path.dirname(os.path.abspath(paths["text_file_2"]))
+        voice_registry["text_ext"] = os.path.splitext(paths["text_file_2"])[1]
+        voice_registry["audio_dir"] = os.path.dirname(os.path.abspath(paths["audio_file_1"]))
+        voice_registry["audio_ext"] = os.path.splitext(paths["audio_file_1"])[1]
+        voice_registry["refresh_interval"] = voices_config.get("refresh_interval", 5)
+        voice_registry["enabled"] = True
+        count = scan_voice_registry()
+    
+    print(f"🎙️ 音色注册表已建立: {count} 个音色（{voice_registry['audio_dir']}）")
+    return True
+
+def refresh_voice_registry():
+    """按刷新间隔检查音色目录，目录中有文件增删时重新扫描"""
+    with voice_registry["lock"]:
+        if time.time() - voice_registry["checked_at"] < voice_registry["refresh_interval"]:
+            return
+        if get_voice_dir_mtimes() != voice_registry["dir_mtimes"]:
+            count = scan_voice_registry()
+            print(f"🎙️ 音色目录有变化，已重新扫描: {count} 个音色")
+        else:
+            voice_registry["checked_at"] = time.time()
+
+def lookup_voice(name):
+    """
+    按名称查找音色（文件被原地修改时重新读取该音色）
+    
+    Args:
+        name: 音色名称
+    
+    Returns:
+        dict: 音色信息，未启用注册表或音色不存在时返回None
+    """
+    if not voice_registry["enabled"] or not name:
+        return None
+    
+    with voice_registry["lock"]:
+        refresh_voice_registry()
+        entry = voice_registry["voices"].get(name)
+        if entry:
+            try:
+                if entry["text_mtime"] != os.path.getmtime(entry["text_path"]) \
+                        or entry["audio_mtime"] != os.path.getmtime(entry["audio_path"]):
+                    entry = build_voice_entry(name, entry["text_path"], entry["audio_path"])
+            except OSError:
+                entry = None
+            if entry:
+                voice_registry["voices"][name] = entry
+            else:
+                voice_registry["voices"].pop(name, None)
+        return entry
+
+def validate_api_item(api_params):
+    """
+    在启动浏览器等操作之前检查API数据引用的音色是否存在
+    
+    Args:
+        api_params: API数据
+    
+    Returns:
+        str: 错误信息，数据有效时返回None
+    """
+    if not voice_registry["enabled"]:
+        return None
+    voice = api_params.get('voice', '')
+    if voice and lookup_voice(voice) is None:
+        return f"音色不存在: {voice}（{voice_registry['audio_dir']} 中没有对应的提示音频和文本）"
+    return None
+
+def load_config(config_file="config_win.json", filename=None, output_filename=None, content=None, api_params=None):
+    """
+    从config.json文件加载配置，并使用paths.txt中的路径
+    
+    Args:
+        config_file: 配置文件路径
+        filename: 可选的文件名（不含扩展名），用于替换text_file_2和audio_file_1的文件名
+        output_filename: 可选的输出文件名（不含扩展名），用于指定最后拷贝的文件名
+        content: 可选的文本内容，直接用于第一个textarea，优先级高于text_file_1
+        api_params: 从API获取的参数字典，优先级最高
+    
+    Returns:
+        配置字典
+    """
+    try:
+        if not os.path.exists(config_file):
+            print(f"配置文件不存在: {config_file}")
+            print("创建默认配置文件...")
+            create_default_config(config_file)
+        
+        with open(config_file, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        
+        print(f"✓ 成功加载配置文件: {config_file}")
+        
+        # 加载路径配置
+        paths = load_paths_from_file()
+        
+        # 验证必要的路径配置
+        required_paths = ["text_file_1", "text_file_2", "audio_file_1", "temp_directory"]
+        missing_paths = []
+        
+        for path_key in required_paths:
+            if path_key not in paths or not paths[path_key].strip():
+                missing_paths.append(path_key)
+        
+        if missing_paths:
+            print(f"\n✗ 错误：paths.txt中缺少以下必要路径配置：")
+            for path_key in missing_paths:
+                print(f"  - {path_key}")
+            print(f"\n请检查paths.txt文件，确保包含所有必要的路径配置。")
+            print(f"参考paths_linux.txt文件中的示例格式。")
+            return None
+        
+        # 如果路径配置存在，替换配置文件中的路径
+        if paths:
+            print("正在使用paths.txt中的路径替换配置文件路径...")
             
-            # 查找所有相同样式的按钮
-            all_buttons = driver.find_elements(By.CSS_SELECTOR, button_selector)
+            # 替换文本文件路径
+            if "text_file_1" in paths and len(config.get("text_files", [])) > 0:
+                config["text_files"][0]["file_path"] = paths["text_file_1"]
+                print(f"  文本文件1路径: {paths['text_file_1']}")
             
-            # 处理第一个按钮
-            if click_first_button and len(all_buttons) >= 1:
-                first_button = all_buttons[0]  # 第一个按钮
+            if "text_file_2" in paths and len(config.get("text_files", [])) > 1:
+                text_file_2_path = paths["text_file_2"]
                 
-                # 滚动到第一个按钮位置
-                driver.execute_script("arguments[0].scrollIntoView(true);", first_button)
-                time.sleep(1)
+                # 如果指定了filename参数，替换text_file_2的文件名
+                if filename:
+                    directory = os.path.dirname(text_file_2_path)
+                    original_filename = os.path.basename(text_file_2_path)
+                    extension = os.path.splitext(original_filename)[1]  # 保留原扩展名
+                    new_filename = f"{filename}{extension}"
+                    text_file_2_path = os.path.join(directory, new_filename)
+                    print(f"  使用指定文件名替换text_file_2: {filename}{extension}")
                 
-                # 显示第一个按钮信息
-                print(f"第一个按钮位置: {first_button.location}")
-                print(f"第一个按钮大小: {first_button.size}")
-                print(f"第一个按钮文本: {first_button.text}")
+                config["text_files"][1]["file_path"] = text_file_2_path
+                print(f"  文本文件2路径: {text_file_2_path}")
+            
+            # 替换音频文件路径
+            if "audio_file_1" in paths and len(config.get("audio_files", [])) > 0:
+                audio_file_1_path = paths["audio_file_1"]
                 
-                # 点击第一个按钮
-                print("正在点击第一个按钮...")
-                first_button.click()
-                print("✓ 第一个按钮点击成功！")
+                # 如果指定了filename参数，替换audio_file_1的文件名
+                if filename:
+                    directory = os.path.dirname(audio_file_1_path)
+                    original_filename = os.path.basename(audio_file_1_path)
+                    extension = os.path.splitext(original_filename)[1]  # 保留原扩展名
+                    new_filename = f"{filename}{extension}"
+                    audio_file_1_path = os.path.join(directory, new_filename)
+                    print(f"  使用指定文件名替换audio_file_1: {filename}{extension}")
                 
-                # 等待按钮间隔时间
-                time.sleep(button_interval_timeout)
-            elif not click_first_button:
-                print("⚠️ 根据配置，跳过第一个按钮点击")
-            else:
-                print(f"⚠️ 未找到第一个按钮，无法点击")
+                config["audio_files"][0]["file_path"] = audio_file_1_path
+                print(f"  音频文件1路径: {audio_file_1_path}")
             
-            # 处理第二个按钮
-            if click_second_button:
-                if len(all_buttons) >= 2:
-                    second_button = all_buttons[1]  # 第二个按钮
-                    
-                    # 滚动到第二个按钮位置
-                    driver.execute_script("arguments[0].scrollIntoView(true);", second_button)
-                    time.sleep(1)
-                    
-                    # 显示第二个按钮信息
-                    print(f"第二个按钮位置: {second_button.location}")
-                    print(f"第二个按钮大小: {second_button.size}")
-                    print(f"第二个按钮文本: {second_button.text}")
+            # 替换临时目录路径
+            if "temp_directory" in paths:
+                config["temp_directory"] = paths["temp_directory"]
+                print(f"  临时目录路径: {paths['temp_directory']}")
+        
+        # 如果指定了output_filename参数，替换输出文件名
+        if output_filename:
+            output_config = config.get("output", {})
+            original_filename = output_config.get("filename", "output_audio.wav")
+            extension = os.path.splitext(original_filename)[1]  # 保留原扩展名
+            new_output_filename = f"{output_filename}{extension}"
+            config["output"]["filename"] = new_output_filename
+            print(f"  使用指定输出文件名: {new_output_filename}")
+        
+        # 如果指定了API参数，优先使用API参数（优先级最高）
+        if api_params:
+            print("正在使用API参数配置...")
+            
+            # 使用API的voice参数替换文件名
+            api_voice = api_params.get('voice', '')
+            if api_voice:
+                print(f"  使用API的voice参数作为文件名: {api_voice}")
+                
+                # 替换文本文件2的文件名
+                if "text_file_2" in paths and len(config.get("text_files", [])) > 1:
+                    text_file_2_path = paths["text_file_2"]
+                    directory = os.path.dirname(text_file_2_path)
+                    original_filename = os.path.basename(text_file_2_path)
+                    extension = os.path.splitext(original_filename)[1]  # 保留原扩展名
+                    new_filename = f"{api_voice}{extension}"
+                    text_file_2_path = os.path.join(directory, new_filename)
+                    config["text_files"][1]["file_path"] = text_file_2_path
+                    print(f"  使用API voice参数替换text_file_2: {new_filename}")
+                    print(f"  文本文件2新路径: {text_file_2_path}")
                     
-                    # 点击第二个按钮
-                    print("正在点击第二个按钮...")
-                    second_button.click()
-                    print("✓ 第二个按钮点击成功！")
+                    # 音色注册表中已有提示词文本时直接使用内存中的内容
+                    voice = lookup_voice(api_voice)
+                    if voice:
+                        config["text_files"][1]["content"] = voice["prompt_text"]
+                
+                # 替换音频文件1的文件名
+                if "audio_file_1" in paths and len(config.get("audio_files", [])) > 0:
+                    audio_file_1_path = paths["audio_file_1"]
+                    directory = os.path.dirname(audio_file_1_path)
+                    original_filename = os.path.basename(audio_file_1_path)
+                    extension = os.path.splitext(original_filename)[1]  # 保留原扩展名
+                    new_filename = f"{api_voice}{extension}"
+                    audio_file_1_path = os.path.join(directory, new_filename)
+                    config["audio_files"][0]["file_path"] = audio_file_1_path
+                    print(f"  使用API voice参数替换audio_file_1: {new_filename}")
+                    print(f"  音频文件1新路径: {audio_file_1_path}")
+            
+            # 使用API的content参数
+            api_content = api_params.get('content', '')
+            if api_content:
+                # 确保config中有text_files配置
+                if "text_files" not in config:
+                    config["text_files"] = []
+                
+                # 添加或替换第一个textarea的内容（textarea_index=0，对应content文件）
+                api_content_config = {
+                    "content": api_content,
+                    "textarea_index": 0,
+                    "description": "API接口获取的文本内容"
+                }
+                
+                # 查找是否已有textarea_index=0的配置
+                found_index = -1
+                for i, text_file in enumerate(config["text_files"]):
+                    if text_file.get("textarea_index") == 0:
+                        found_index = i
+                        break
+                
+                if found_index >= 0:
+                    # 替换现有配置
+                    config["text_files"][found_index] = api_content_config
+                    print(f"  使用API内容替换第一个textarea配置（content文件）")
                 else:
-                    print(f"⚠️ 只找到 {len(all_buttons)} 个按钮，无法点击第二个按钮")
-            else:
-                print("⚠️ 根据配置，跳过第二个按钮点击")
+                    # 添加新配置
+                    config["text_files"].append(api_content_config)
+                    print(f"  添加API内容到第一个textarea（content文件）")
+                
+                print(f"  API文本内容长度: {len(api_content)} 字符")
+                # 显示内容预览
+                preview = api_content[:100] + "..." if len(api_content) > 100 else api_content
+                print(f"  API文本内容预览: {repr(preview)}")
             
-        except Exception as e:
-            print(f"✗ 点击按钮失败: {e}")
-            print("尝试查找所有可能的按钮...")
+            # 使用API的outfile参数作为输出文件名
+            api_outfile = api_params.get('outfile', '')
+            if api_outfile and not output_filename:  # 只有在没有手动指定输出文件名时才使用API的
+                # 从outfile路径中提取文件名（不含扩展名）
+                api_filename = os.path.splitext(os.path.basename(api_outfile))[0]
+                if api_filename:
+                    output_config = config.get("output", {})
+                    original_filename = output_config.get("filename", "output_audio.wav")
+                    extension = os.path.splitext(original_filename)[1]  # 保留原扩展名
+                    new_output_filename = f"{api_filename}{extension}"
+                    config["output"]["filename"] = new_output_filename
+                    print(f"  使用API输出文件名: {new_output_filename}")
+        
+        # 如果指定了content参数，替换第一个textarea的内容（content文件）
+        elif content:
+            # 确保config中有text_files配置
+            if "text_files" not in config:
+                config["text_files"] = []
             
-            # 尝试查找所有可能的按钮
-            possible_button_selectors = [
-                button_selector,
-                "button.lg.secondary",
-                "button.svelte-cmf5ev",
-                "button[class*='lg']",
-                "button[class*='secondary']",
-                "button[class*='svelte-cmf5ev']",
-                ".lg.secondary.svelte-cmf5ev",
-                "[class*='lg'][class*='secondary']",
-                "[class*='svelte-cmf5ev']"
-            ]
+            # 添加或替换第一个textarea的内容（textarea_index=0，对应content文件）
+            content_config = {
+                "content": content,
+                "textarea_index": 0,
+                "description": "命令行指定的文本内容（替换content文件）"
+            }
             
-            # 读取按钮点击配置
-            buttons_config = config.get("buttons", {})
-            click_first_button = buttons_config.get("click_first_button", False)
-            click_second_button = buttons_config.get("click_second_button", True)
+            # 查找是否已有textarea_index=0的配置
+            found_index = -1
+            for i, text_file in enumerate(config["text_files"]):
+                if text_file.get("textarea_index") == 0:
+                    found_index = i
+                    break
             
-            button_clicked = False
-            for selector in possible_button_selectors:
-                try:
-                    elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                    if len(elements) >= 2:
-                        print(f"找到 {len(elements)} 个可能的按钮: {selector}")
-                        
-                        # 处理第一个按钮
-                        if click_first_button:
-                            first_button = elements[0]
-                            print(f"第一个按钮文本: {first_button.text}")
-                            driver.execute_script("arguments[0].scrollIntoView(true);", first_button)
-                            time.sleep(1)
-                            first_button.click()
-                            print(f"✓ 使用选择器 {selector} 点击第一个按钮成功！")
-                            
-                            # 等待按钮间隔时间
-                            time.sleep(button_interval_timeout)
-                        else:
-                            print("⚠️ 根据配置，跳过第一个按钮点击")
-                        
-                        # 处理第二个按钮
-                        if click_second_button:
-                            second_button = elements[1]
-                            print(f"第二个按钮文本: {second_button.text}")
-                            driver.execute_script("arguments[0].scrollIntoView(true);", second_button)
-                            time.sleep(1)
-                            second_button.click()
-                            print(f"✓ 使用选择器 {selector} 点击第二个按钮成功！")
-                        else:
-                            print("⚠️ 根据配置，跳过第二个按钮点击")
-                        
-                        button_clicked = True
-                        break
-                    elif len(elements) == 1:
-                        print(f"只找到 1 个按钮: {selector}")
-                        button = elements[0]
-                        print(f"按钮文本: {button.text}")
-                        
-                        # 滚动到按钮位置
-                        driver.execute_script("arguments[0].scrollIntoView(true);", button)
-                        time.sleep(1)
-                        
-                        # 根据配置决定是否点击
-                        if click_first_button:
-                            # 点击按钮
-                            button.click()
-                            print(f"✓ 使用选择器 {selector} 点击按钮成功！")
-                        else:
-                            print("⚠️ 根据配置，跳过按钮点击")
-                        
-                        print("⚠️ 只找到一个按钮，无法点击第二个按钮")
-                        button_clicked = True
-                        break
-                except Exception as e:
-                    print(f"使用选择器 {selector} 点击失败: {e}")
-                    continue
+            if found_index >= 0:
+                # 替换现有配置
+                config["text_files"][found_index] = content_config
+                print(f"  使用命令行指定的文本内容替换第一个textarea配置（content文件）")
+            else:
+                # 添加新配置
+                config["text_files"].append(content_config)
+                print(f"  添加命令行指定的文本内容到第一个textarea（content文件）")
             
-            if not button_clicked:
-                print("✗ 所有按钮选择器都失败了，无法点击按钮")
+            print(f"  文本内容长度: {len(content)} 字符")
+            # 显示内容预览
+            preview = content[:100] + "..." if len(content) > 100 else content
+            print(f"  文本内容预览: {repr(preview)}")
+        
+        return config
+        
+    except json.JSONDecodeError as e:
+        print(f"✗ 配置文件格式错误: {e}")
+        print("请检查config.json文件格式")
+        return None
+    except Exception as e:
+        print(f"✗ 读取配置文件失败: {e}")
+        return None
+
+def create_default_config(config_file="config.json"):
+    """
+    创建默认配置文件
+    
+    Args:
+        config_file: 配置文件路径
+    """
+    default_config = {
+        "text_files": [
+            {
+                "file_path": "",
+                "textarea_index": 0,
+                "description": "第一个textarea"
+            },
+            {
+                "file_path": "",
+                "textarea_index": 2,
+                "description": "第三个textarea"
+            }
+        ],
+        "audio_files": [
+            {
+                "file_path": "",
+                "upload_selector": ".svelte-b0hvie",
+                "description": "qinghuanv音频文件"
+            }
+        ],
+        "selectors": {
+            "textarea": "textarea.scroll-hide.svelte-1f354aw",
+            "button": "button.lg.secondary.svelte-cmf5ev",
+            "output_audio": "audio, a[download]"
+        },
+        "url": "http://127.0.0.1:50004/",
+        "api": {
+            "base_url": "",  # 为空时使用 API_BASE_URL，压测时指向本地假服务
+            "batch_size": 5,  # 每次列表请求最多领取的数据条数
+            "prefetch": True,  # 合成期间后台预取下一批数据
+            "prefetch_threshold": 1,  # 缓冲区剩余条数不超过该值时开始预取
+            "lease": {
+                "enabled": False,  # 开启后服务端支持时以租约方式领取数据，不支持时自动回退为处理后删除
+                "claim_path": "/voice/claim/",
+                "heartbeat_path": "/voice/heartbeat/{id}/",
+                "ack_path": "/voice/ack/{id}/",
+                "release_path": "/voice/release/{id}/",
+                "visibility_timeout": 900,  # 租约可见性超时（秒），超时未续期的数据会重新排队
+                "heartbeat_interval": 60,  # 续期间隔（秒）
+                "max_attempts": 3  # 同一条数据失败达到该次数后不再重试
+            },
+            "intake": {
+                "mode": "auto",  # auto: 自动检测SSE/长轮询；sse；long_poll；poll: 仅退避轮询
+                "sse_path": "/voice/stream/",
+                "sse_timeout": 60,
+                "long_poll_param": "wait",
+                "long_poll_timeout": 25,
+                "backoff_max": 30,
+                "backoff_factor": 2,
+                "jitter": 0.2
+            }
+        },
+        "http": {
+            "pool_connections": 10,
+            "pool_maxsize": 20,  # 每个主机保持的最大连接数，不小于工作池线程数
+            "max_retries": 0,
+            "timeouts": {"api": 10, "upload": 60, "gradio": 30, "download": 60}  # 各类接口的默认超时（秒）
+        },
+        "backend": "browser",  # browser: Selenium操作页面；http: 直接调用Gradio队列接口
+        "http_api": {
+            "api_name": "/generate_audio",
+            "fn_index": None,
+            "inputs": ["{text_0}", "3s极速复刻", "", "{text_2}", "{audio_0}", None, "", 0, False, 1.0],
+            "output_index": 0,
+            "timeout": 600
+        },
+        "temp_directory": "",
+        "workers": {
+            "enabled": False,
+            "endpoints": [],  # 为空时使用url+backup_urls
+            "per_endpoint_concurrency": 1
+        },
+        "metrics": {
+            "enabled": False,  # API循环模式下启动指标服务（也可用 --metrics-port 启用）
+            "host": "127.0.0.1",  # 监听地址，默认只允许本机抓取；需要远程抓取时改为 0.0.0.0
+            "port": 9108
+        },
+        "tracing": {
+            "window": 200,  # 计算各阶段分位数时保留的最近耗时次数
+            "print_tree": True,  # 每轮结束后打印阶段耗时树
+            "summary_every": 10  # 每处理多少轮打印一次各阶段分位数，0表示只在退出时打印
+        },
+        "pipeline": {
+            "enabled": False,  # 开启后API循环模式下在当前任务合成期间准备下一条数据
+            "queue_size": 1  # 每个阶段队列最多缓存的任务数
+        },
+        "voices": {
+            "enabled": False,  # 开启后启动时扫描音色目录建立注册表，提前检查音色是否存在
+            "refresh_interval": 5  # 检查音色目录变化的最小间隔（秒）
+        },
+        "browser": {
+            "headless": False,
+            "window_size": "1920,1080",
+            "driver_path": "",  # ChromeDriver路径配置
+            "driver_cache_file": "chromedriver_cache.json",  # 按Chrome主版本号缓存自动下载的ChromeDriver路径
+            "reuse_driver_service": False,  # 开启后所有浏览器会话共用一个常驻的ChromeDriver服务进程
+            "persistent_session": False,  # API循环模式下跨轮次复用浏览器
+            "bulk_input_threshold": 200,  # 文本超过该字符数时用一次JavaScript调用写入textarea
+            "batch_form_fill": False,  # 开启后一次脚本调用填写所有文本框并连续提交所有音频，只等待一次
+            "reference_audio_cache": False,  # 开启后常驻会话中参考音频内容未变化时不重新上传
+            "tab_pool": False  # 开启后工作池中所有工作线程共用一个Chrome进程，每个工作线程使用一个标签页
+        },
+        "output": {
+            "directory": "data",
+            "filename": "output_audio.wav",
+            "materialize": "auto",  # auto: 硬链接/内核拷贝；move: 重命名；copy: shutil.copy2；direct: 直接从临时目录上传
+            "wait_before_close": 5,
+            "auto_close": True
+        },
+        "monitoring": {
+            "enabled": True,
+            "capture_mode": "temp_dir",  # temp_dir: 扫描Gradio临时目录；page_output: 直接从页面输出组件下载
+            "completion_mode": "event",  # event: audio.wav写入完成立即返回；quiet_period: 旧的无更新超时判定
+            "poll_interval": 0.2,
+            "settle_time": 0.5,
+            "no_update_timeout": 60,
+            "max_wait_time": 600,
+            "temp_gc": {
+                "enabled": False,  # 开启后由后台线程清理临时目录，替代每个任务开始前的清空
+                "ttl": 3600,  # 未被取走结果的文件夹保留时间（秒）
+                "max_size_mb": 2048,  # 临时目录总大小上限，超出时从最旧的文件夹开始删除
+                "interval": 30  # 清理间隔（秒）
+            }
+        },
+        "timeouts": {
+            "page_load": 3,
+            "element_wait": 10,
+            "button_interval": 2,
+            "upload_wait": 5,  # 等待音频上传完成的最长时间（秒）
+            "observe_time": 15
+        },
+        "buttons": {
+            "click_first_button": False,
+            "click_second_button": True
+        },
+        "upload": {
+            "enabled": True,
+            "server_url": "http://39.105.213.3",
+            "folder_id": 4,
+            "timeout": 60,
+            "delete_after_upload": True,
+            "retry_count": 3,
+            "retry_delay": 2,
+            "chunk_size": 1048576,  # 上传时每次读取/发送的块大小（字节）
+            "resumable": {
+                "enabled": False,  # 开启后服务器支持时断点续传，不支持时自动使用流式multipart上传
+                "path": "/api/upload/resumable/"
+            },
+            "encode": {
+                "enabled": False,  # 上传前使用ffmpeg压缩音频
+                "format": "flac",  # flac（无损）、opus、mp3（有损）
+                "bitrate": "64k",  # 有损格式的码率
+                "keep_wav": False,  # 压缩后是否保留原始WAV
+                "ffmpeg_path": "",  # 为空时从PATH中查找
+                "timeout": 300
+            },
+            "background": {
+                "enabled": False,  # 后台上传：开启后合成流程不等待上传完成
+                "concurrency": 2,  # 同时上传的文件数
+                "state_file": "upload_queue.json",  # 待上传任务状态文件，程序重启后继续上传
+                "max_attempts": 5,  # 每个文件的最大上传轮数（每轮内仍按 retry_count 重试）
+                "backoff_base": 5,  # 失败后重新排队的初始等待（秒），之后每次翻倍
+                "backoff_max": 300,
+                "drain_timeout": 600  # 程序退出前等待上传完成的最长时间（秒）
+            }
+        }
+    }
+    
+    try:
+        with open(config_file, 'w', encoding='utf-8') as f:
+            json.dump(default_config, f, indent=4, ensure_ascii=False)
+        print(f"✓ 已创建默认配置文件: {config_file}")
+        print("请创建paths.txt文件并配置必要的文件路径")
+        print("参考paths_linux.txt文件中的示例格式")
+    except Exception as e:
+        print(f"✗ 创建配置文件失败: {e}")
+
+def clear_temp_directory(temp_dir):
+    """
+    清空指定的临时目录
+    
+    Args:
+        temp_dir: 要清空的目录路径
+    
+    Returns:
+        bool: 是否成功清空
+    """
+    try:
+        if not os.path.exists(temp_dir):
+            print(f"临时目录不存在: {temp_dir}")
+            print("创建临时目录...")
+            os.makedirs(temp_dir, exist_ok=True)
+            print(f"✓ 已创建临时目录: {temp_dir}")
+            return True
+        
+        print(f"正在清空临时目录: {temp_dir}")
+        
+        # 获取目录中的文件和文件夹（scandir 一次遍历即可得到类型，无需逐项再stat）
+        with os.scandir(temp_dir) as entries:
+            items = [(entry.name, entry.path, entry.is_dir(follow_symlinks=False)) for entry in entries]
+        if not items:
+            print("✓ 临时目录已经是空的")
+            return True
         
-        # 记录按钮点击完成时间戳
-        record_timestamp("按钮点击完成")
+        # 统计要删除的项目数量
+        dir_count = sum(1 for _, _, is_dir in items if is_dir)
+        file_count = len(items) - dir_count
         
-        # 监控临时目录并拷贝文件
-        temp_directory = config.get("temp_directory", "")
-        monitoring_config = config.get("monitoring", {})
-        monitoring_enabled = monitoring_config.get("enabled", True)
+        print(f"发现 {file_count} 个文件和 {dir_count} 个文件夹")
         
-        if temp_directory and monitoring_enabled:
-            print(f"\n{'='*50}")
-            print("步骤3: 监控临时目录并拷贝文件")
-            print(f"{'='*50}")
-            
-            # 记录文件监控开始时间戳
-            record_timestamp("文件监控开始")
-            
-            check_interval = monitoring_config.get("no_update_timeout", 60)
-            max_wait_time = monitoring_config.get("max_wait_time", 600)
-            
-            copy_success = monitor_temp_directory_and_copy(
-                temp_directory, 
-                config,
-                check_interval, 
-                max_wait_time
-            )
-            
-            if copy_success:
-                print("✓ 文件监控和拷贝操作完成")
-                # 记录文件拷贝完成时间戳
-                record_timestamp("文件拷贝完成")
-                
-                # 等待指定秒数后再关闭浏览器
-                output_config = config.get("output", {})
-                wait_before_close = output_config.get("wait_before_close", 0)
-                auto_close = output_config.get("auto_close", False)  # 新增自动关闭选项
-                
-                if wait_before_close > 0:
-                    print(f"拷贝文件后等待 {wait_before_close} 秒...")
-                    time.sleep(wait_before_close)
-                
-                # 如果设置了自动关闭，则关闭浏览器
-                if auto_close:
-                    print("正在关闭浏览器...")
-                    driver.quit()
-                    print("浏览器已关闭！")
-                    return text_success_count == len(text_files_config) and audio_success_count == len(audio_files_config)
-            else:
-                print("✗ 文件监控和拷贝操作失败")
+        # 删除所有内容，并同步更新临时目录索引
+        indexes = [index for (index_dir, _), index in temp_dir_indexes.items() if index_dir == os.path.abspath(temp_dir)]
+        for item, item_path, is_dir in items:
+            try:
+                if is_dir:
+                    shutil.rmtree(item_path)
+                    print(f"  删除文件夹: {item}")
+                    for index in indexes:
+                        index.forget(item)
+                else:
+                    os.remove(item_path)
+                    print(f"  删除文件: {item}")
+            except Exception as e:
+                print(f"  删除失败 {item}: {e}")
+        
+        # 验证清空结果
+        remaining_items = os.listdir(temp_dir)
+        if not remaining_items:
+            print(f"✓ 临时目录清空成功: {temp_dir}")
+            return True
+        else:
+            print(f"⚠️ 临时目录清空不完整，剩余 {len(remaining_items)} 个项目")
+            return False
             
-            print(f"{'='*50}")
+    except Exception as e:
+        print(f"✗ 清空临时目录失败: {e}")
+        return False
+
+# 临时目录后台清理状态：已取走结果的文件夹、进行中的任务（任务标识 -> 开始时间）、文件夹大小缓存
+temp_gc_state = {
+    "lock": threading.Lock(),
+    "harvested": set(),
+    "active_jobs": {},
+    "folder_sizes": {},
+    "thread": None
+}
+
+def is_temp_gc_enabled(config):
+    """
+    是否启用临时目录后台清理（启用后不再在每个任务开始前清空临时目录）
+    
+    Args:
+        config: 配置字典
+    
+    Returns:
+        bool: 是否启用
+    """
+    return config.get("monitoring", {}).get("temp_gc", {}).get("enabled", False)
+
+def start_temp_gc(config):
+    """
+    启动临时目录后台清理线程（只启动一次）
+    
+    Args:
+        config: 配置字典，读取 temp_directory 和 monitoring.temp_gc
+    """
+    temp_directory = config.get("temp_directory", "")
+    if not temp_directory or not is_temp_gc_enabled(config):
+        return
+    
+    gc_config = config.get("monitoring", {}).get("temp_gc", {})
+    with temp_gc_state["lock"]:
+        thread = temp_gc_state["thread"]
+        if thread and thread.is_alive():
+            return
+        thread = threading.Thread(target=temp_gc_loop, args=(temp_directory, gc_config), name="temp-gc", daemon=True)
+        temp_gc_state["thread"] = thread
+    thread.start()
+    print(f"🧹 临时目录后台清理已启用 (保留 {gc_config.get('ttl', 3600)} 秒，上限 {gc_config.get('max_size_mb', 2048)} MB)")
+
+def begin_temp_job():
+    """
+    登记一个正在进行的任务，任务开始后产生的文件夹不会因空间上限被提前清理
+    
+    Returns:
+        str: 任务标识
+    """
+    token = uuid.uuid4().hex
+    with temp_gc_state["lock"]:
+        temp_gc_state["active_jobs"][token] = time.time()
+    return token
+
+def end_temp_job(token):
+    """
+    任务结束后取消登记
+    
+    Args:
+        token: begin_temp_job 返回的任务标识
+    """
+    with temp_gc_state["lock"]:
+        temp_gc_state["active_jobs"].pop(token, None)
+
+def mark_temp_folder_harvested(audio_path):
+    """
+    标记临时目录中的输出文件夹已取走结果，下一次清理时即可删除
+    
+    Args:
+        audio_path: 输出音频路径
+    """
+    with temp_gc_state["lock"]:
+        temp_gc_state["harvested"].add(os.path.abspath(os.path.dirname(audio_path)))
+
+def get_folder_size(folder_path):
+    """
+    统计文件夹占用的字节数
+    
+    Args:
+        folder_path: 文件夹路径
+    
+    Returns:
+        int: 字节数
+    """
+    total = 0
+    try:
+        with os.scandir(folder_path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    total += get_folder_size(entry.path)
+                else:
+                    total += entry.stat(follow_symlinks=False).st_size
+    except OSError:
+        pass
+    return total
+
+def run_temp_gc_pass(temp_dir, gc_config):
+    """
+    执行一次临时目录清理：删除已取走结果的文件夹和超过保留时间的文件夹，
+    总大小超过上限时再从最旧的文件夹开始删除（进行中任务产生的文件夹除外）。
+    页面中仍在复用的参考音频上传文件夹始终保留
+    
+    Args:
+        temp_dir: 临时目录路径
+        gc_config: 清理配置（config["monitoring"]["temp_gc"]）
+    
+    Returns:
+        int: 删除的文件夹数量
+    """
+    ttl = gc_config.get("ttl", 3600)
+    max_bytes = gc_config.get("max_size_mb", 2048) * 1024 * 1024
+    
+    index = get_temp_dir_index(temp_dir)
+    index.update(0)
+    with index.lock:
+        folders = {name: info["mtime"] for name, info in index.folders.items()}
+    
+    with temp_gc_state["lock"]:
+        harvested = set(temp_gc_state["harvested"])
+        active_starts = list(temp_gc_state["active_jobs"].values())
+    protect_after = min(active_starts) - MTIME_TOLERANCE if active_starts else None
+    now = time.time()
+    reference_hashes = get_loaded_reference_hashes()
+    
+    def holds_reference_audio(name):
+        # Gradio把上传的参考音频保存在临时目录的子文件夹中，删除后页面中的音频会失效
+        if not reference_hashes:
+            return False
+        try:
+            with os.scandir(os.path.join(index.temp_dir, name)) as entries:
+                return any(entry.is_file() and get_file_sha256(entry.path) in reference_hashes for entry in entries)
+        except OSError:
+            return False
+    
+    def remove_folder(name):
+        folder_path = os.path.join(index.temp_dir, name)
+        shutil.rmtree(folder_path, ignore_errors=True)
+        index.forget(name)
+        folders.pop(name, None)
+        with temp_gc_state["lock"]:
+            temp_gc_state["harvested"].discard(folder_path)
+            temp_gc_state["folder_sizes"].pop(name, None)
+    
+    removed = 0
+    for name, mtime in list(folders.items()):
+        protected = protect_after is not None and mtime >= protect_after
+        if os.path.join(index.temp_dir, name) in harvested or (not protected and now - mtime > ttl and not holds_reference_audio(name)):
+            remove_folder(name)
+            removed += 1
+    
+    # 空间上限：文件夹大小按修改时间缓存，只统计新的或有变化的文件夹
+    sizes = {}
+    for name, mtime in folders.items():
+        cached = temp_gc_state["folder_sizes"].get(name)
+        if not cached or cached[0] != mtime:
+            cached = (mtime, get_folder_size(os.path.join(index.temp_dir, name)))
+            temp_gc_state["folder_sizes"][name] = cached
+        sizes[name] = cached[1]
+    
+    total_bytes = sum(sizes.values())
+    if total_bytes > max_bytes:
+        for name in sorted(folders, key=folders.get):
+            if total_bytes <= max_bytes:
+                break
+            if (protect_after is not None and folders[name] >= protect_after) or holds_reference_audio(name):
+                continue
+            total_bytes -= sizes[name]
+            remove_folder(name)
+            removed += 1
+    
+    if removed:
+        print(f"🧹 [后台清理] 删除 {removed} 个临时文件夹，剩余 {len(folders)} 个 ({total_bytes / 1024 / 1024:.1f} MB)")
+    return removed
+
+def temp_gc_loop(temp_dir, gc_config):
+    """
+    临时目录后台清理线程：每隔 interval 秒执行一次清理
+    
+    Args:
+        temp_dir: 临时目录路径
+        gc_config: 清理配置
+    """
+    interval = gc_config.get("interval", 30)
+    while True:
+        try:
+            run_temp_gc_pass(temp_dir, gc_config)
+        except Exception as e:
+            print(f"⚠️ [后台清理] 清理临时目录异常: {e}")
+        time.sleep(interval)
+
+# 文件上传状态：断点续传能力检测结果（None表示尚未检测）和未完成的续传会话（文件 -> 上传地址）
+upload_state = {
+    "lock": threading.Lock(),
+    "resumable_supported": None,
+    "sessions": {}
+}
+
+class MultipartFileStream:
+    """
+    流式multipart请求体：按固定大小分块读取文件，内存占用不随文件大小增长
+    
+    requests 通过 __len__ 设置 Content-Length，并反复调用 read() 发送请求体
+    """
+    
+    def __init__(self, file_path, fields, file_field="file", chunk_size=1024 * 1024, progress_callback=None, file_name=None):
+        boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        self.chunk_size = chunk_size
+        self.progress_callback = progress_callback
         
-        # 等待一段时间观察结果
-        print(f"等待{observe_timeout}秒观察操作结果...")
-        time.sleep(observe_timeout)
+        preamble = b""
+        for name, value in fields.items():
+            preamble += (f"--{boundary}\r\n"
+                         f"Content-Disposition: form-data; name=\"{name}\"\r\n\r\n"
+                         f"{value}\r\n").encode("utf-8")
+        preamble += (f"--{boundary}\r\n"
+                     f"Content-Disposition: form-data; name=\"{file_field}\"; filename=\"{file_name or os.path.basename(file_path)}\"\r\n"
+                     f"Content-Type: application/octet-stream\r\n\r\n").encode("utf-8")
+        epilogue = f"\r\n--{boundary}--\r\n".encode("utf-8")
         
-        # 保持浏览器打开
-        print("浏览器将保持打开状态...")
-        print("您可以手动关闭浏览器窗口，或按Ctrl+C终止程序")
+        self.file = open(file_path, 'rb', buffering=chunk_size)
+        self.parts = [preamble, self.file, epilogue]
+        self.length = len(preamble) + os.path.getsize(file_path) + len(epilogue)
+        self.sent = 0
+    
+    def __len__(self):
+        return self.length
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def read(self, size=-1):
+        """
+        读取下一段请求体
         
-        try:
-            while True:
-                time.sleep(1)
-        except KeyboardInterrupt:
-            print("\n检测到Ctrl+C，正在关闭浏览器...")
+        Args:
+            size: 最多读取的字节数，-1表示按 chunk_size 读取
         
-        # 关闭浏览器
-        driver.quit()
-        print("浏览器已关闭！")
-        return text_success_count == len(text_files_config) and audio_success_count == len(audio_files_config)
+        Returns:
+            bytes: 请求体数据，读完后返回空字节串
+        """
+        if size is None or size < 0:
+            size = self.chunk_size
         
-    except Exception as e:
-        print(f"发生错误: {str(e)}")
-        print(f"请确保本地服务正在运行在 {target_url}")
-        return False
+        data = b""
+        while self.parts and len(data) < size:
+            part = self.parts[0]
+            if isinstance(part, bytes):
+                taken = part[:size - len(data)]
+                data += taken
+                if len(taken) == len(part):
+                    self.parts.pop(0)
+                else:
+                    self.parts[0] = part[len(taken):]
+            else:
+                chunk = part.read(size - len(data))
+                if chunk:
+                    data += chunk
+                else:
+                    self.parts.pop(0)
+        
+        self.sent += len(data)
+        if self.progress_callback and data:
+            self.progress_callback(self.sent, self.length)
+        return data
+    
+    def close(self):
+        """关闭文件"""
+        self.file.close()
 
-def run_single_automation(args, base_config, api_params=None, round_number=1):
+def make_upload_progress_printer(file_name, step=10):
     """
-    执行单次自动化操作
+    创建上传进度回调：每完成 step% 打印一次进度
     
     Args:
-        args: 命令行参数
-        base_config: 基础配置
-        api_params: API参数（可选）
-        round_number: 轮次编号
+        file_name: 文件名（用于显示）
+        step: 打印间隔（百分比）
     
     Returns:
-        bool: 是否成功
+        function: 进度回调 callback(已发送字节数, 总字节数)
     """
-    print(f"\n{'='*80}")
-    print(f"开始第 {round_number} 轮自动化操作")
-    print(f"{'='*80}")
+    progress = {"last": -step}
     
-    # 重新加载配置（使用新的API参数）
-    config = load_config(
-        filename=args.filename, 
-        output_filename=args.output, 
-        content=args.content, 
-        api_params=api_params
-    )
+    def callback(sent, total):
+        percent = int(sent * 100 / total) if total else 100
+        if percent >= progress["last"] + step or sent >= total:
+            progress["last"] = percent
+            print(f"   📤 {file_name}: {percent}% ({sent}/{total} 字节)")
     
-    if not config:
-        print(f"❌ 第 {round_number} 轮配置加载失败")
+    return callback
+
+def get_resumable_offset(response):
+    """
+    从断点续传接口的响应中读取服务端已确认的偏移（Upload-Offset 响应头或JSON中的offset）
+    
+    Args:
+        response: 响应
+    
+    Returns:
+        int: 偏移，无法读取时返回None
+    """
+    if response.headers.get("Upload-Offset") is not None:
+        return int(response.headers["Upload-Offset"])
+    try:
+        offset = response.json().get("offset")
+        return int(offset) if offset is not None else None
+    except Exception:
+        return None
+
+def upload_file_resumable(file_path, description, folder_id, url_base, resumable_config, chunk_size, timeout, progress_callback=None, file_name=None):
+    """
+    断点续传上传：创建上传会话后按块发送文件，每块携带 Upload-Offset；
+    失败重试时先查询服务端已确认的偏移，从该位置继续上传，而不是从头开始
+    
+    文件通过 mmap 映射，按块切片发送，内存占用只与块大小有关
+    
+    Args:
+        file_path: 要上传的文件路径
+        description: 文件描述
+        folder_id: 文件夹ID
+        url_base: 服务器地址
+        resumable_config: 断点续传配置（config["upload"]["resumable"]）
+        chunk_size: 每块大小（字节）
+        timeout: 每个请求的超时时间（秒）
+        progress_callback: 进度回调
+        file_name: 上传到服务器的文件名，默认使用本地文件名
+    
+    Returns:
+        bool: 是否上传成功；服务端不支持或拒绝创建上传会话时返回None（改用multipart上传）
+    """
+    create_url = url_base + resumable_config.get("path", "/api/upload/resumable/")
+    file_size = os.path.getsize(file_path)
+    session_key = (os.path.abspath(file_path), file_size, os.path.getmtime(file_path))
+    
+    with upload_state["lock"]:
+        upload_url = upload_state["sessions"].get(session_key)
+    
+    try:
+        offset = None
+        if upload_url:
+            # 查询服务端已确认的偏移，会话失效时重新创建
+            response = http_client.request("HEAD", upload_url, endpoint="upload", timeout=timeout)
+            offset = get_resumable_offset(response) if response.status_code == 200 else None
+            if offset is not None:
+                print(f"↩️ 从偏移 {offset}/{file_size} 继续上传")
+        
+        if offset is None:
+            response = http_client.post(create_url, endpoint="upload", json={
+                "filename": file_name or os.path.basename(file_path),
+                "size": file_size,
+                "description": description,
+                "folder": folder_id
+            }, timeout=timeout)
+            if 400 <= response.status_code < 500 or response.status_code == 501:
+                # 接口不存在或拒绝创建请求：本进程内不再尝试断点续传
+                with upload_state["lock"]:
+                    if upload_state["resumable_supported"] is None:
+                        print(f"ℹ️ 服务器不支持断点续传（状态码 {response.status_code}），使用流式multipart上传")
+                    upload_state["resumable_supported"] = False
+                return None
+            if response.status_code not in (200, 201):
+                print(f"⚠️ 创建断点续传会话失败，状态码: {response.status_code}，本次改用流式multipart上传")
+                return None
+            
+            result = response.json()
+            upload_url = response.headers.get("Location") or f"{create_url}{result.get('upload_id')}/"
+            if upload_url.startswith("/"):
+                upload_url = url_base + upload_url
+            offset = get_resumable_offset(response) or 0
+            with upload_state["lock"]:
+                upload_state["resumable_supported"] = True
+                upload_state["sessions"][session_key] = upload_url
+        
+        with open(file_path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if file_size else b""
+            try:
+                while offset < file_size:
+                    chunk = mapped[offset:offset + chunk_size]
+                    response = http_client.request("PATCH", upload_url, endpoint="upload", data=chunk, headers={
+                        "Upload-Offset": str(offset),
+                        "Content-Type": "application/offset+octet-stream"
+                    }, timeout=timeout)
+                    if response.status_code not in (200, 204):
+                        print(f"❌ 上传分块失败 (偏移 {offset})，状态码: {response.status_code}")
+                        return False
+                    
+                    new_offset = get_resumable_offset(response)
+                    offset = new_offset if new_offset is not None else offset + len(chunk)
+                    if progress_callback:
+                        progress_callback(offset, file_size)
+            finally:
+                if file_size:
+                    mapped.close()
+        
+        with upload_state["lock"]:
+            upload_state["sessions"].pop(session_key, None)
+        return True
+    
+    except Exception as e:
+        print(f"❌ 断点续传异常（偏移已保存，重试时继续）: {e}")
         return False
+
+def record_upload_metrics(file_size, duration):
+    """
+    记录一次成功上传的字节数、耗时和速度（耗时包含重试等待）
     
-    # 显示本轮配置信息
-    text_files = config.get("text_files", [])
-    audio_files = config.get("audio_files", [])
-    temp_directory = config.get("temp_directory", "")
+    Args:
+        file_size: 文件大小（字节）
+        duration: 上传耗时（秒）
+    """
+    metrics.inc("voiceapi_upload_bytes_total", file_size)
+    metrics.observe("voiceapi_upload_duration_seconds", duration)
+    if duration > 0:
+        metrics.set_gauge("voiceapi_upload_bytes_per_second", file_size / duration)
+
+def upload_file_to_server(file_path, description="Generated audio file", config=None, upload_name=None):
+    """
+    将文件上传到服务器
+    
+    Args:
+        file_path: 要上传的文件路径
+        description: 文件描述
+        config: 配置字典（可选）
+        upload_name: 上传到服务器的文件名，默认使用本地文件名
+    
+    Returns:
+        bool: 是否上传成功
+    """
+    # 从配置文件读取服务器配置，如果没有配置则使用默认值
+    if config:
+        upload_config = config.get("upload", {})
+        url_base = upload_config.get("server_url", "http://39.105.213.3")
+        folder_id = upload_config.get("folder_id", 4)
+        timeout = upload_config.get("timeout", 60)
+        retry_count = upload_config.get("retry_count", 3)
+        retry_delay = upload_config.get("retry_delay", 2)
+    else:
+        # 默认配置（参考upload.py）
+        upload_config = {}
+        url_base = 'http://39.105.213.3'
+        folder_id = 4
+        timeout = 60
+        retry_count = 3
+        retry_delay = 2
     
-    print(f"\n第 {round_number} 轮配置信息:")
-    print(f"文本文件数量: {len(text_files)}")
-    for i, text_file in enumerate(text_files, 1):
-        if "file_path" in text_file:
-            print(f"  文本文件{i}: {text_file['file_path']} -> 第{text_file['textarea_index']+1}个textarea")
-        elif "content" in text_file:
-            content_preview = text_file['content'][:50] + "..." if len(text_file['content']) > 50 else text_file['content']
-            print(f"  文本内容{i}: {repr(content_preview)} -> 第{text_file['textarea_index']+1}个textarea")
+    upload_url = url_base + '/api/upload/'
     
-    # 清空临时目录
-    if temp_directory:
-        print(f"\n清空临时目录...")
-        if not clear_temp_directory(temp_directory):
-            print("⚠️ 临时目录清空失败，但继续执行后续操作")
+    print(f"\n开始上传文件到服务器...")
+    print(f"文件路径: {file_path}")
+    print(f"服务器地址: {url_base}")
+    print(f"文件描述: {description}")
+    print(f"文件夹ID: {folder_id}")
+    print(f"重试次数: {retry_count}")
     
-    try:
-        # 执行自动化操作
-        success = input_multiple_files_to_textareas(args, config)
-        
-        if success:
-            print(f"✅ 第 {round_number} 轮自动化操作完成！")
-        else:
-            print(f"❌ 第 {round_number} 轮自动化操作失败！")
-        
-        return success
-        
-    except Exception as e:
-        print(f"❌ 第 {round_number} 轮自动化操作异常: {e}")
+    # 检查文件是否存在
+    if not os.path.exists(file_path):
+        print(f"❌ 文件不存在: {file_path}")
         return False
-
-def main():
-    """主函数"""
-    # 记录程序启动时间戳
-    record_timestamp("程序启动")
     
-    # 解析命令行参数
-    args = parse_arguments()
+    # 获取文件信息
+    file_size = os.path.getsize(file_path)
+    print(f"文件大小: {file_size} 字节")
     
-    print("=== 输入文本文件内容到textarea区域并上传音频文件 ===")
+    chunk_size = upload_config.get("chunk_size", 1024 * 1024)
+    resumable_config = upload_config.get("resumable", {})
+    progress_callback = make_upload_progress_printer(upload_name or os.path.basename(file_path))
+    upload_start = time.monotonic()
     
-    # 检查是否启用API循环模式
-    if args.api and args.api_loop:
-        print(f"\n🔄 启用API循环模式")
-        print(f"   检查间隔: {args.api_interval}秒")
-        print(f"   单次最大等待: {args.api_wait}秒")
-        print(f"   快速处理模式: {'启用' if args.api_fast else '禁用'}")
-        if args.api_fast:
-            print(f"   📈 多数据处理: 检测到多条数据时立即连续处理")
-        else:
-            print(f"   ⏱️ 多数据处理: 每条数据间固定等待{args.api_interval}秒")
-        print(f"   程序将持续监控API并自动执行操作")
-        print(f"   按 Ctrl+C 可停止程序")
-        
-        # 加载基础配置（不包含API参数）
-        base_config = load_config(filename=args.filename, output_filename=args.output, content=args.content)
-        if not base_config:
-            print("❌ 基础配置加载失败，程序退出")
-            return
-        
-        round_number = 1
-        
+    # 重试上传
+    for attempt in range(retry_count + 1):
         try:
-            while True:
-                print(f"\n{'='*60}")
-                print(f"等待第 {round_number} 轮API数据...")
-                print(f"{'='*60}")
-                
-                # 获取API参数
-                api_params = fetch_params_from_api(
-                    max_wait_time=args.api_wait, 
-                    check_interval=args.api_interval
+            if attempt > 0:
+                print(f"\n第 {attempt + 1} 次尝试上传...")
+                metrics.inc("voiceapi_retries_total", labels={"operation": "upload"})
+                time.sleep(retry_delay)  # 重试前等待
+            else:
+                print(f"\n正在上传文件...")
+            
+            print(f"超时时间: {timeout}秒")
+            
+            # 服务端支持断点续传时分块上传，重试时从服务端已确认的偏移继续
+            if resumable_config.get("enabled", False) and upload_state["resumable_supported"] is not False:
+                resumable_result = upload_file_resumable(
+                    file_path, description, folder_id, url_base, resumable_config,
+                    chunk_size, timeout, progress_callback, upload_name
+                )
+                if resumable_result:
+                    print("✅ 文件上传成功！")
+                    record_upload_metrics(file_size, time.monotonic() - upload_start)
+                    return True
+                if resumable_result is False:
+                    if attempt == retry_count:
+                        return False
+                    print(f"将在 {retry_delay} 秒后重试...")
+                    continue
+            
+            # 上传文件（流式multipart请求体，按块读取文件）
+            with MultipartFileStream(file_path, {
+                'description': description,
+                'folder': folder_id  # 文件夹ID，从配置文件读取
+            }, chunk_size=chunk_size, progress_callback=progress_callback, file_name=upload_name) as body:
+                # 复用共享会话的连接，避免每次上传重新建立TCP+TLS连接
+                response = http_client.post(
+                    upload_url, 
+                    endpoint="upload",
+                    data=body, 
+                    headers={
+                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+                        'Content-Type': body.content_type
+                    },
+                    timeout=timeout,
+                    stream=False  # 禁用流式传输以避免ChunkedEncodingError
                 )
                 
-                if api_params:
-                     # 执行自动化操作
-                     success = run_single_automation(args, base_config, api_params, round_number)
-                     
-                     # 删除已处理的API数据（无论成功失败都删除，避免重复处理）
-                     item_id = api_params.get('id')
-                     if item_id:
-                         delete_success = delete_api_data(item_id)
-                         if not delete_success:
-                             print(f"⚠️ 删除API数据失败，可能导致重复处理")
-                     else:
-                         print(f"⚠️ API数据缺少ID字段，无法删除")
-                     
-                     if success:
-                         print(f"✅ 第 {round_number} 轮操作成功完成")
-                     else:
-                         print(f"⚠️ 第 {round_number} 轮操作失败，但继续监控")
-                     
-                     round_number += 1
-                     
-                     # 根据是否启用快速模式决定处理策略
-                     if args.api_fast:
-                         # 快速模式：立即检查是否还有更多数据
-                         print(f"\n🔍 快速模式：检查是否还有更多待处理数据...")
-                         try:
-                             quick_response = requests.get(f"{API_BASE_URL}/voice/list/", timeout=5)
-                             if quick_response.status_code == 200:
-                                 quick_data = quick_response.json()
-                                 if quick_data.get('status') == 'success':
-                                     remaining_items = quick_data.get('items', [])
-                                     if remaining_items:
-                                         print(f"🚀 发现 {len(remaining_items)} 条待处理数据，立即开始下一轮...")
-                                         continue  # 立即开始下一轮，不等待
-                                     else:
-                                         print(f"✨ 暂无更多数据，等待 {args.api_interval} 秒后继续监控...")
-                                 else:
-                                     print(f"⚠️ 快速检查API状态异常，等待 {args.api_interval} 秒后继续...")
-                             else:
-                                 print(f"⚠️ 快速检查API失败，等待 {args.api_interval} 秒后继续...")
-                         except:
-                             print(f"⚠️ 快速检查API异常，等待 {args.api_interval} 秒后继续...")
-                         
-                         # 如果没有更多数据，等待指定时间
-                         time.sleep(args.api_interval)
-                     else:
-                         # 普通模式：固定等待时间
-                         print(f"\n⏱️ 等待 {args.api_interval} 秒后继续监控...")
-                         time.sleep(args.api_interval)
+                print(f"上传响应状态码: {response.status_code}")
+                
+                if response.status_code == 200:
+                    result = response.json()
+                    print(f"上传响应: {json.dumps(result, ensure_ascii=False, indent=2)}")
+                    print("✅ 文件上传成功！")
+                    record_upload_metrics(file_size, time.monotonic() - upload_start)
+                    return True
                 else:
-                    print(f"❌ 第 {round_number} 轮获取API数据失败，等待 {args.api_interval} 秒后重试...")
-                    time.sleep(args.api_interval)
+                    print(f"❌ 文件上传失败，状态码: {response.status_code}")
+                    try:
+                        error_info = response.json()
+                        print(f"错误信息: {json.dumps(error_info, ensure_ascii=False, indent=2)}")
+                    except:
+                        print(f"错误信息: {response.text}")
                     
-        except KeyboardInterrupt:
-            print(f"\n\n🛑 检测到 Ctrl+C，程序停止")
-            print(f"📊 总共完成了 {round_number - 1} 轮自动化操作")
-            
-            # 记录程序结束时间戳
-            record_timestamp("程序结束")
-            print_timing_summary()
-            
+                    # 如果是最后一次尝试，返回失败
+                    if attempt == retry_count:
+                        return False
+                    else:
+                        print(f"将在 {retry_delay} 秒后重试...")
+                        continue
+                        
+        except requests.exceptions.ChunkedEncodingError as e:
+            print(f"❌ 分块编码错误（第{attempt + 1}次尝试）: {e}")
+            if attempt == retry_count:
+                print("❌ 所有重试都失败，可能是网络连接不稳定")
+                return False
+            else:
+                print(f"将在 {retry_delay} 秒后重试...")
+                continue
+                
+        except requests.exceptions.ConnectionError as e:
+            print(f"❌ 连接错误（第{attempt + 1}次尝试）: {e}")
+            if attempt == retry_count:
+                print("❌ 无法连接到服务器")
+                return False
+            else:
+                print(f"将在 {retry_delay} 秒后重试...")
+                continue
+                
+        except requests.exceptions.Timeout as e:
+            print(f"❌ 上传超时（第{attempt + 1}次尝试）: {e}")
+            if attempt == retry_count:
+                print("❌ 文件上传超时")
+                return False
+            else:
+                print(f"将在 {retry_delay} 秒后重试...")
+                continue
+                
         except Exception as e:
-            print(f"\n❌ API循环模式异常: {e}")
-            
-            # 记录程序结束时间戳
-            record_timestamp("程序结束")
-            print_timing_summary()
-    
-    else:
-        # 单次执行模式（原有逻辑）
-        # 如果指定了API参数，从接口获取参数
-        api_params = None
-        if args.api:
-            api_params = fetch_params_from_api(max_wait_time=args.api_wait, check_interval=args.api_interval)
-            if not api_params:
-                print("⚠️ 从API获取参数失败，将使用其他参数源")
-        
-        # 加载配置文件
-        config = load_config(filename=args.filename, output_filename=args.output, content=args.content, api_params=api_params)
-        if not config:
-            print("\n" + "="*60)
-            print("程序启动失败！")
-            print("="*60)
-            print("可能的原因：")
-            print("1. paths.txt文件不存在")
-            print("2. paths.txt中缺少必要的路径配置")
-            print("3. config.json文件格式错误")
-            print("\n解决方案：")
-            print("1. 确保paths.txt文件存在")
-            print("2. 检查paths.txt是否包含以下必要配置：")
-            print("   - text_file_1")
-            print("   - text_file_2") 
-            print("   - audio_file_1")
-            print("   - temp_directory")
-            print("3. 参考paths_linux.txt文件中的示例格式")
-            print("="*60)
-            return
-        
-        # 记录配置加载完成时间戳
-        record_timestamp("配置加载完成")
-        
-        # 显示配置信息
-        text_files = config.get("text_files", [])
-        audio_files = config.get("audio_files", [])
-        temp_directory = config.get("temp_directory", "")
-        monitoring_config = config.get("monitoring", {})
-        browser_config = config.get("browser", {})
-        
-        print("\n配置信息:")
-        print(f"目标URL: {config.get('url', 'http://127.0.0.1:50004/')}")
-        print(f"临时目录: {temp_directory}")
-        print(f"浏览器模式: {'无界面模式' if browser_config.get('headless', False) else '有界面模式'}")
-        print(f"窗口大小: {browser_config.get('window_size', '1920,1080')}")
-        print(f"ChromeDriver路径: {browser_config.get('driver_path', '未指定')}")
-        print(f"监控功能: {'启用' if monitoring_config.get('enabled', True) else '禁用'}")
-        if monitoring_config.get('enabled', True):
-            print(f"扫描间隔: 2秒")
-            print(f"无更新超时: {monitoring_config.get('no_update_timeout', 60)}秒")
-            print(f"最大等待: {monitoring_config.get('max_wait_time', 600)}秒")
-        
-        output_config = config.get("output", {})
-        print(f"输出目录: {output_config.get('directory', 'data')}")
-        print(f"输出文件名: {output_config.get('filename', 'output_audio.wav')}")
-        
-        print(f"文本文件数量: {len(text_files)}")
-        for i, text_file in enumerate(text_files, 1):
-            if "file_path" in text_file:
-                print(f"  文本文件{i}: {text_file['file_path']} -> 第{text_file['textarea_index']+1}个textarea")
-            elif "content" in text_file:
-                content_preview = text_file['content'][:50] + "..." if len(text_file['content']) > 50 else text_file['content']
-                print(f"  文本内容{i}: {repr(content_preview)} -> 第{text_file['textarea_index']+1}个textarea")
+            print(f"❌ 上传异常（第{attempt + 1}次尝试）: {e}")
+            if attempt == retry_count:
+                print("❌ 文件上传失败")
+                return False
             else:
-                print(f"  文本配置{i}: {text_file.get('description', '未知')} -> 第{text_file['textarea_index']+1}个textarea")
+                print(f"将在 {retry_delay} 秒后重试...")
+                continue
+    
+    return False
+
+# inotify事件掩码（参见 linux/inotify.h）
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+
+# 判断输出文件夹是否属于本次任务时，允许文件系统时间戳存在的误差（秒）
+MTIME_TOLERANCE = 2
+
+class InotifyWatcher:
+    """
+    基于ctypes的最小inotify封装（仅Linux可用），用于在文件写入关闭时立即唤醒监控循环
+    """
+    
+    def __init__(self):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._libc.inotify_init1.argtypes = [ctypes.c_int]
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
         
-        print(f"音频文件数量: {len(audio_files)}")
-        for i, audio_file in enumerate(audio_files, 1):
-            print(f"  音频文件{i}: {audio_file['file_path']} -> {audio_file['upload_selector']}")
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_init1失败: {os.strerror(errno)}")
         
-        # 清空临时目录
-        if temp_directory:
-            print(f"\n{'='*50}")
-            print("步骤1: 清空临时目录")
-            print(f"{'='*50}")
-            if not clear_temp_directory(temp_directory):
-                print("⚠️ 临时目录清空失败，但继续执行后续操作")
-            print(f"{'='*50}")
-            
-            # 记录临时目录清空完成时间戳
-            record_timestamp("临时目录清空完成")
+        # wd -> 被监控的目录路径
+        self.watches = {}
+    
+    def add_watch(self, path, mask):
+        """
+        添加目录监控，同一目录重复添加时内核会返回相同的wd
         
-        print("\n开始执行自动化操作...\n")
+        Args:
+            path: 要监控的目录
+            mask: inotify事件掩码
+        """
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_add_watch失败: {os.strerror(errno)}", path)
+        self.watches[wd] = path
+    
+    def read_events(self, timeout):
+        """
+        等待并读取inotify事件
+        
+        Args:
+            timeout: 最长等待时间（秒）
+        
+        Returns:
+            list: (目录路径, 事件掩码, 文件名) 元组列表，超时返回空列表
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
         
         try:
-            # 执行自动化操作
-            success = input_multiple_files_to_textareas(args, config)
-            
-            # 如果使用了API且操作成功，删除已处理的API数据
-            if args.api and api_params and success:
-                item_id = api_params.get('id')
-                if item_id:
-                    delete_success = delete_api_data(item_id)
-                    if not delete_success:
-                        print(f"⚠️ 删除API数据失败")
-                else:
-                    print(f"⚠️ API数据缺少ID字段，无法删除")
-            
-            # 记录程序结束时间戳
-            record_timestamp("程序结束")
-            
-            # 打印时间统计摘要
-            print_timing_summary()
-            
-            if success:
-                print("所有自动化操作完成！")
-            else:
-                print("部分或全部自动化操作失败！")
-        except Exception as e:
-            # 记录程序异常结束时间戳
-            record_timestamp("程序结束")
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return []
+        
+        events = []
+        offset = 0
+        # struct inotify_event { int wd; uint32_t mask; uint32_t cookie; uint32_t len; char name[]; }
+        while offset + 16 <= len(data):
+            wd, mask, _cookie, length = struct.unpack_from("iIII", data, offset)
+            name = data[offset + 16:offset + 16 + length].rstrip(b"\0")
+            offset += 16 + length
+            events.append((self.watches.get(wd, ""), mask, os.fsdecode(name)))
+        return events
+    
+    def close(self):
+        """关闭inotify文件描述符"""
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+def create_inotify_watcher(temp_dir, mask=IN_CREATE | IN_MOVED_TO | IN_ISDIR):
+    """
+    创建监控临时目录的inotify实例，非Linux系统或创建失败时返回None（调用方改用快速轮询）
+    
+    Args:
+        temp_dir: 临时目录路径
+        mask: 临时目录本身的监控事件掩码
+    
+    Returns:
+        InotifyWatcher实例或None
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    
+    try:
+        watcher = InotifyWatcher()
+        watcher.add_watch(temp_dir, mask)
+        return watcher
+    except Exception as e:
+        print(f"⚠️ inotify不可用，改用快速轮询: {e}")
+        return None
+
+def is_valid_wav_file(file_path):
+    """
+    检查WAV文件头是否完整：RIFF/WAVE标识正确、RIFF长度与文件大小一致、data块未越界
+    
+    写入过程中的WAV文件通常RIFF长度尚未回填，因此该检查可以判断文件是否已经写完
+    
+    Args:
+        file_path: WAV文件路径
+    
+    Returns:
+        bool: 文件头是否有效
+    """
+    try:
+        file_size = os.path.getsize(file_path)
+        if file_size < 44:
+            return False
+        
+        with open(file_path, 'rb') as f:
+            header = f.read(12)
+            if header[0:4] != b'RIFF' or header[8:12] != b'WAVE':
+                return False
             
-            # 打印时间统计摘要
-            print_timing_summary()
+            riff_size = struct.unpack('<I', header[4:8])[0]
+            if riff_size + 8 != file_size:
+                return False
             
-            print(f"程序执行过程中发生异常: {e}")
-            print("部分或全部自动化操作失败！")
+            # 逐个遍历chunk，直到找到data块
+            position = 12
+            while position + 8 <= file_size:
+                f.seek(position)
+                chunk_id, chunk_size = struct.unpack('<4sI', f.read(8))
+                if chunk_id == b'data':
+                    return position + 8 + chunk_size <= file_size
+                position += 8 + chunk_size + (chunk_size & 1)
+        
+        return False
+    except Exception:
+        return False
 
-def load_config(config_file="config_win.json", filename=None, output_filename=None, content=None, api_params=None):
+def is_file_stable(file_path, stability_state, settle_time):
     """
-    从config.json文件加载配置，并使用paths.txt中的路径
+    检查文件大小和修改时间是否已稳定（连续 settle_time 秒没有变化）
     
     Args:
-        config_file: 配置文件路径
-        filename: 可选的文件名（不含扩展名），用于替换text_file_2和audio_file_1的文件名
-        output_filename: 可选的输出文件名（不含扩展名），用于指定最后拷贝的文件名
-        content: 可选的文本内容，直接用于第一个textarea，优先级高于text_file_1
-        api_params: 从API获取的参数字典，优先级最高
+        file_path: 文件路径
+        stability_state: 调用方持有的状态字典，记录每个文件上次观察到的(大小, 修改时间)及开始稳定的时间
+        settle_time: 判定稳定所需的时间（秒）
     
     Returns:
-        配置字典
+        bool: 文件是否已稳定
     """
     try:
-        if not os.path.exists(config_file):
-            print(f"配置文件不存在: {config_file}")
-            print("创建默认配置文件...")
-            create_default_config(config_file)
+        stat_info = os.stat(file_path)
+    except OSError:
+        stability_state.pop(file_path, None)
+        return False
+    
+    signature = (stat_info.st_size, stat_info.st_mtime_ns)
+    now = time.monotonic()
+    previous = stability_state.get(file_path)
+    
+    if not previous or previous[0] != signature:
+        stability_state[file_path] = (signature, now)
+        return stat_info.st_size > 0 and settle_time <= 0
+    
+    return stat_info.st_size > 0 and now - previous[1] >= settle_time
+
+class TempDirIndex:
+    """
+    临时目录的内存索引：记录每个输出文件夹的修改时间和其中的输出音频
+    
+    Linux下由inotify事件增量更新，其他系统用 os.scandir 对比文件夹名的增减，
+    只对新出现的或尚未生成音频的文件夹调用stat；“最新的输出音频”随更新一起维护，查询时无需扫描
+    """
+    
+    def __init__(self, temp_dir, audio_filename="audio.wav"):
+        self.temp_dir = temp_dir
+        self.audio_filename = audio_filename
+        # 文件夹名 -> {"mtime": 修改时间, "audio": 输出音频路径或None}
+        self.folders = {}
+        # 已收到写入关闭事件的文件
+        self.closed_files = set()
+        # 含输出音频的最新文件夹 (修改时间, 文件夹名)
+        self.newest = None
+        self.lock = threading.RLock()
         
-        with open(config_file, 'r', encoding='utf-8') as f:
-            config = json.load(f)
+        os.makedirs(temp_dir, exist_ok=True)
+        self.watcher = create_inotify_watcher(temp_dir, IN_CREATE | IN_MOVED_TO | IN_DELETE | IN_MOVED_FROM)
+        self.rescan()
+    
+    def _update_newest(self, name):
+        folder = self.folders.get(name)
+        if folder and folder["audio"] and (self.newest is None or folder["mtime"] >= self.newest[0]):
+            self.newest = (folder["mtime"], name)
+    
+    def _refresh_folder(self, name):
+        folder_path = os.path.join(self.temp_dir, name)
+        try:
+            folder_mtime = os.stat(folder_path).st_mtime
+        except OSError:
+            self._remove_folder(name)
+            return
         
-        print(f"✓ 成功加载配置文件: {config_file}")
+        folder = self.folders.setdefault(name, {"mtime": folder_mtime, "audio": None})
+        folder["mtime"] = folder_mtime
+        audio_path = os.path.join(folder_path, self.audio_filename)
+        if not folder["audio"] and os.path.exists(audio_path):
+            folder["audio"] = audio_path
+        self._update_newest(name)
+    
+    def _add_folder(self, name):
+        if self.watcher:
+            try:
+                self.watcher.add_watch(os.path.join(self.temp_dir, name), IN_CREATE | IN_CLOSE_WRITE | IN_MOVED_TO)
+            except OSError:
+                pass
+        # 文件夹可能在开始监控之前就已写入了音频，这里补充检查一次
+        self._refresh_folder(name)
+    
+    def _remove_folder(self, name):
+        folder = self.folders.pop(name, None)
+        if folder and folder["audio"]:
+            self.closed_files.discard(folder["audio"])
+        if self.newest and self.newest[1] == name:
+            # 最新文件夹被删除时才需要重新计算
+            candidates = [(info["mtime"], folder_name) for folder_name, info in self.folders.items() if info["audio"]]
+            self.newest = max(candidates) if candidates else None
+    
+    def rescan(self):
+        """
+        用 os.scandir 对比文件夹名的增减来更新索引（不使用inotify时的更新方式，以及事件队列溢出后的恢复）
+        """
+        with self.lock:
+            try:
+                with os.scandir(self.temp_dir) as entries:
+                    names = {entry.name for entry in entries if entry.is_dir()}
+            except FileNotFoundError:
+                names = set()
+            
+            for name in set(self.folders) - names:
+                self._remove_folder(name)
+            for name in names:
+                if name not in self.folders:
+                    self._add_folder(name)
+                elif not self.folders[name]["audio"]:
+                    self._refresh_folder(name)
+    
+    def update(self, timeout=0):
+        """
+        等待最多 timeout 秒并应用期间的变化
         
-        # 加载路径配置
-        paths = load_paths_from_file()
+        Args:
+            timeout: 最长等待时间（秒）
+        """
+        if not self.watcher:
+            if timeout > 0:
+                time.sleep(timeout)
+            self.rescan()
+            return
         
-        # 验证必要的路径配置
-        required_paths = ["text_file_1", "text_file_2", "audio_file_1", "temp_directory"]
-        missing_paths = []
+        with self.lock:
+            events = self.watcher.read_events(timeout)
+            for folder, mask, name in events:
+                if mask & IN_Q_OVERFLOW:
+                    self.rescan()
+                    continue
+                
+                if folder == self.temp_dir:
+                    if not mask & IN_ISDIR:
+                        continue
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        self._add_folder(name)
+                    elif mask & (IN_DELETE | IN_MOVED_FROM):
+                        self._remove_folder(name)
+                    continue
+                
+                # 输出文件夹内的事件
+                if name != self.audio_filename:
+                    continue
+                folder_name = os.path.basename(folder)
+                if mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                    self.closed_files.add(os.path.join(folder, name))
+                if folder_name in self.folders:
+                    self._refresh_folder(folder_name)
+    
+    def newest_audio_since(self, since_time):
+        """
+        返回指定时间之后生成的最新输出音频
         
-        for path_key in required_paths:
-            if path_key not in paths or not paths[path_key].strip():
-                missing_paths.append(path_key)
+        Args:
+            since_time: 任务开始时间（time.time()）
         
-        if missing_paths:
-            print(f"\n✗ 错误：paths.txt中缺少以下必要路径配置：")
-            for path_key in missing_paths:
-                print(f"  - {path_key}")
-            print(f"\n请检查paths.txt文件，确保包含所有必要的路径配置。")
-            print(f"参考paths_linux.txt文件中的示例格式。")
+        Returns:
+            str: 音频文件路径，没有时返回None
+        """
+        with self.lock:
+            if self.newest and self.newest[0] >= since_time - MTIME_TOLERANCE:
+                return self.folders[self.newest[1]]["audio"]
+        return None
+    
+    def latest_folder(self):
+        """
+        返回修改时间最新的文件夹（不要求包含音频）
+        
+        Returns:
+            tuple: (文件夹名, 修改时间)，索引为空时返回None
+        """
+        with self.lock:
+            if not self.folders:
+                return None
+            name = max(self.folders, key=lambda folder_name: self.folders[folder_name]["mtime"])
+            return name, self.folders[name]["mtime"]
+    
+    def is_closed(self, file_path):
+        """文件是否已收到写入关闭事件"""
+        with self.lock:
+            return file_path in self.closed_files
+    
+    def forget(self, name):
+        """
+        从索引中移除文件夹（文件夹被清理后调用）
+        
+        Args:
+            name: 文件夹名
+        """
+        with self.lock:
+            self._remove_folder(name)
+    
+    def close(self):
+        """关闭inotify监控"""
+        if self.watcher:
+            self.watcher.close()
+            self.watcher = None
+
+# 临时目录索引缓存，键为 (临时目录, 音频文件名)，跨任务复用
+temp_dir_indexes = {}
+temp_dir_indexes_lock = threading.Lock()
+
+def get_temp_dir_index(temp_dir, audio_filename="audio.wav"):
+    """
+    获取（首次调用时创建）临时目录的内存索引
+    
+    Args:
+        temp_dir: 临时目录路径
+        audio_filename: Gradio输出音频的文件名
+    
+    Returns:
+        TempDirIndex: 临时目录索引
+    """
+    key = (os.path.abspath(temp_dir), audio_filename)
+    with temp_dir_indexes_lock:
+        index = temp_dir_indexes.get(key)
+        if index is None:
+            index = TempDirIndex(key[0], audio_filename)
+            temp_dir_indexes[key] = index
+        return index
+
+def find_newest_output_audio(temp_dir, since_time, audio_filename="audio.wav"):
+    """
+    在临时目录中查找本次任务开始后生成的最新输出音频
+    
+    Args:
+        temp_dir: 临时目录路径
+        since_time: 任务开始时间（time.time()）
+        audio_filename: Gradio输出音频的文件名
+    
+    Returns:
+        str: 音频文件路径，未找到返回None
+    """
+    index = get_temp_dir_index(temp_dir, audio_filename)
+    index.update(0)
+    return index.newest_audio_since(since_time)
+
+def wait_for_completed_audio(temp_dir, config, job_start_time, max_wait_time=600):
+    """
+    事件驱动地等待本次任务的输出音频写入完成
+    
+    Linux下使用inotify在audio.wav写入关闭时立即唤醒，其他系统使用快速轮询；
+    文件需要同时满足“大小/修改时间已稳定”和“WAV文件头有效”才认为生成完成
+    
+    Args:
+        temp_dir: 临时目录路径
+        config: 配置字典
+        job_start_time: 任务开始时间（time.time()），早于该时间的文件夹会被忽略
+        max_wait_time: 最大等待时间（秒）
+    
+    Returns:
+        str: 已完成的音频文件路径，超时返回None
+    """
+    monitoring_config = config.get("monitoring", {})
+    poll_interval = monitoring_config.get("poll_interval", 0.2)
+    settle_time = monitoring_config.get("settle_time", 0.5)
+    audio_filename = monitoring_config.get("audio_filename", "audio.wav")
+    
+    index = get_temp_dir_index(temp_dir, audio_filename)
+    
+    print(f"完成检测方式: {'inotify事件' if index.watcher else '快速轮询'}")
+    print(f"轮询间隔: {poll_interval}秒，稳定判定时间: {settle_time}秒")
+    
+    start_time = time.time()
+    last_report_time = start_time
+    stability_state = {}
+    
+    while True:
+        elapsed_time = time.time() - start_time
+        
+        # 检查是否超过最大等待时间
+        if elapsed_time > max_wait_time:
+            print(f"✗ 等待音频生成超时，已等待 {elapsed_time:.1f} 秒")
             return None
         
-        # 如果路径配置存在，替换配置文件中的路径
-        if paths:
-            print("正在使用paths.txt中的路径替换配置文件路径...")
-            
-            # 替换文本文件路径
-            if "text_file_1" in paths and len(config.get("text_files", [])) > 0:
-                config["text_files"][0]["file_path"] = paths["text_file_1"]
-                print(f"  文本文件1路径: {paths['text_file_1']}")
-            
-            if "text_file_2" in paths and len(config.get("text_files", [])) > 1:
-                text_file_2_path = paths["text_file_2"]
-                
-                # 如果指定了filename参数，替换text_file_2的文件名
-                if filename:
-                    directory = os.path.dirname(text_file_2_path)
-                    original_filename = os.path.basename(text_file_2_path)
-                    extension = os.path.splitext(original_filename)[1]  # 保留原扩展名
-                    new_filename = f"{filename}{extension}"
-                    text_file_2_path = os.path.join(directory, new_filename)
-                    print(f"  使用指定文件名替换text_file_2: {filename}{extension}")
-                
-                config["text_files"][1]["file_path"] = text_file_2_path
-                print(f"  文本文件2路径: {text_file_2_path}")
-            
-            # 替换音频文件路径
-            if "audio_file_1" in paths and len(config.get("audio_files", [])) > 0:
-                audio_file_1_path = paths["audio_file_1"]
-                
-                # 如果指定了filename参数，替换audio_file_1的文件名
-                if filename:
-                    directory = os.path.dirname(audio_file_1_path)
-                    original_filename = os.path.basename(audio_file_1_path)
-                    extension = os.path.splitext(original_filename)[1]  # 保留原扩展名
-                    new_filename = f"{filename}{extension}"
-                    audio_file_1_path = os.path.join(directory, new_filename)
-                    print(f"  使用指定文件名替换audio_file_1: {filename}{extension}")
-                
-                config["audio_files"][0]["file_path"] = audio_file_1_path
-                print(f"  音频文件1路径: {audio_file_1_path}")
-            
-            # 替换临时目录路径
-            if "temp_directory" in paths:
-                config["temp_directory"] = paths["temp_directory"]
-                print(f"  临时目录路径: {paths['temp_directory']}")
+        audio_path = index.newest_audio_since(job_start_time)
+        
+        if audio_path:
+            # 已收到写入关闭事件的文件无需再等待稳定时间
+            stable = index.is_closed(audio_path) or is_file_stable(audio_path, stability_state, settle_time)
+            if stable and is_valid_wav_file(audio_path):
+                print(f"✓ 音频生成完成（耗时 {elapsed_time:.1f} 秒）: {audio_path}")
+                return audio_path
+        
+        if time.time() - last_report_time >= 5:
+            status = "等待写入完成" if audio_path else "尚未发现输出"
+            print(f"  监控中: {status} (已等待 {elapsed_time:.1f}秒)")
+            last_report_time = time.time()
+        
+        # 等待事件（或轮询间隔）并增量更新索引
+        index.update(poll_interval)
+
+def wait_for_quiet_period(temp_dir, monitor_interval=60, max_wait_time=600):
+    """
+    旧的完成判定方式：临时目录连续 monitor_interval 秒没有新项目时认为生成完成
+    
+    Args:
+        temp_dir: 临时目录路径
+        monitor_interval: 无更新超时时间（秒）
+        max_wait_time: 最大等待时间（秒）
+    
+    Returns:
+        bool: 是否在超时前判定完成
+    """
+    print(f"扫描间隔: 2秒")
+    print(f"无更新超时: {monitor_interval}秒")
+    
+    # 记录开始时间
+    start_time = time.time()
+    last_update_time = start_time  # 记录最后文件更新时间
+    
+    # 获取初始文件列表
+    initial_items = set()
+    if os.path.exists(temp_dir):
+        initial_items = set(os.listdir(temp_dir))
+    
+    print(f"初始项目数量: {len(initial_items)}")
+    if initial_items:
+        print(f"初始项目: {', '.join(initial_items)}")
+    
+    scan_count = 0
+    
+    while True:
+        current_time = time.time()
+        elapsed_time = current_time - start_time
         
-        # 如果指定了output_filename参数，替换输出文件名
-        if output_filename:
-            output_config = config.get("output", {})
-            original_filename = output_config.get("filename", "output_audio.wav")
-            extension = os.path.splitext(original_filename)[1]  # 保留原扩展名
-            new_output_filename = f"{output_filename}{extension}"
-            config["output"]["filename"] = new_output_filename
-            print(f"  使用指定输出文件名: {new_output_filename}")
+        # 检查是否超过最大等待时间
+        if elapsed_time > max_wait_time:
+            print(f"✗ 监控超时，已等待 {elapsed_time:.1f} 秒")
+            return False
         
-        # 如果指定了API参数，优先使用API参数（优先级最高）
-        if api_params:
-            print("正在使用API参数配置...")
-            
-            # 使用API的voice参数替换文件名
-            api_voice = api_params.get('voice', '')
-            if api_voice:
-                print(f"  使用API的voice参数作为文件名: {api_voice}")
-                
-                # 替换文本文件2的文件名
-                if "text_file_2" in paths and len(config.get("text_files", [])) > 1:
-                    text_file_2_path = paths["text_file_2"]
-                    directory = os.path.dirname(text_file_2_path)
-                    original_filename = os.path.basename(text_file_2_path)
-                    extension = os.path.splitext(original_filename)[1]  # 保留原扩展名
-                    new_filename = f"{api_voice}{extension}"
-                    text_file_2_path = os.path.join(directory, new_filename)
-                    config["text_files"][1]["file_path"] = text_file_2_path
-                    print(f"  使用API voice参数替换text_file_2: {new_filename}")
-                    print(f"  文本文件2新路径: {text_file_2_path}")
-                
-                # 替换音频文件1的文件名
-                if "audio_file_1" in paths and len(config.get("audio_files", [])) > 0:
-                    audio_file_1_path = paths["audio_file_1"]
-                    directory = os.path.dirname(audio_file_1_path)
-                    original_filename = os.path.basename(audio_file_1_path)
-                    extension = os.path.splitext(original_filename)[1]  # 保留原扩展名
-                    new_filename = f"{api_voice}{extension}"
-                    audio_file_1_path = os.path.join(directory, new_filename)
-                    config["audio_files"][0]["file_path"] = audio_file_1_path
-                    print(f"  使用API voice参数替换audio_file_1: {new_filename}")
-                    print(f"  音频文件1新路径: {audio_file_1_path}")
-            
-            # 使用API的content参数
-            api_content = api_params.get('content', '')
-            if api_content:
-                # 确保config中有text_files配置
-                if "text_files" not in config:
-                    config["text_files"] = []
-                
-                # 添加或替换第一个textarea的内容（textarea_index=0，对应content文件）
-                api_content_config = {
-                    "content": api_content,
-                    "textarea_index": 0,
-                    "description": "API接口获取的文本内容"
-                }
-                
-                # 查找是否已有textarea_index=0的配置
-                found_index = -1
-                for i, text_file in enumerate(config["text_files"]):
-                    if text_file.get("textarea_index") == 0:
-                        found_index = i
-                        break
-                
-                if found_index >= 0:
-                    # 替换现有配置
-                    config["text_files"][found_index] = api_content_config
-                    print(f"  使用API内容替换第一个textarea配置（content文件）")
-                else:
-                    # 添加新配置
-                    config["text_files"].append(api_content_config)
-                    print(f"  添加API内容到第一个textarea（content文件）")
-                
-                print(f"  API文本内容长度: {len(api_content)} 字符")
-                # 显示内容预览
-                preview = api_content[:100] + "..." if len(api_content) > 100 else api_content
-                print(f"  API文本内容预览: {repr(preview)}")
-            
-            # 使用API的outfile参数作为输出文件名
-            api_outfile = api_params.get('outfile', '')
-            if api_outfile and not output_filename:  # 只有在没有手动指定输出文件名时才使用API的
-                # 从outfile路径中提取文件名（不含扩展名）
-                api_filename = os.path.splitext(os.path.basename(api_outfile))[0]
-                if api_filename:
-                    output_config = config.get("output", {})
-                    original_filename = output_config.get("filename", "output_audio.wav")
-                    extension = os.path.splitext(original_filename)[1]  # 保留原扩展名
-                    new_output_filename = f"{api_filename}{extension}"
-                    config["output"]["filename"] = new_output_filename
-                    print(f"  使用API输出文件名: {new_output_filename}")
+        # 检查当前文件列表
+        current_items = set()
+        if os.path.exists(temp_dir):
+            current_items = set(os.listdir(temp_dir))
         
-        # 如果指定了content参数，替换第一个textarea的内容（content文件）
-        elif content:
-            # 确保config中有text_files配置
-            if "text_files" not in config:
-                config["text_files"] = []
-            
-            # 添加或替换第一个textarea的内容（textarea_index=0，对应content文件）
-            content_config = {
-                "content": content,
-                "textarea_index": 0,
-                "description": "命令行指定的文本内容（替换content文件）"
-            }
-            
-            # 查找是否已有textarea_index=0的配置
-            found_index = -1
-            for i, text_file in enumerate(config["text_files"]):
-                if text_file.get("textarea_index") == 0:
-                    found_index = i
-                    break
-            
-            if found_index >= 0:
-                # 替换现有配置
-                config["text_files"][found_index] = content_config
-                print(f"  使用命令行指定的文本内容替换第一个textarea配置（content文件）")
-            else:
-                # 添加新配置
-                config["text_files"].append(content_config)
-                print(f"  添加命令行指定的文本内容到第一个textarea（content文件）")
-            
-            print(f"  文本内容长度: {len(content)} 字符")
-            # 显示内容预览
-            preview = content[:100] + "..." if len(content) > 100 else content
-            print(f"  文本内容预览: {repr(preview)}")
+        # 找出新项目
+        new_items = current_items - initial_items
         
-        return config
+        scan_count += 1
         
-    except json.JSONDecodeError as e:
-        print(f"✗ 配置文件格式错误: {e}")
-        print("请检查config.json文件格式")
-        return None
-    except Exception as e:
-        print(f"✗ 读取配置文件失败: {e}")
-        return None
+        if new_items:
+            print(f"第{scan_count}次扫描: ✓ 发现 {len(new_items)} 个新项目: {', '.join(new_items)}")
+            last_update_time = current_time  # 更新最后文件更新时间
+            initial_items = current_items  # 更新初始项目列表
+        else:
+            # 计算距离上次文件更新的时间
+            time_since_last_update = current_time - last_update_time
+            print(f"第{scan_count}次扫描: 未发现新项目 (距离上次更新: {time_since_last_update:.1f}秒)")
+            
+            # 如果超过指定时间没有文件更新，则认为文件生成完成
+            if time_since_last_update >= monitor_interval:
+                print(f"✓ 已连续 {monitor_interval} 秒无文件更新，认为文件生成完成")
+                break
+        
+        # 等待2秒后进行下次扫描
+        time.sleep(2)
+    
+    return True
 
-def create_default_config(config_file="config.json"):
+def find_latest_audio_in_temp(temp_dir):
     """
-    创建默认配置文件
+    查找临时目录中时间戳最新的文件夹里的音频文件
     
     Args:
-        config_file: 配置文件路径
+        temp_dir: 临时目录路径
+    
+    Returns:
+        str: 音频文件路径，未找到返回None
     """
-    default_config = {
-        "text_files": [
-            {
-                "file_path": "",
-                "textarea_index": 0,
-                "description": "第一个textarea"
-            },
-            {
-                "file_path": "",
-                "textarea_index": 2,
-                "description": "第三个textarea"
-            }
-        ],
-        "audio_files": [
-            {
-                "file_path": "",
-                "upload_selector": ".svelte-b0hvie",
-                "description": "qinghuanv音频文件"
-            }
-        ],
-        "selectors": {
-            "textarea": "textarea.scroll-hide.svelte-1f354aw",
-            "button": "button.lg.secondary.svelte-cmf5ev"
-        },
-        "url": "http://127.0.0.1:50004/",
-        "temp_directory": "",
-        "browser": {
-            "headless": False,
-            "window_size": "1920,1080",
-            "driver_path": ""  # ChromeDriver路径配置
-        },
-        "output": {
-            "directory": "data",
-            "filename": "output_audio.wav",
-            "wait_before_close": 5,
-            "auto_close": True
-        },
-        "monitoring": {
-            "enabled": True,
-            "no_update_timeout": 60,
-            "max_wait_time": 600
-        },
-        "timeouts": {
-            "page_load": 3,
-            "element_wait": 10,
-            "button_interval": 2,
-            "observe_time": 15
-        },
-        "buttons": {
-            "click_first_button": False,
-            "click_second_button": True
-        },
-        "upload": {
-            "enabled": True,
-            "server_url": "http://39.105.213.3",
-            "folder_id": 4,
-            "timeout": 60,
-            "delete_after_upload": True,
-            "retry_count": 3,
-            "retry_delay": 2
+    try:
+        print(f"\n开始查找时间戳最新的文件夹...")
+        
+        # 从临时目录索引中获取最新文件夹（无需对每个文件夹调用stat）
+        if not os.path.exists(temp_dir):
+            print("✗ 临时目录中没有找到文件夹")
+            return None
+        index = get_temp_dir_index(temp_dir)
+        index.update(0)
+        latest = index.latest_folder()
+        
+        if not latest:
+            print("✗ 临时目录中没有找到文件夹")
+            return None
+        
+        latest_folder = {
+            'name': latest[0],
+            'path': os.path.join(temp_dir, latest[0]),
+            'mtime': latest[1]
         }
-    }
+        
+        print(f"最新文件夹: {latest_folder['name']}")
+        print(f"文件夹路径: {latest_folder['path']}")
+        print(f"修改时间: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(latest_folder['mtime']))}")
+        
+        # 查找文件夹中的audio.wav文件
+        audio_wav_path = os.path.join(latest_folder['path'], 'audio.wav')
+        
+        if not os.path.exists(audio_wav_path):
+            print(f"✗ 在文件夹 {latest_folder['name']} 中没有找到 audio.wav 文件")
+            
+            # 列出文件夹中的所有文件
+            folder_files = os.listdir(latest_folder['path'])
+            if folder_files:
+                print(f"文件夹中的文件: {', '.join(folder_files)}")
+                
+                # 查找任何.wav文件
+                wav_files = [f for f in folder_files if f.lower().endswith('.wav')]
+                if wav_files:
+                    print(f"找到 {len(wav_files)} 个.wav文件: {', '.join(wav_files)}")
+                    # 使用第一个.wav文件
+                    audio_wav_path = os.path.join(latest_folder['path'], wav_files[0])
+                    print(f"使用文件: {wav_files[0]}")
+                else:
+                    print("✗ 文件夹中没有找到任何.wav文件")
+                    return None
+            else:
+                print("✗ 文件夹是空的")
+                return None
+        else:
+            print(f"✓ 找到 audio.wav 文件: {audio_wav_path}")
+        
+        return audio_wav_path
     
-    try:
-        with open(config_file, 'w', encoding='utf-8') as f:
-            json.dump(default_config, f, indent=4, ensure_ascii=False)
-        print(f"✓ 已创建默认配置文件: {config_file}")
-        print("请创建paths.txt文件并配置必要的文件路径")
-        print("参考paths_linux.txt文件中的示例格式")
     except Exception as e:
-        print(f"✗ 创建配置文件失败: {e}")
+        print(f"✗ 查找音频文件失败: {e}")
+        return None
 
-def clear_temp_directory(temp_dir):
+def resolve_output_path(config):
     """
-    清空指定的临时目录
+    根据配置确定输出文件的保存路径，目标文件已存在时追加时间戳
     
     Args:
-        temp_dir: 要清空的目录路径
+        config: 配置字典
     
     Returns:
-        bool: 是否成功清空
+        str: 输出文件路径
     """
-    try:
-        if not os.path.exists(temp_dir):
-            print(f"临时目录不存在: {temp_dir}")
-            print("创建临时目录...")
-            os.makedirs(temp_dir, exist_ok=True)
-            print(f"✓ 已创建临时目录: {temp_dir}")
-            return True
-        
-        print(f"正在清空临时目录: {temp_dir}")
+    # 从配置文件读取输出设置
+    output_config = config.get("output", {})
+    output_dir = output_config.get("directory", "data")
+    output_filename = output_config.get("filename", "output_audio.wav")
+    
+    # 创建输出目录
+    current_dir = os.getcwd()
+    output_path = os.path.join(current_dir, output_dir)
+    
+    if not os.path.exists(output_path):
+        print(f"创建输出目录: {output_path}")
+        os.makedirs(output_path, exist_ok=True)
+    
+    dest_path = os.path.join(output_path, output_filename)
+    
+    # 如果目标文件已存在，添加时间戳
+    if os.path.exists(dest_path):
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
+        name, ext = os.path.splitext(output_filename)
+        new_name = f"{name}_{timestamp}{ext}"
+        dest_path = os.path.join(output_path, new_name)
+        print(f"目标文件已存在，重命名为: {new_name}")
+    
+    return dest_path
+
+def upload_output_file(dest_path, config, upload_name=None):
+    """
+    按配置将输出文件上传到服务器，并在上传成功后按需删除本地文件
+    
+    启用 upload.background 时只将文件加入后台上传队列并立即返回，合成流程不等待上传完成
+    
+    Args:
+        dest_path: 输出文件路径
+        config: 配置字典
+        upload_name: 上传到服务器的文件名（直接从临时目录上传时使用），默认使用本地文件名
+    """
+    output_filename = upload_name or os.path.basename(dest_path)
+    
+    # 上传文件到服务器
+    upload_config = config.get("upload", {})
+    upload_enabled = upload_config.get("enabled", True)  # 默认启用上传
+    
+    if upload_enabled:
+        # 生成文件描述
+        file_description = f"Generated audio file: {output_filename}"
         
-        # 获取目录中的文件和文件夹
-        items = os.listdir(temp_dir)
-        if not items:
-            print("✓ 临时目录已经是空的")
-            return True
+        if upload_config.get("background", {}).get("enabled", False):
+            enqueue_upload(dest_path, file_description, upload_config)
+            return
         
-        # 统计要删除的项目数量
-        file_count = 0
-        dir_count = 0
+        print(f"\n{'='*50}")
+        print("开始上传文件到服务器")
+        print(f"{'='*50}")
         
-        for item in items:
-            item_path = os.path.join(temp_dir, item)
-            if os.path.isfile(item_path):
-                file_count += 1
-            elif os.path.isdir(item_path):
-                dir_count += 1
+        # 按配置压缩后上传压缩文件
+        if not upload_name:
+            dest_path = prepare_upload_artifact(dest_path, upload_config)
+            file_description = f"Generated audio file: {os.path.basename(dest_path)}"
         
-        print(f"发现 {file_count} 个文件和 {dir_count} 个文件夹")
+        # 上传文件
+        upload_success = upload_file_to_server(dest_path, file_description, config, upload_name)
+        finish_uploaded_file(dest_path, upload_config, upload_success)
         
-        # 删除所有内容
-        for item in items:
-            item_path = os.path.join(temp_dir, item)
-            try:
-                if os.path.isfile(item_path):
-                    os.remove(item_path)
-                    print(f"  删除文件: {item}")
-                elif os.path.isdir(item_path):
-                    shutil.rmtree(item_path)
-                    print(f"  删除文件夹: {item}")
-            except Exception as e:
-                print(f"  删除失败 {item}: {e}")
+        print(f"{'='*50}")
+    else:
+        print("⚠️ 文件上传功能已禁用（配置文件设置）")
+
+# 支持的压缩格式：扩展名、ffmpeg编码参数、是否有损（有损格式使用 bitrate 配置）
+AUDIO_ENCODE_FORMATS = {
+    "flac": (".flac", ["-c:a", "flac", "-compression_level", "5"], False),
+    "opus": (".opus", ["-c:a", "libopus"], True),
+    "mp3": (".mp3", ["-c:a", "libmp3lame"], True)
+}
+
+def encode_audio_file(wav_path, encode_config):
+    """
+    使用ffmpeg子进程将WAV压缩为FLAC/Opus/MP3
+    
+    Args:
+        wav_path: WAV文件路径
+        encode_config: 压缩配置（config["upload"]["encode"]）
+    
+    Returns:
+        str: 压缩后的文件路径，失败返回None
+    """
+    audio_format = encode_config.get("format", "flac").lower()
+    if audio_format not in AUDIO_ENCODE_FORMATS:
+        print(f"⚠️ 不支持的压缩格式: {audio_format}，可选: {', '.join(AUDIO_ENCODE_FORMATS)}")
+        return None
+    
+    ffmpeg_path = encode_config.get("ffmpeg_path") or shutil.which("ffmpeg")
+    if not ffmpeg_path:
+        print("⚠️ 未找到ffmpeg，跳过压缩")
+        return None
+    
+    extension, codec_args, lossy = AUDIO_ENCODE_FORMATS[audio_format]
+    encoded_path = os.path.splitext(wav_path)[0] + extension
+    command = [ffmpeg_path, "-y", "-loglevel", "error", "-i", wav_path] + codec_args
+    if lossy and encode_config.get("bitrate"):
+        command += ["-b:a", str(encode_config["bitrate"])]
+    command.append(encoded_path)
+    
+    try:
+        encode_start = time.time()
+        result = subprocess.run(command, capture_output=True, timeout=encode_config.get("timeout", 300))
+        if result.returncode != 0 or not os.path.exists(encoded_path) or os.path.getsize(encoded_path) == 0:
+            print(f"⚠️ 音频压缩失败: {result.stderr.decode('utf-8', errors='replace').strip()}")
+            return None
         
-        # 验证清空结果
-        remaining_items = os.listdir(temp_dir)
-        if not remaining_items:
-            print(f"✓ 临时目录清空成功: {temp_dir}")
-            return True
-        else:
-            print(f"⚠️ 临时目录清空不完整，剩余 {len(remaining_items)} 个项目")
-            return False
-            
+        original_size = os.path.getsize(wav_path)
+        encoded_size = os.path.getsize(encoded_path)
+        print(f"✓ 音频已压缩为 {audio_format}: {original_size} -> {encoded_size} 字节 "
+              f"({original_size / max(encoded_size, 1):.1f}x，耗时 {time.time() - encode_start:.1f}秒)")
+        return encoded_path
     except Exception as e:
-        print(f"✗ 清空临时目录失败: {e}")
-        return False
+        print(f"⚠️ 音频压缩异常: {e}")
+        return None
 
-def upload_file_to_server(file_path, description="Generated audio file", config=None):
+def prepare_upload_artifact(dest_path, upload_config):
     """
-    将文件上传到服务器
+    上传前的压缩阶段：启用 upload.encode 时压缩WAV并返回压缩文件路径，
+    压缩失败时上传原始WAV
     
     Args:
-        file_path: 要上传的文件路径
-        description: 文件描述
-        config: 配置字典（可选）
+        dest_path: 输出文件路径
+        upload_config: 上传配置
     
     Returns:
-        bool: 是否上传成功
+        str: 实际要上传的文件路径
     """
-    # 从配置文件读取服务器配置，如果没有配置则使用默认值
-    if config:
-        upload_config = config.get("upload", {})
-        url_base = upload_config.get("server_url", "http://39.105.213.3")
-        folder_id = upload_config.get("folder_id", 4)
-        timeout = upload_config.get("timeout", 60)
-        retry_count = upload_config.get("retry_count", 3)
-        retry_delay = upload_config.get("retry_delay", 2)
+    encode_config = upload_config.get("encode", {})
+    if not encode_config.get("enabled", False) or not dest_path.lower().endswith(".wav"):
+        return dest_path
+    
+    encoded_path = encode_audio_file(dest_path, encode_config)
+    if not encoded_path:
+        print("ℹ️ 上传原始WAV文件")
+        return dest_path
+    
+    if not encode_config.get("keep_wav", False):
+        try:
+            os.remove(dest_path)
+        except Exception as e:
+            print(f"⚠️ 删除原始WAV文件失败: {e}")
+    return encoded_path
+
+def finish_uploaded_file(dest_path, upload_config, upload_success):
+    """
+    上传结束后的本地文件处理：上传成功且配置了 delete_after_upload 时删除本地文件
+    
+    Args:
+        dest_path: 输出文件路径
+        upload_config: 上传配置
+        upload_success: 是否上传成功
+    """
+    if upload_success:
+        print("✅ 文件上传到服务器成功！")
+        
+        # 检查是否需要删除本地文件
+        delete_after_upload = upload_config.get("delete_after_upload", False)
+        if delete_after_upload:
+            try:
+                print(f"正在删除本地文件: {dest_path}")
+                os.remove(dest_path)
+                print("✅ 本地文件删除成功！")
+            except Exception as e:
+                print(f"⚠️ 删除本地文件失败: {e}")
+        else:
+            print("ℹ️ 本地文件保留（配置文件设置）")
     else:
-        # 默认配置（参考upload.py）
-        url_base = 'http://39.105.213.3'
-        folder_id = 4
-        timeout = 60
-        retry_count = 3
-        retry_delay = 2
+        print("❌ 文件上传到服务器失败！")
+        print("ℹ️ 由于上传失败，保留本地文件")
+        # 即使上传失败，也不影响整体流程的成功状态
+
+# 后台上传队列状态：待上传任务（任务ID -> 任务）会持久化到状态文件，程序重启后继续上传
+upload_queue_state = {
+    "lock": threading.Lock(),
+    "queue": queue.Queue(),
+    "pending": {},
+    "threads": [],
+    "state_file": None,
+    "config": {}
+}
+
+def save_upload_queue_state():
+    """
+    将待上传任务写入状态文件（先写临时文件再替换，避免写入中断导致文件损坏）
+    """
+    state_file = upload_queue_state["state_file"]
+    if not state_file:
+        return
     
-    upload_url = url_base + '/api/upload/'
+    with upload_queue_state["lock"]:
+        jobs = list(upload_queue_state["pending"].values())
     
-    print(f"\n开始上传文件到服务器...")
-    print(f"文件路径: {file_path}")
-    print(f"服务器地址: {url_base}")
-    print(f"文件描述: {description}")
-    print(f"文件夹ID: {folder_id}")
-    print(f"重试次数: {retry_count}")
+    try:
+        temp_file = f"{state_file}.tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(jobs, f, ensure_ascii=False, indent=2)
+        os.replace(temp_file, state_file)
+    except Exception as e:
+        print(f"⚠️ 保存上传队列状态失败: {e}")
+
+def start_upload_workers(config):
+    """
+    启动后台上传线程（只启动一次），并恢复状态文件中上次未完成的上传任务
     
-    # 检查文件是否存在
-    if not os.path.exists(file_path):
-        print(f"❌ 文件不存在: {file_path}")
-        return False
+    Args:
+        config: 配置字典，读取 upload.background
+    """
+    upload_config = config.get("upload", {})
+    background_config = upload_config.get("background", {})
+    if not upload_config.get("enabled", True) or not background_config.get("enabled", False):
+        return
     
-    # 获取文件信息
-    file_size = os.path.getsize(file_path)
-    print(f"文件大小: {file_size} 字节")
+    with upload_queue_state["lock"]:
+        if upload_queue_state["threads"]:
+            return
+        upload_queue_state["config"] = background_config
+        upload_queue_state["state_file"] = background_config.get("state_file", "upload_queue.json")
     
-    # 重试上传
-    for attempt in range(retry_count + 1):
+    # 恢复上次未完成的任务
+    state_file = upload_queue_state["state_file"]
+    if os.path.exists(state_file):
         try:
-            if attempt > 0:
-                print(f"\n第 {attempt + 1} 次尝试上传...")
-                time.sleep(retry_delay)  # 重试前等待
-            else:
-                print(f"\n正在上传文件...")
-            
-            print(f"超时时间: {timeout}秒")
-            
-            # 上传文件
-            with open(file_path, 'rb') as f:
-                files = {'file': f}
-                data = {
-                    'description': description,
-                    'folder': folder_id  # 文件夹ID，从配置文件读取
-                }
-                
-                # 设置请求会话以优化连接
-                session = requests.Session()
-                session.headers.update({
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                })
-                
-                response = session.post(
-                    upload_url, 
-                    files=files, 
-                    data=data, 
-                    timeout=timeout,
-                    stream=False  # 禁用流式传输以避免ChunkedEncodingError
-                )
-                
-                print(f"上传响应状态码: {response.status_code}")
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    print(f"上传响应: {json.dumps(result, ensure_ascii=False, indent=2)}")
-                    print("✅ 文件上传成功！")
-                    return True
-                else:
-                    print(f"❌ 文件上传失败，状态码: {response.status_code}")
-                    try:
-                        error_info = response.json()
-                        print(f"错误信息: {json.dumps(error_info, ensure_ascii=False, indent=2)}")
-                    except:
-                        print(f"错误信息: {response.text}")
-                    
-                    # 如果是最后一次尝试，返回失败
-                    if attempt == retry_count:
-                        return False
-                    else:
-                        print(f"将在 {retry_delay} 秒后重试...")
-                        continue
-                        
-        except requests.exceptions.ChunkedEncodingError as e:
-            print(f"❌ 分块编码错误（第{attempt + 1}次尝试）: {e}")
-            if attempt == retry_count:
-                print("❌ 所有重试都失败，可能是网络连接不稳定")
-                return False
-            else:
-                print(f"将在 {retry_delay} 秒后重试...")
-                continue
-                
-        except requests.exceptions.ConnectionError as e:
-            print(f"❌ 连接错误（第{attempt + 1}次尝试）: {e}")
-            if attempt == retry_count:
-                print("❌ 无法连接到服务器")
-                return False
-            else:
-                print(f"将在 {retry_delay} 秒后重试...")
-                continue
-                
-        except requests.exceptions.Timeout as e:
-            print(f"❌ 上传超时（第{attempt + 1}次尝试）: {e}")
-            if attempt == retry_count:
-                print("❌ 文件上传超时")
-                return False
-            else:
-                print(f"将在 {retry_delay} 秒后重试...")
-                continue
-                
+            with open(state_file, 'r', encoding='utf-8') as f:
+                jobs = json.load(f)
+            restored = 0
+            for job in jobs:
+                if not os.path.exists(job.get("path", "")):
+                    print(f"⚠️ 待上传文件已不存在，跳过: {job.get('path')}")
+                    continue
+                job["next_try"] = 0
+                with upload_queue_state["lock"]:
+                    upload_queue_state["pending"][job["id"]] = job
+                upload_queue_state["queue"].put(job)
+                restored += 1
+            if restored:
+                print(f"📤 恢复 {restored} 个未完成的上传任务")
         except Exception as e:
-            print(f"❌ 上传异常（第{attempt + 1}次尝试）: {e}")
-            if attempt == retry_count:
-                print("❌ 文件上传失败")
-                return False
-            else:
-                print(f"将在 {retry_delay} 秒后重试...")
-                continue
+            print(f"⚠️ 读取上传队列状态失败: {e}")
+    save_upload_queue_state()
+    
+    concurrency = max(1, int(background_config.get("concurrency", 2)))
+    for index in range(concurrency):
+        thread = threading.Thread(target=upload_worker_loop, name=f"upload-{index + 1}", daemon=True)
+        thread.start()
+        upload_queue_state["threads"].append(thread)
+    print(f"📤 后台上传已启用 (并发数: {concurrency}，状态文件: {state_file})")
+
+def enqueue_upload(dest_path, description, upload_config):
+    """
+    将文件加入后台上传队列，并立即写入状态文件
+    
+    Args:
+        dest_path: 输出文件路径
+        description: 文件描述
+        upload_config: 上传配置（随任务保存，重启后按同样的配置上传）
+    """
+    start_upload_workers({"upload": upload_config})
+    
+    job = {
+        "id": uuid.uuid4().hex,
+        "path": dest_path,
+        "description": description,
+        "upload": upload_config,
+        "attempts": 0,
+        "next_try": 0,
+        "created_at": datetime.now().isoformat()
+    }
+    with upload_queue_state["lock"]:
+        upload_queue_state["pending"][job["id"]] = job
+        pending_count = len(upload_queue_state["pending"])
+    save_upload_queue_state()
+    upload_queue_state["queue"].put(job)
+    print(f"📤 已加入后台上传队列: {os.path.basename(dest_path)} (待上传: {pending_count})")
+
+def upload_worker_loop():
+    """
+    后台上传线程：依次上传队列中的文件，失败后按指数退避重新排队，
+    超过最大尝试次数后放弃（本地文件保留）
+    """
+    background_config = upload_queue_state["config"]
+    max_attempts = background_config.get("max_attempts", 5)
+    backoff_base = background_config.get("backoff_base", 5)
+    backoff_max = background_config.get("backoff_max", 300)
+    
+    while True:
+        job = upload_queue_state["queue"].get()
+        if job is None:
+            break
+        
+        # 未到重试时间的任务放回队列
+        delay = job.get("next_try", 0) - time.time()
+        if delay > 0:
+            upload_queue_state["queue"].put(job)
+            time.sleep(min(delay, 1))
+            continue
+        
+        # 首次处理时按配置压缩（在上传线程中进行，不阻塞合成流程）
+        if not job.get("prepared"):
+            job["path"] = prepare_upload_artifact(job["path"], job["upload"])
+            job["description"] = f"Generated audio file: {os.path.basename(job['path'])}"
+            job["prepared"] = True
+            save_upload_queue_state()
+        
+        file_name = os.path.basename(job["path"])
+        print(f"\n📤 [后台上传] 开始上传: {file_name} (第 {job['attempts'] + 1} 次)")
+        try:
+            upload_success = upload_file_to_server(job["path"], job["description"], {"upload": job["upload"]})
+        except Exception as e:
+            print(f"❌ [后台上传] 上传异常: {e}")
+            upload_success = False
+        
+        job["attempts"] += 1
+        if upload_success or job["attempts"] >= max_attempts or not os.path.exists(job["path"]):
+            if not upload_success:
+                print(f"❌ [后台上传] {file_name} 已失败 {job['attempts']} 次，放弃上传")
+            finish_uploaded_file(job["path"], job["upload"], upload_success)
+            with upload_queue_state["lock"]:
+                upload_queue_state["pending"].pop(job["id"], None)
+        else:
+            retry_delay = min(backoff_max, backoff_base * (2 ** (job["attempts"] - 1)))
+            job["next_try"] = time.time() + retry_delay
+            print(f"⚠️ [后台上传] {file_name} 上传失败，{retry_delay} 秒后重试")
+            metrics.inc("voiceapi_retries_total", labels={"operation": "background_upload"})
+            upload_queue_state["queue"].put(job)
+        save_upload_queue_state()
+
+def drain_upload_queue(timeout=None):
+    """
+    等待后台上传队列中的任务完成（程序退出前调用），超时后未完成的任务保留在状态文件中
     
-    return False
+    Args:
+        timeout: 最大等待时间（秒），默认读取 upload.background.drain_timeout
+    
+    Returns:
+        bool: 是否全部上传完成
+    """
+    if not upload_queue_state["threads"]:
+        return True
+    
+    if timeout is None:
+        timeout = upload_queue_state["config"].get("drain_timeout", 600)
+    
+    start_time = time.time()
+    reported = False
+    while True:
+        with upload_queue_state["lock"]:
+            pending_count = len(upload_queue_state["pending"])
+        if pending_count == 0:
+            if reported:
+                print("✅ 后台上传任务已全部完成")
+            return True
+        if time.time() - start_time >= timeout:
+            print(f"⚠️ 仍有 {pending_count} 个上传任务未完成，已保存到 {upload_queue_state['state_file']}，下次启动时继续上传")
+            return False
+        if not reported:
+            print(f"⏳ 等待 {pending_count} 个后台上传任务完成 (最多 {timeout} 秒)...")
+            reported = True
+        time.sleep(0.5)
+
+# Linux FICLONE ioctl（参见 linux/fs.h），在支持的文件系统（btrfs、xfs）上创建写时复制副本
+FICLONE = 0x40049409
 
-def monitor_temp_directory_and_copy(temp_dir, config, monitor_interval=60, max_wait_time=600):
+def get_materialize_method(config):
     """
-    监控临时目录，检测新文件生成并拷贝到指定目录，然后上传到服务器
+    确定结果文件的保存方式（output.materialize）
+    
+    direct 需要同步上传且不压缩，否则回退为 auto（硬链接可以保证后台上传期间临时目录被清空后数据仍然存在）
     
     Args:
-        temp_dir: 临时目录路径
         config: 配置字典
-        monitor_interval: 无更新超时时间（秒），默认60秒
-        max_wait_time: 最大等待时间（秒），默认600秒（10分钟）
     
     Returns:
-        bool: 是否成功拷贝和上传文件
+        str: auto、link、move、copy 或 direct
     """
-    print(f"\n开始监控临时目录: {temp_dir}")
-    print(f"扫描间隔: 2秒")
-    print(f"无更新超时: {monitor_interval}秒")
-    print(f"最大等待时间: {max_wait_time}秒")
+    method = config.get("output", {}).get("materialize", "auto")
+    if method == "direct":
+        upload_config = config.get("upload", {})
+        if not upload_config.get("enabled", True):
+            print("⚠️ 上传已禁用，direct 模式回退为 auto")
+            return "auto"
+        if upload_config.get("background", {}).get("enabled", False) or upload_config.get("encode", {}).get("enabled", False):
+            print("⚠️ 后台上传或压缩需要本地文件，direct 模式回退为 auto")
+            return "auto"
+    return method
+
+def copy_file_data(source_path, dest_path):
+    """
+    在内核中拷贝文件数据：优先reflink，其次 copy_file_range / sendfile，都不可用时使用 shutil.copy2
     
-    # 从配置文件读取输出设置
-    output_config = config.get("output", {})
-    output_dir = output_config.get("directory", "data")
-    output_filename = output_config.get("filename", "output_audio.wav")
+    Args:
+        source_path: 源文件路径
+        dest_path: 目标文件路径
     
-    print(f"输出目录: {output_dir}")
-    print(f"输出文件名: {output_filename}")
+    Returns:
+        str: 实际使用的方式
+    """
+    with open(source_path, 'rb') as src, open(dest_path, 'wb') as dst:
+        if fcntl is not None:
+            try:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+                shutil.copystat(source_path, dest_path)
+                return "reflink"
+            except OSError:
+                pass
+        
+        file_size = os.fstat(src.fileno()).st_size
+        for name in ("copy_file_range", "sendfile"):
+            copy_func = getattr(os, name, None)
+            if copy_func is None:
+                continue
+            try:
+                offset = 0
+                while offset < file_size:
+                    if name == "copy_file_range":
+                        copied = copy_func(src.fileno(), dst.fileno(), file_size - offset, offset, offset)
+                    else:
+                        copied = copy_func(dst.fileno(), src.fileno(), offset, file_size - offset)
+                    if copied == 0:
+                        break
+                    offset += copied
+                if offset == file_size:
+                    shutil.copystat(source_path, dest_path)
+                    return name
+                dst.seek(0)
+                dst.truncate()
+            except OSError:
+                dst.seek(0)
+                dst.truncate()
     
-    # 记录开始时间
-    start_time = time.time()
-    last_update_time = start_time  # 记录最后文件更新时间
+    shutil.copy2(source_path, dest_path)
+    return "copy"
+
+def materialize_result(source_path, dest_path, method="auto"):
+    """
+    将生成的音频文件放到输出目录
     
-    # 获取初始文件列表
-    initial_items = set()
-    if os.path.exists(temp_dir):
-        initial_items = set(os.listdir(temp_dir))
+    auto: 同一文件系统时创建硬链接（不读写数据），否则在内核中拷贝；
+    move: 重命名（跨文件系统时拷贝后删除源文件）；link: 只尝试硬链接；copy: 原有的 shutil.copy2
     
-    print(f"初始项目数量: {len(initial_items)}")
-    if initial_items:
-        print(f"初始项目: {', '.join(initial_items)}")
+    Args:
+        source_path: 源文件路径（临时目录中的audio.wav）
+        dest_path: 目标文件路径
+        method: 保存方式
     
-    scan_count = 0
+    Returns:
+        str: 实际使用的方式（link、rename、reflink、copy_file_range、sendfile 或 copy）
+    """
+    if method == "copy":
+        shutil.copy2(source_path, dest_path)
+        return "copy"
     
-    while True:
-        current_time = time.time()
-        elapsed_time = current_time - start_time
-        
-        # 检查是否超过最大等待时间
-        if elapsed_time > max_wait_time:
-            print(f"✗ 监控超时，已等待 {elapsed_time:.1f} 秒")
-            return False
-        
-        # 检查当前文件列表
-        current_items = set()
-        if os.path.exists(temp_dir):
-            current_items = set(os.listdir(temp_dir))
-        
-        # 找出新项目
-        new_items = current_items - initial_items
-        
-        scan_count += 1
-        
-        if new_items:
-            print(f"第{scan_count}次扫描: ✓ 发现 {len(new_items)} 个新项目: {', '.join(new_items)}")
-            last_update_time = current_time  # 更新最后文件更新时间
-            initial_items = current_items  # 更新初始项目列表
-        else:
-            # 计算距离上次文件更新的时间
-            time_since_last_update = current_time - last_update_time
-            print(f"第{scan_count}次扫描: 未发现新项目 (距离上次更新: {time_since_last_update:.1f}秒)")
-            
-            # 如果超过指定时间没有文件更新，则认为文件生成完成
-            if time_since_last_update >= monitor_interval:
-                print(f"✓ 已连续 {monitor_interval} 秒无文件更新，认为文件生成完成")
-                break
-        
-        # 等待2秒后进行下次扫描
-        time.sleep(2)
+    if method in ("auto", "link"):
+        try:
+            os.link(source_path, dest_path)
+            return "link"
+        except OSError as e:
+            if method == "link":
+                print(f"⚠️ 创建硬链接失败 ({e})，改为拷贝")
+    
+    if method == "move":
+        try:
+            os.rename(source_path, dest_path)
+            return "rename"
+        except OSError:
+            used_method = copy_file_data(source_path, dest_path)
+            os.remove(source_path)
+            return used_method
+    
+    return copy_file_data(source_path, dest_path)
+
+def save_audio_to_output(audio_wav_path, config):
+    """
+    将生成的音频文件保存到输出目录（方式见 output.materialize），然后上传到服务器
     
-    # 查找时间戳最新的文件夹并拷贝audio.wav
+    Args:
+        audio_wav_path: 生成的音频文件路径
+        config: 配置字典
+    
+    Returns:
+        bool: 是否成功保存（上传失败不影响返回值）
+    """
     try:
-        print(f"\n开始查找时间戳最新的文件夹...")
-        
-        # 获取所有文件夹
-        all_folders = []
-        if os.path.exists(temp_dir):
-            for item in os.listdir(temp_dir):
-                item_path = os.path.join(temp_dir, item)
-                if os.path.isdir(item_path):
-                    # 获取文件夹信息
-                    stat_info = os.stat(item_path)
-                    all_folders.append({
-                        'name': item,
-                        'path': item_path,
-                        'mtime': stat_info.st_mtime,
-                        'ctime': stat_info.st_ctime
-                    })
-        
-        if not all_folders:
-            print("✗ 临时目录中没有找到文件夹")
-            return False
+        # 获取audio.wav文件信息
+        audio_stat = os.stat(audio_wav_path)
+        print(f"audio.wav 文件大小: {audio_stat.st_size} 字节")
+        print(f"audio.wav 修改时间: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(audio_stat.st_mtime))}")
         
-        # 按修改时间排序，获取最新文件夹
-        all_folders.sort(key=lambda x: x['mtime'], reverse=True)
-        latest_folder = all_folders[0]
+        dest_path = resolve_output_path(config)
+        method = get_materialize_method(config)
         
-        print(f"最新文件夹: {latest_folder['name']}")
-        print(f"文件夹路径: {latest_folder['path']}")
-        print(f"修改时间: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(latest_folder['mtime']))}")
-        print(f"创建时间: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(latest_folder['ctime']))}")
+        # 直接从临时目录上传，不在本地保留副本
+        if method == "direct":
+            print(f"直接从临时目录上传 audio.wav (上传文件名: {os.path.basename(dest_path)})")
+            with trace_span("结果上传"):
+                upload_output_file(audio_wav_path, config, upload_name=os.path.basename(dest_path))
+            mark_temp_folder_harvested(audio_wav_path)
+            return True
         
-        # 查找文件夹中的audio.wav文件
-        audio_wav_path = os.path.join(latest_folder['path'], 'audio.wav')
+        # 将audio.wav放到输出目录（同一文件系统时使用硬链接/重命名，避免重复读写）
+        print(f"正在保存 audio.wav 到: {dest_path}")
+        with trace_span("结果保存"):
+            used_method = materialize_result(audio_wav_path, dest_path, method)
+        print(f"✓ audio.wav 文件保存成功 ({used_method}): {dest_path}")
+        mark_temp_folder_harvested(audio_wav_path)
         
-        if not os.path.exists(audio_wav_path):
-            print(f"✗ 在文件夹 {latest_folder['name']} 中没有找到 audio.wav 文件")
+        # 只有真正拷贝数据时才需要验证大小
+        if used_method not in ("link", "rename"):
+            copied_size = os.path.getsize(dest_path)
+            print(f"拷贝后文件大小: {copied_size} 字节")
             
-            # 列出文件夹中的所有文件
-            folder_files = os.listdir(latest_folder['path'])
-            if folder_files:
-                print(f"文件夹中的文件: {', '.join(folder_files)}")
-                
-                # 查找任何.wav文件
-                wav_files = [f for f in folder_files if f.lower().endswith('.wav')]
-                if wav_files:
-                    print(f"找到 {len(wav_files)} 个.wav文件: {', '.join(wav_files)}")
-                    # 使用第一个.wav文件
-                    audio_wav_path = os.path.join(latest_folder['path'], wav_files[0])
-                    print(f"使用文件: {wav_files[0]}")
-                else:
-                    print("✗ 文件夹中没有找到任何.wav文件")
-                    return False
+            if copied_size == audio_stat.st_size:
+                print("✓ 文件大小验证成功")
             else:
-                print("✗ 文件夹是空的")
-                return False
-        else:
-            print(f"✓ 找到 audio.wav 文件: {audio_wav_path}")
-        
-        # 获取audio.wav文件信息
-        audio_stat = os.stat(audio_wav_path)
-        print(f"audio.wav 文件大小: {audio_stat.st_size} 字节")
-        print(f"audio.wav 修改时间: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(audio_stat.st_mtime))}")
+                print("⚠️ 文件大小不匹配，可能拷贝不完整")
         
-        # 创建输出目录
-        current_dir = os.getcwd()
-        output_path = os.path.join(current_dir, output_dir)
+        with trace_span("结果上传"):
+            upload_output_file(dest_path, config)
         
-        if not os.path.exists(output_path):
-            print(f"创建输出目录: {output_path}")
-            os.makedirs(output_path, exist_ok=True)
+        return True
         
-        # 拷贝audio.wav文件到输出目录
-        dest_path = os.path.join(output_path, output_filename)
+    except Exception as e:
+        print(f"✗ 拷贝文件失败: {e}")
+        return False
+
+def collect_page_audio_sources(driver, output_selector):
+    """
+    收集页面中音频元素（或下载链接）当前指向的URL
+    
+    Args:
+        driver: WebDriver实例
+        output_selector: 输出音频元素选择器
+    
+    Returns:
+        list: URL列表
+    """
+    try:
+        return driver.execute_script("""
+            var urls = [];
+            document.querySelectorAll(arguments[0]).forEach(function(element) {
+                var url = element.currentSrc || element.src || element.getAttribute('href');
+                if (url) {
+                    urls.push(url);
+                }
+            });
+            return urls;
+        """, output_selector) or []
+    except Exception as e:
+        print(f"⚠️ 读取页面音频元素失败: {e}")
+        return []
+
+def is_page_generating(driver):
+    """
+    检查Gradio页面是否仍在生成（存在进度条或生成中状态）
+    
+    Args:
+        driver: WebDriver实例
+    
+    Returns:
+        bool: 是否仍在生成
+    """
+    try:
+        return bool(driver.execute_script(
+            "return document.querySelector('.progress-text, .eta-bar, .generating, .pending') !== null;"
+        ))
+    except Exception:
+        return False
+
+def wait_for_output_audio_url(driver, config, existing_sources, max_wait_time=600):
+    """
+    等待Gradio输出组件出现本次任务的音频URL（点击按钮前已存在的URL会被忽略）
+    
+    Args:
+        driver: WebDriver实例
+        config: 配置字典
+        existing_sources: 点击按钮前页面中已有的音频URL集合
+        max_wait_time: 最大等待时间（秒）
+    
+    Returns:
+        str: 输出音频URL，超时返回None
+    """
+    monitoring_config = config.get("monitoring", {})
+    poll_interval = monitoring_config.get("poll_interval", 0.2)
+    settle_time = monitoring_config.get("settle_time", 0.5)
+    output_selector = config.get("selectors", {}).get("output_audio", "audio, a[download]")
+    
+    # 参考音频上传后也会出现在页面中，按文件名排除
+    ignored_names = set()
+    for audio_config in config.get("audio_files", []):
+        if audio_config.get("file_path"):
+            ignored_names.add(os.path.basename(audio_config["file_path"]))
+    
+    start_time = time.time()
+    last_report_time = start_time
+    candidate_url = None
+    candidate_since = None
+    
+    while True:
+        elapsed_time = time.time() - start_time
+        if elapsed_time > max_wait_time:
+            print(f"✗ 等待输出音频超时，已等待 {elapsed_time:.1f} 秒")
+            return None
         
-        # 如果目标文件已存在，添加时间戳
-        if os.path.exists(dest_path):
-            timestamp = time.strftime("%Y%m%d_%H%M%S")
-            name, ext = os.path.splitext(output_filename)
-            new_name = f"{name}_{timestamp}{ext}"
-            dest_path = os.path.join(output_path, new_name)
-            print(f"目标文件已存在，重命名为: {new_name}")
+        new_urls = []
+        for url in collect_page_audio_sources(driver, output_selector):
+            if url in existing_sources:
+                continue
+            file_name = requests.utils.unquote(url.split("?")[0].rsplit("/", 1)[-1])
+            if file_name in ignored_names:
+                continue
+            new_urls.append(url)
         
-        print(f"正在拷贝 audio.wav 到: {dest_path}")
-        shutil.copy2(audio_wav_path, dest_path)
-        print(f"✓ audio.wav 文件拷贝成功: {dest_path}")
+        if new_urls:
+            url = new_urls[-1]
+            if url != candidate_url:
+                candidate_url = url
+                candidate_since = time.time()
+            # URL稳定一段时间且页面不再处于生成状态，才认为输出已完成
+            if time.time() - candidate_since >= settle_time and not is_page_generating(driver):
+                print(f"✓ 检测到输出音频（耗时 {elapsed_time:.1f} 秒）: {candidate_url}")
+                return candidate_url
         
-        # 显示拷贝的文件信息
-        copied_size = os.path.getsize(dest_path)
-        print(f"拷贝后文件大小: {copied_size} 字节")
+        if time.time() - last_report_time >= 5:
+            print(f"  等待输出音频中... (已等待 {elapsed_time:.1f}秒)")
+            last_report_time = time.time()
         
-        if copied_size == audio_stat.st_size:
-            print("✓ 文件大小验证成功")
+        time.sleep(poll_interval)
+
+def download_output_audio(driver, url, dest_path, timeout=60):
+    """
+    下载输出音频到指定路径，支持Gradio的/file=地址以及页面内的blob/data地址
+    
+    Args:
+        driver: WebDriver实例
+        url: 输出音频URL
+        dest_path: 保存路径
+        timeout: 下载超时时间（秒）
+    
+    Returns:
+        bool: 是否下载成功
+    """
+    try:
+        if url.startswith("http://") or url.startswith("https://"):
+            with http_client.get(url, endpoint="download", stream=True, timeout=timeout) as response:
+                if response.status_code != 200:
+                    print(f"❌ 下载输出音频失败，状态码: {response.status_code}")
+                    return False
+                with open(dest_path, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=1024 * 1024):
+                        f.write(chunk)
         else:
-            print("⚠️ 文件大小不匹配，可能拷贝不完整")
-        
-        # 上传文件到服务器
-        upload_config = config.get("upload", {})
-        upload_enabled = upload_config.get("enabled", True)  # 默认启用上传
+            # blob:/data: 地址只能在页面内读取，通过浏览器转成base64传回
+            driver.set_script_timeout(timeout)
+            encoded = driver.execute_async_script("""
+                var url = arguments[0];
+                var done = arguments[arguments.length - 1];
+                fetch(url).then(function(response) {
+                    return response.blob();
+                }).then(function(blob) {
+                    var reader = new FileReader();
+                    reader.onloadend = function() {
+                        done(reader.result.split(',')[1]);
+                    };
+                    reader.readAsDataURL(blob);
+                }).catch(function() {
+                    done(null);
+                });
+            """, url)
+            if not encoded:
+                print("❌ 页面内读取输出音频失败")
+                return False
+            with open(dest_path, 'wb') as f:
+                f.write(base64.b64decode(encoded))
         
-        if upload_enabled:
-            print(f"\n{'='*50}")
-            print("开始上传文件到服务器")
-            print(f"{'='*50}")
-            
-            # 生成文件描述
-            file_description = f"Generated audio file: {output_filename}"
-            
-            # 上传文件
-            upload_success = upload_file_to_server(dest_path, file_description, config)
-            
-            if upload_success:
-                print("✅ 文件上传到服务器成功！")
-                
-                # 检查是否需要删除本地文件
-                delete_after_upload = upload_config.get("delete_after_upload", False)
-                if delete_after_upload:
-                    try:
-                        print(f"正在删除本地文件: {dest_path}")
-                        os.remove(dest_path)
-                        print("✅ 本地文件删除成功！")
-                    except Exception as e:
-                        print(f"⚠️ 删除本地文件失败: {e}")
-                else:
-                    print("ℹ️ 本地文件保留（配置文件设置）")
-            else:
-                print("❌ 文件上传到服务器失败！")
-                print("ℹ️ 由于上传失败，保留本地文件")
-                # 即使上传失败，也不影响整体流程的成功状态
-            
-            print(f"{'='*50}")
-        else:
-            print("⚠️ 文件上传功能已禁用（配置文件设置）")
+        file_size = os.path.getsize(dest_path)
+        print(f"✓ 输出音频已保存: {dest_path} ({file_size} 字节)")
         
+        if dest_path.lower().endswith('.wav') and not is_valid_wav_file(dest_path):
+            print("⚠️ 下载的音频文件头不完整，可能不是WAV格式")
         return True
-        
     except Exception as e:
-        print(f"✗ 拷贝文件失败: {e}")
+        print(f"❌ 下载输出音频异常: {e}")
+        return False
+
+def capture_page_output_and_save(driver, config, existing_sources, max_wait_time=600):
+    """
+    直接从Gradio页面的输出音频组件获取本次任务的结果文件，保存到输出目录并上传
+    
+    Args:
+        driver: WebDriver实例
+        config: 配置字典
+        existing_sources: 点击按钮前页面中已有的音频URL集合
+        max_wait_time: 最大等待时间（秒）
+    
+    Returns:
+        bool: 是否成功保存
+    """
+    print(f"\n开始从页面输出组件获取音频...")
+    
+    output_url = wait_for_output_audio_url(driver, config, existing_sources, max_wait_time)
+    if not output_url:
+        return False
+    
+    dest_path = resolve_output_path(config)
+    download_timeout = config.get("upload", {}).get("timeout", 60)
+    if not download_output_audio(driver, output_url, dest_path, download_timeout):
+        return False
+    
+    upload_output_file(dest_path, config)
+    return True
+
+def monitor_temp_directory_and_copy(temp_dir, config, monitor_interval=60, max_wait_time=600, job_start_time=None):
+    """
+    监控临时目录，检测新文件生成并拷贝到指定目录，然后上传到服务器
+    
+    Args:
+        temp_dir: 临时目录路径
+        config: 配置字典
+        monitor_interval: 无更新超时时间（秒），默认60秒，仅用于quiet_period模式
+        max_wait_time: 最大等待时间（秒），默认600秒（10分钟）
+        job_start_time: 任务开始（点击按钮前）的时间，用于识别本次任务的输出，默认为监控开始时间
+    
+    Returns:
+        bool: 是否成功拷贝和上传文件
+    """
+    print(f"\n开始监控临时目录: {temp_dir}")
+    print(f"最大等待时间: {max_wait_time}秒")
+    
+    # 从配置文件读取输出设置
+    output_config = config.get("output", {})
+    print(f"输出目录: {output_config.get('directory', 'data')}")
+    print(f"输出文件名: {output_config.get('filename', 'output_audio.wav')}")
+    
+    completion_mode = config.get("monitoring", {}).get("completion_mode", "event")
+    
+    if completion_mode == "event":
+        # 事件驱动：audio.wav写入完成后立即返回
+        audio_wav_path = wait_for_completed_audio(
+            temp_dir,
+            config,
+            job_start_time if job_start_time else time.time(),
+            max_wait_time
+        )
+    else:
+        # 旧方式：等待临时目录连续一段时间无更新，再取最新文件夹
+        if not wait_for_quiet_period(temp_dir, monitor_interval, max_wait_time):
+            return False
+        audio_wav_path = find_latest_audio_in_temp(temp_dir)
+    
+    if not audio_wav_path:
         return False
+    
+    return save_audio_to_output(audio_wav_path, config)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
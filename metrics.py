@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+运行指标
+记录任务数、队列深度、各阶段耗时、上传速度、重试和浏览器重启等指标，
+并可通过内置HTTP服务以Prometheus文本格式在 /metrics 暴露
+"""
+
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# 直方图默认分桶（秒）
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+# 指标定义：名称 -> (类型, 说明)
+METRIC_DEFINITIONS = {
+    "voiceapi_jobs_total": ("counter", "Processed jobs by result"),
+    "voiceapi_queue_depth": ("gauge", "Items returned by the last /voice/list/ request"),
+    "voiceapi_stage_duration_seconds": ("histogram", "Duration of each job stage"),
+    "voiceapi_upload_bytes_total": ("counter", "Bytes uploaded to the file server"),
+    "voiceapi_upload_duration_seconds": ("histogram", "Duration of successful file uploads"),
+    "voiceapi_upload_bytes_per_second": ("gauge", "Throughput of the last successful upload"),
+    "voiceapi_retries_total": ("counter", "Retries by operation"),
+    "voiceapi_browser_starts_total": ("counter", "Chrome processes started"),
+    "voiceapi_browser_restarts_total": ("counter", "Persistent browser sessions restarted after failing a health check")
+}
+
+_lock = threading.Lock()
+_values = {}  # 名称 -> {标签元组: 数值，直方图为 {"buckets", "sum", "count"}}
+_server = None
+
+def _label_key(labels):
+    """把标签字典转换为可作为字典键的有序元组"""
+    return tuple(sorted((labels or {}).items()))
+
+def inc(name, value=1, labels=None):
+    """
+    计数器增加
+
+    Args:
+        name: 指标名称
+        value: 增加值
+        labels: 标签字典
+    """
+    key = _label_key(labels)
+    with _lock:
+        series = _values.setdefault(name, {})
+        series[key] = series.get(key, 0) + value
+
+def set_gauge(name, value, labels=None):
+    """
+    设置仪表值
+
+    Args:
+        name: 指标名称
+        value: 当前值
+        labels: 标签字典
+    """
+    with _lock:
+        _values.setdefault(name, {})[_label_key(labels)] = value
+
+def observe(name, value, labels=None, buckets=DEFAULT_BUCKETS):
+    """
+    直方图记录一次观测值
+
+    Args:
+        name: 指标名称
+        value: 观测值
+        labels: 标签字典
+        buckets: 分桶上界
+    """
+    key = _label_key(labels)
+    with _lock:
+        series = _values.setdefault(name, {})
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = {"buckets": [[bound, 0] for bound in buckets], "sum": 0.0, "count": 0}
+            series[key] = histogram
+        for bucket in histogram["buckets"]:
+            if value <= bucket[0]:
+                bucket[1] += 1
+        histogram["sum"] += value
+        histogram["count"] += 1
+
+def _escape(value):
+    """转义标签值"""
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_labels(key, extra=None):
+    """格式化标签为 {a="1",b="2"}"""
+    pairs = list(key) + list(extra or [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+def render():
+    """
+    以Prometheus文本格式输出全部指标
+
+    Returns:
+        str: 指标文本
+    """
+    lines = []
+    with _lock:
+        for name, series in sorted(_values.items()):
+            metric_type, help_text = METRIC_DEFINITIONS.get(name, ("untyped", name))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for key, value in sorted(series.items()):
+                if metric_type == "histogram":
+                    for bound, count in value["buckets"]:
+                        lines.append(f"{name}_bucket{_format_labels(key, [('le', bound)])} {count}")
+                    lines.append(f"{name}_bucket{_format_labels(key, [('le', '+Inf')])} {value['count']}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {value['sum']}")
+                    lines.append(f"{name}_count{_format_labels(key)} {value['count']}")
+                else:
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+    return "\n".join(lines) + "\n"
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """只响应 GET /metrics 的请求处理器"""
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 抓取请求很频繁，不输出访问日志
+        pass
+
+def start_server(port, host="127.0.0.1"):
+    """
+    在后台线程中启动指标HTTP服务（重复调用时不会重复启动）
+
+    Args:
+        port: 监听端口
+        host: 监听地址（默认只监听本机，对外暴露需显式指定）
+
+    Returns:
+        bool: 服务是否在运行
+    """
+    global _server
+
+    with _lock:
+        if _server is not None:
+            return True
+        try:
+            _server = ThreadingHTTPServer((host, port), MetricsHandler)
+        except OSError as e:
+            print(f"⚠️ 指标服务启动失败 {host}:{port}: {e}")
+            return False
+        _server.daemon_threads = True
+
+    threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    print(f"📈 指标服务已启动: http://{host}:{port}/metrics")
+    return True
+
+def stop_server():
+    """停止指标HTTP服务"""
+    global _server
+
+    with _lock:
+        server, _server = _server, None
+    if server is not None:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+API 数据获取退避测试
+测试空闲期的指数退避、上限、抖动范围和本次等待上限
+"""
+
+import pytest
+
+import input_textarea_win as automation
+
+@pytest.fixture(autouse=True)
+def reset_backoff():
+    """每个测试从基础检查间隔开始"""
+    automation.api_intake_state["backoff"] = None
+    yield
+    automation.api_intake_state["backoff"] = None
+
+def test_backoff_grows_exponentially_up_to_max():
+    """无抖动时等待时间按 backoff_factor 翻倍，不超过 backoff_max"""
+    intake_config = {"backoff_factor": 2, "backoff_max": 8, "jitter": 0}
+    delays = [automation.next_api_backoff(intake_config, 1) for _ in range(6)]
+    assert delays == [1, 2, 4, 8, 8, 8]
+
+def test_backoff_jitter_stays_in_range():
+    """抖动后的等待时间在 ±jitter 范围内"""
+    intake_config = {"backoff_factor": 1, "backoff_max": 30, "jitter": 0.2}
+    for _ in range(50):
+        delay = automation.next_api_backoff(intake_config, 10)
+        assert 8 <= delay <= 12
+
+def test_backoff_respects_max_sleep():
+    """等待时间不超过剩余的最大等待时间，也不会为负数"""
+    intake_config = {"backoff_factor": 2, "backoff_max": 30, "jitter": 0}
+    assert automation.next_api_backoff(intake_config, 5, max_sleep=2) == 2
+    assert automation.next_api_backoff(intake_config, 5, max_sleep=-1) == 0
+    # 上限只影响本次等待，退避间隔照常增长
+    assert automation.api_intake_state["backoff"] == 20
+
+def test_backoff_resets_after_items_arrive():
+    """获取到数据后（backoff 置为 None）恢复为基础检查间隔"""
+    intake_config = {"backoff_factor": 2, "backoff_max": 30, "jitter": 0}
+    automation.next_api_backoff(intake_config, 1)
+    automation.next_api_backoff(intake_config, 1)
+    automation.api_intake_state["backoff"] = None
+    assert automation.next_api_backoff(intake_config, 1) == 1
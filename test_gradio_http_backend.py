@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gradio HTTP 后端测试
+测试输入模板替换、接口根地址和事件函数解析（不访问网络）
+"""
+
+import pytest
+
+import input_textarea_win as automation
+
+def test_build_gradio_inputs_replaces_placeholders():
+    """{text_N} 和 {audio_N} 替换为本次任务的数据，其他值原样保留"""
+    template = ["{text_0}", "3s极速复刻", "", "{text_2}", "{audio_0}", None, 0, False, 1.0]
+    file_contents = {0: "合成文本", 2: "提示文本"}
+    uploaded_files = {0: {"path": "/tmp/prompt.wav", "meta": {"_type": "gradio.FileData"}}}
+
+    inputs = automation.build_gradio_inputs(template, file_contents, uploaded_files)
+
+    assert inputs == ["合成文本", "3s极速复刻", "", "提示文本", uploaded_files[0], None, 0, False, 1.0]
+
+def test_build_gradio_inputs_missing_values():
+    """没有对应数据的文本占位符为空字符串，音频占位符为None"""
+    inputs = automation.build_gradio_inputs(["{text_5}", "{audio_3}"], {}, {})
+    assert inputs == ["", None]
+
+def test_get_gradio_api_root():
+    """Gradio 5 的接口位于 api_prefix 下，root 优先于页面地址"""
+    assert automation.get_gradio_api_root({}, "http://127.0.0.1:50004/") == "http://127.0.0.1:50004"
+    assert automation.get_gradio_api_root({"api_prefix": "/gradio_api"}, "http://host/") == "http://host/gradio_api"
+    assert automation.get_gradio_api_root({"root": "http://proxy/app/"}, "http://host/") == "http://proxy/app"
+
+def test_resolve_gradio_fn_index():
+    """按 api_name 或 fn_index 找到事件函数及触发组件"""
+    app_config = {"dependencies": [
+        {"id": 3, "api_name": "random_seed", "targets": [[7, "click"]]},
+        {"id": 5, "api_name": "generate_audio", "targets": [[9, "click"]]}
+    ]}
+
+    assert automation.resolve_gradio_fn_index(app_config, {"api_name": "/generate_audio"}) == (5, 9)
+    assert automation.resolve_gradio_fn_index(app_config, {"fn_index": 3}) == (3, 7)
+    assert automation.resolve_gradio_fn_index(app_config, {"fn_index": 11}) == (11, None)
+    with pytest.raises(Exception):
+        automation.resolve_gradio_fn_index(app_config, {"api_name": "/missing"})
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+结果文件保存方式测试
+测试 materialize_result 的硬链接、重命名、内核拷贝和普通拷贝
+"""
+
+import os
+
+import input_textarea_win as automation
+
+def make_source(tmp_path, content=b"RIFF-test-audio" * 1000):
+    """在模拟的临时目录中写入一个输出文件"""
+    source_dir = tmp_path / "temp" / "abc123"
+    source_dir.mkdir(parents=True)
+    source_path = source_dir / "audio.wav"
+    source_path.write_bytes(content)
+    output_dir = tmp_path / "data"
+    output_dir.mkdir()
+    return source_path, output_dir / "output_audio.wav", content
+
+def test_auto_creates_hard_link_on_same_filesystem(tmp_path):
+    """auto 在同一文件系统时创建硬链接，不拷贝数据"""
+    source_path, dest_path, content = make_source(tmp_path)
+
+    assert automation.materialize_result(str(source_path), str(dest_path)) == "link"
+    assert os.path.samefile(source_path, dest_path)
+    assert dest_path.read_bytes() == content
+
+def test_move_renames_and_removes_source(tmp_path):
+    """move 重命名文件，源文件不再存在"""
+    source_path, dest_path, content = make_source(tmp_path)
+
+    assert automation.materialize_result(str(source_path), str(dest_path), "move") == "rename"
+    assert not source_path.exists()
+    assert dest_path.read_bytes() == content
+
+def test_copy_keeps_independent_file(tmp_path):
+    """copy 生成独立的副本"""
+    source_path, dest_path, content = make_source(tmp_path)
+
+    assert automation.materialize_result(str(source_path), str(dest_path), "copy") == "copy"
+    assert not os.path.samefile(source_path, dest_path)
+    assert dest_path.read_bytes() == content
+
+def test_copy_file_data_copies_full_content(tmp_path):
+    """内核拷贝得到与源文件完全相同的内容（不同文件系统时 auto 的回退路径）"""
+    source_path, dest_path, content = make_source(tmp_path, os.urandom(3 * 1024 * 1024 + 17))
+
+    method = automation.copy_file_data(str(source_path), str(dest_path))
+
+    assert method in ("reflink", "copy_file_range", "sendfile", "copy")
+    assert dest_path.read_bytes() == content
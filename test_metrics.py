@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+运行指标测试
+测试计数器、仪表、直方图的记录，Prometheus文本格式的输出，以及指标服务的监听地址
+"""
+
+import urllib.request
+
+import pytest
+
+import metrics
+
+@pytest.fixture(autouse=True)
+def clear_metrics():
+    """每个测试使用空的指标表"""
+    metrics._values.clear()
+    yield
+    metrics._values.clear()
+
+def test_counter_accumulates_per_label_set():
+    """计数器按标签分别累加，标签顺序不影响归属"""
+    metrics.inc("voiceapi_jobs_total", labels={"result": "success"})
+    metrics.inc("voiceapi_jobs_total", 2, labels={"result": "success"})
+    metrics.inc("voiceapi_jobs_total", labels={"result": "failure"})
+    metrics.inc("voiceapi_retries_total", labels={"operation": "upload", "attempt": "2"})
+    metrics.inc("voiceapi_retries_total", labels={"attempt": "2", "operation": "upload"})
+
+    text = metrics.render()
+    assert "# TYPE voiceapi_jobs_total counter" in text
+    assert 'voiceapi_jobs_total{result="success"} 3' in text
+    assert 'voiceapi_jobs_total{result="failure"} 1' in text
+    assert 'voiceapi_retries_total{attempt="2",operation="upload"} 2' in text
+
+def test_gauge_keeps_last_value():
+    """仪表只保留最后一次设置的值"""
+    metrics.set_gauge("voiceapi_queue_depth", 5)
+    metrics.set_gauge("voiceapi_queue_depth", 2)
+
+    text = metrics.render()
+    assert "# TYPE voiceapi_queue_depth gauge" in text
+    assert "voiceapi_queue_depth 2\n" in text
+
+def test_histogram_buckets_are_cumulative():
+    """直方图分桶累计计数，并输出 +Inf、_sum 和 _count"""
+    for value in (0.5, 1.5, 20):
+        metrics.observe("voiceapi_stage_duration_seconds", value, labels={"stage": "合成"}, buckets=(1, 2, 10))
+
+    lines = metrics.render().splitlines()
+    assert "# TYPE voiceapi_stage_duration_seconds histogram" in lines
+    assert 'voiceapi_stage_duration_seconds_bucket{stage="合成",le="1"} 1' in lines
+    assert 'voiceapi_stage_duration_seconds_bucket{stage="合成",le="2"} 2' in lines
+    assert 'voiceapi_stage_duration_seconds_bucket{stage="合成",le="10"} 2' in lines
+    assert 'voiceapi_stage_duration_seconds_bucket{stage="合成",le="+Inf"} 3' in lines
+    assert 'voiceapi_stage_duration_seconds_sum{stage="合成"} 22.0' in lines
+    assert 'voiceapi_stage_duration_seconds_count{stage="合成"} 3' in lines
+
+def test_unknown_metric_is_untyped_and_labels_are_escaped():
+    """未定义的指标输出为 untyped，标签值中的引号、反斜杠和换行被转义"""
+    metrics.inc("custom_events", labels={"path": 'C:\\data\n"a"'})
+
+    text = metrics.render()
+    assert "# HELP custom_events custom_events" in text
+    assert "# TYPE custom_events untyped" in text
+    assert 'custom_events{path="C:\\\\data\\n\\"a\\""} 1' in text
+
+def test_render_is_empty_without_values():
+    """没有记录任何指标时只输出换行"""
+    assert metrics.render() == "\n"
+
+def test_server_listens_on_loopback_by_default():
+    """指标服务默认只监听本机地址，并在 /metrics 返回指标文本"""
+    metrics.inc("voiceapi_browser_starts_total")
+    assert metrics.start_server(0)
+    try:
+        host, port = metrics._server.server_address[:2]
+        assert host == "127.0.0.1"
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+            assert "voiceapi_browser_starts_total 1" in response.read().decode("utf-8")
+    finally:
+        metrics.stop_server()
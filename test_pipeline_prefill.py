@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流水线预填表单测试
+测试准备线程按任务轮流分配标签页，以及合成阶段只使用为本任务预填的表单
+"""
+
+import queue
+import threading
+import types
+
+import pytest
+
+import input_textarea_win as automation
+
+class FakeDriver:
+    """健康检查总是通过的假WebDriver"""
+
+    def execute_script(self, script, *args):
+        return "complete"
+
+    def find_elements(self, by, selector):
+        return [object()]
+
+@pytest.fixture(autouse=True)
+def clean_sessions():
+    """每个测试使用空的会话表，并关闭预填表单"""
+    automation.browser_sessions.clear()
+    automation.pipeline_prefill["tabs"] = 0
+    yield
+    automation.browser_sessions.clear()
+    automation.pipeline_prefill["tabs"] = 0
+
+def test_take_prefilled_form_requires_same_job():
+    """只有为同一个任务预填的表单才会被使用，取出后标记即被清除"""
+    driver = FakeDriver()
+    config = {"text_files": []}
+    automation.browser_sessions["pipeline-tab-0"] = {"driver": driver, "tab_handle": None, "rounds": 1,
+                                                     "prefilled_form": (config, (2, 1))}
+
+    assert automation.take_prefilled_form({"text_files": []}, "pipeline-tab-0") is None
+    assert "prefilled_form" not in automation.browser_sessions["pipeline-tab-0"]
+
+    automation.browser_sessions["pipeline-tab-0"]["prefilled_form"] = (config, (2, 1))
+    assert automation.take_prefilled_form(config, "pipeline-tab-0") == (driver, (2, 1))
+    assert automation.take_prefilled_form(config, "pipeline-tab-0") is None
+    assert automation.take_prefilled_form(config, "missing") is None
+
+def test_prepare_loop_rotates_tabs(monkeypatch):
+    """准备线程按顺序轮流使用标签页，无效数据不预填"""
+    items = [{"id": index} for index in range(1, 6)]
+    stop_event = threading.Event()
+    prefilled = []
+
+    def next_item(args, base_config, item_buffer):
+        if not items:
+            stop_event.set()
+            return None
+        return items.pop(0)
+
+    def prepare(args, api_params):
+        error = "音色不存在" if api_params["id"] == 3 else None
+        return {"api_params": api_params, "config": {"id": api_params["id"]}, "error": error}
+
+    monkeypatch.setattr(automation, "next_api_item", next_item)
+    monkeypatch.setattr(automation, "start_api_prefetch", lambda item_buffer: None)
+    monkeypatch.setattr(automation, "prepare_api_job", prepare)
+    monkeypatch.setattr(automation, "prefill_job_form", lambda args, config, session_key: prefilled.append((config["id"], session_key)))
+    automation.pipeline_prefill["tabs"] = 3
+
+    prepared_queue = queue.Queue()
+    automation.pipeline_prepare_loop(types.SimpleNamespace(api_interval=0), {}, {}, prepared_queue, stop_event)
+
+    assert prefilled == [(1, "pipeline-tab-0"), (2, "pipeline-tab-1"), (4, "pipeline-tab-0"), (5, "pipeline-tab-1")]
+    jobs = [prepared_queue.get_nowait() for _ in range(prepared_queue.qsize())]
+    assert [job.get("session_key") for job in jobs] == ["pipeline-tab-0", "pipeline-tab-1", None, "pipeline-tab-0", "pipeline-tab-1"]
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+参考音频与提示词缓存测试
+测试文件哈希缓存、提示词文本LRU缓存、可复用参考音频的判断，以及临时目录清理时保留复用中的参考音频
+"""
+
+import hashlib
+import os
+
+import pytest
+
+import input_textarea_win as automation
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """每个测试使用空缓存"""
+    automation.file_hash_cache.clear()
+    automation.prompt_file_cache["entries"].clear()
+    yield
+    automation.file_hash_cache.clear()
+    automation.prompt_file_cache["entries"].clear()
+
+def touch(file_path, content):
+    """写入新内容，并把修改时间推后，确保缓存键变化"""
+    mtime_ns = os.stat(file_path).st_mtime_ns if os.path.exists(file_path) else 0
+    file_path.write_bytes(content)
+    os.utime(file_path, ns=(mtime_ns + 10 ** 9, mtime_ns + 10 ** 9))
+
+def test_sha256_is_cached_until_file_changes(tmp_path):
+    """文件大小和修改时间不变时使用缓存结果，变化后重新计算"""
+    file_path = tmp_path / "voice.wav"
+    touch(file_path, b"first")
+    assert automation.get_file_sha256(str(file_path)) == hashlib.sha256(b"first").hexdigest()
+    assert len(automation.file_hash_cache) == 1
+
+    touch(file_path, b"second")
+    assert automation.get_file_sha256(str(file_path)) == hashlib.sha256(b"second").hexdigest()
+    assert automation.get_file_sha256(str(tmp_path / "missing.wav")) is None
+
+def test_prompt_file_cache_returns_fresh_content(tmp_path):
+    """提示词文件未变化时返回缓存内容，修改后返回新内容"""
+    file_path = tmp_path / "voice.txt"
+    touch(file_path, "提示词一".encode("utf-8"))
+    assert automation.read_prompt_file(str(file_path)) == "提示词一"
+
+    touch(file_path, "提示词二号".encode("utf-8"))
+    assert automation.read_prompt_file(str(file_path)) == "提示词二号"
+
+def test_prompt_file_cache_is_bounded(tmp_path):
+    """缓存最多保留 PROMPT_CACHE_SIZE 个文件，超出时淘汰最久未使用的"""
+    for index in range(automation.PROMPT_CACHE_SIZE + 5):
+        file_path = tmp_path / f"voice{index}.txt"
+        touch(file_path, f"提示词{index}".encode("utf-8"))
+        automation.read_prompt_file(str(file_path))
+
+    entries = automation.prompt_file_cache["entries"]
+    assert len(entries) == automation.PROMPT_CACHE_SIZE
+    assert not any(key[0].endswith("voice0.txt") for key in entries)
+
+def test_reusable_audio_requires_matching_hash(tmp_path):
+    """只有页面中已加载音频的哈希与本次文件一致时才复用，且需要开启缓存"""
+    file_path = tmp_path / "voice.wav"
+    touch(file_path, b"audio")
+    config = {
+        "browser": {"reference_audio_cache": True},
+        "audio_files": [{"upload_selector": ".upload", "file_path": str(file_path)}]
+    }
+    session = {"loaded_audio": {".upload": automation.get_file_sha256(str(file_path))}}
+
+    assert automation.get_reusable_audio_selectors(session, config) == {".upload"}
+    assert automation.get_reusable_audio_selectors({"loaded_audio": {".upload": "other"}}, config) == set()
+
+    config["browser"]["reference_audio_cache"] = False
+    assert automation.get_reusable_audio_selectors(session, config) == set()
+
+def test_temp_gc_keeps_reused_reference_upload(tmp_path):
+    """页面中仍在复用的参考音频上传文件夹过期后也不被清理，不再复用后才删除"""
+    reference = tmp_path / "voice.wav"
+    touch(reference, b"reference-audio")
+    temp_dir = tmp_path / "gradio"
+    for name, content in (("upload", b"reference-audio"), ("output", b"old-output")):
+        folder = temp_dir / name
+        folder.mkdir(parents=True)
+        (folder / "audio.wav").write_bytes(content)
+        os.utime(folder, (1, 1))
+
+    automation.browser_sessions["test"] = {"loaded_audio": {".upload": automation.get_file_sha256(str(reference))}}
+    try:
+        assert automation.run_temp_gc_pass(str(temp_dir), {"ttl": 60}) == 1
+        assert sorted(os.listdir(temp_dir)) == ["upload"]
+
+        automation.browser_sessions["test"]["loaded_audio"].clear()
+        assert automation.run_temp_gc_pass(str(temp_dir), {"ttl": 60}) == 1
+        assert os.listdir(temp_dir) == []
+    finally:
+        automation.browser_sessions.pop("test", None)
+        index = automation.temp_dir_indexes.pop((str(temp_dir), "audio.wav"), None)
+        if index:
+            index.close()
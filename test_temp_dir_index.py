@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+临时目录索引测试
+测试 TempDirIndex 对输出文件夹的增量记录和最新输出音频的维护
+"""
+
+import os
+import time
+
+import pytest
+
+import input_textarea_win as automation
+
+@pytest.fixture
+def index(tmp_path):
+    """在空的临时目录上建立索引"""
+    temp_index = automation.TempDirIndex(str(tmp_path))
+    yield temp_index
+    temp_index.close()
+
+def make_output(tmp_path, name, mtime, with_audio=True):
+    """创建一个输出文件夹，并设置文件夹的修改时间"""
+    folder = tmp_path / name
+    folder.mkdir()
+    if with_audio:
+        (folder / "audio.wav").write_bytes(b"RIFF")
+    os.utime(folder, (mtime, mtime))
+    return folder
+
+def test_newest_audio_tracks_latest_folder(tmp_path, index):
+    """最新的输出音频来自修改时间最新、且已有audio.wav的文件夹"""
+    now = time.time()
+    make_output(tmp_path, "old", now - 100)
+    newest = make_output(tmp_path, "new", now)
+    make_output(tmp_path, "pending", now + 10, with_audio=False)
+    index.rescan()
+
+    assert index.newest_audio_since(now - 5) == str(newest / "audio.wav")
+    assert index.newest_audio_since(now + 60) is None
+    assert index.latest_folder()[0] == "pending"
+
+def test_folder_gets_audio_later(tmp_path, index):
+    """文件夹先出现、音频后写入时，重新扫描会补充记录"""
+    now = time.time()
+    folder = make_output(tmp_path, "job", now, with_audio=False)
+    index.rescan()
+    assert index.newest_audio_since(now - 5) is None
+
+    (folder / "audio.wav").write_bytes(b"RIFF")
+    os.utime(folder, (now, now))
+    index.rescan()
+    assert index.newest_audio_since(now - 5) == str(folder / "audio.wav")
+
+def test_removed_newest_folder_falls_back(tmp_path, index):
+    """最新文件夹被删除或遗忘后，回退到次新的文件夹"""
+    now = time.time()
+    older = make_output(tmp_path, "older", now - 1)
+    make_output(tmp_path, "newer", now)
+    index.rescan()
+
+    index.forget("newer")
+    assert index.newest_audio_since(now - 5) == str(older / "audio.wav")
+    index.forget("older")
+    assert index.newest_audio_since(0) is None
+
+def test_update_picks_up_new_folders(tmp_path, index):
+    """update 通过 inotify 事件（或重新扫描）发现新的输出文件"""
+    start = time.time()
+    folder = tmp_path / "fresh"
+    folder.mkdir()
+    (folder / "audio.wav").write_bytes(b"RIFF")
+
+    deadline = time.monotonic() + 5
+    while index.newest_audio_since(start) is None and time.monotonic() < deadline:
+        index.update(0.1)
+    assert index.newest_audio_since(start) == str(folder / "audio.wav")
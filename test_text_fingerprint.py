@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文本指纹测试
+text_fingerprint 需要与 BULK_INPUT_SCRIPT 在浏览器中按 UTF-16 码元计算的结果一致
+"""
+
+import input_textarea_win as automation
+
+def test_ascii_matches_fnv1a_reference_values():
+    """ASCII 文本的 UTF-16 码元与字节相同，结果等于标准 FNV-1a 32 位测试向量"""
+    assert automation.text_fingerprint("") == (0, 0x811c9dc5)
+    assert automation.text_fingerprint("a") == (1, 0xe40c292c)
+    assert automation.text_fingerprint("foobar") == (6, 0xbf9cf968)
+
+def test_length_counts_utf16_code_units():
+    """长度按 JavaScript 的 String.length 计算：中文占1个码元，emoji占2个"""
+    assert automation.text_fingerprint("你好😀") == (4, 960852563)
+
+def test_line_endings_are_normalized():
+    """textarea 会把换行统一为 \\n，CRLF 和 CR 得到相同的指纹"""
+    expected = automation.text_fingerprint("第一行\n第二行\n")
+    assert automation.text_fingerprint("第一行\r\n第二行\r\n") == expected
+    assert automation.text_fingerprint("第一行\r第二行\r") == expected
+
+def test_different_text_has_different_fingerprint():
+    """内容只差一个字符时指纹不同"""
+    assert automation.text_fingerprint("语音合成测试文本。") != automation.text_fingerprint("语音合成测试文本！")
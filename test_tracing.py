@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+任务阶段追踪测试
+测试分位数计算、阶段耗时树，以及并发任务的时间戳和等待耗时互不影响
+"""
+
+import threading
+
+import pytest
+
+import input_textarea_win as automation
+
+@pytest.fixture(autouse=True)
+def quiet_tracing():
+    """不打印阶段树，并清空历史耗时"""
+    automation.configure_tracing({"print_tree": False, "summary_every": 0})
+    automation.trace_state["history"].clear()
+    yield
+    automation.trace_state["history"].clear()
+    automation.configure_tracing()
+
+def test_get_percentile_nearest_rank():
+    """最近秩法：p50/p95/p99 取排序后第 ceil(p%·n) 个值"""
+    values = list(range(1, 101))
+    assert automation.get_percentile(values, 50) == 50
+    assert automation.get_percentile(values, 95) == 95
+    assert automation.get_percentile(values, 99) == 99
+    assert automation.get_percentile([3.5], 99) == 3.5
+    assert automation.get_percentile([1, 2], 0) == 1
+
+def test_span_tree_nests_spans_under_stage_marks():
+    """trace_span 嵌套记录，并挂在下一个阶段标记之下"""
+    automation.start_job_trace("任务")
+    automation.record_timestamp("配置加载完成")
+    with automation.trace_span("音频上传A"):
+        with automation.trace_span("读取文件"):
+            pass
+    automation.record_timestamp("音频上传完成")
+    root = automation.finish_job_trace(True)
+
+    assert [span["name"] for span in root["children"]] == ["配置加载", "音频上传"]
+    upload = root["children"][1]
+    assert upload["children"][0]["name"] == "音频上传A"
+    assert upload["children"][0]["children"][0]["name"] == "读取文件"
+    assert automation.get_current_trace() is None
+
+    percentiles = automation.get_stage_percentiles()
+    assert {"配置加载", "音频上传", "音频上传A", "读取文件", "任务总耗时"} <= set(percentiles)
+    assert percentiles["任务总耗时"]["count"] == 1
+
+def test_concurrent_jobs_keep_their_own_timestamps():
+    """并发任务各自记录阶段时间戳，互不覆盖"""
+    barrier = threading.Barrier(2)
+    results = {}
+
+    def run_job(name, stage):
+        automation.start_job_trace(name)
+        barrier.wait()
+        automation.record_timestamp(stage)
+        barrier.wait()
+        automation.finish_job_trace(True)
+        results[name] = automation.trace_state["local"].last_trace["timestamps"]
+
+    threads = [
+        threading.Thread(target=run_job, args=("任务A", "文本输入完成")),
+        threading.Thread(target=run_job, args=("任务B", "按钮点击完成"))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert "文本输入完成" in results["任务A"] and "按钮点击完成" not in results["任务A"]
+    assert "按钮点击完成" in results["任务B"] and "文本输入完成" not in results["任务B"]
+    assert {"任务开始", "任务结束"} <= set(results["任务A"])
+
+def test_wait_times_are_reset_per_job():
+    """条件等待耗时记在当前任务上，下一轮重新开始统计"""
+    automation.start_job_trace("第 1 轮")
+    automation.wait_for_condition(object(), "页面就绪", lambda driver: True, 1)
+    automation.wait_for_condition(object(), "页面就绪", lambda driver: True, 1)
+    first = automation.get_current_trace()["wait_times"]
+    automation.finish_job_trace(True)
+    assert list(first) == ["页面就绪"]
+
+    automation.start_job_trace("第 2 轮")
+    assert automation.get_current_trace()["wait_times"] == {}
+    automation.finish_job_trace(True)
+
+def test_timing_summary_covers_program_start_and_end(capsys):
+    """单次执行模式的任务从程序启动追踪到程序结束，摘要中各阶段都有时间戳"""
+    automation.start_job_trace("单次任务")
+    automation.record_timestamp("程序启动")
+    automation.record_timestamp("配置加载完成")
+    automation.record_timestamp("临时目录清空完成")
+    automation.record_timestamp("程序结束")
+    automation.finish_job_trace(True)
+    capsys.readouterr()
+
+    automation.print_timing_summary()
+    output = capsys.readouterr().out
+    assert "程序启动 -> 配置加载完成" in output
+    assert "配置加载完成 -> 临时目录清空完成" in output
+    assert "临时目录清空完成 -> 浏览器启动完成" not in output
+    assert "总耗时" in output
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式上传测试
+测试 MultipartFileStream 的长度与请求体，以及断点续传创建失败时回退为 multipart 上传
+"""
+
+import email.parser
+import os
+
+import pytest
+
+import input_textarea_win as automation
+
+class FakeResponse:
+    """只提供状态码、响应头和JSON的假响应"""
+
+    def __init__(self, status_code, headers=None, data=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.data = data
+
+    def json(self):
+        if self.data is None:
+            raise ValueError("no json")
+        return self.data
+
+@pytest.fixture(autouse=True)
+def reset_upload_state():
+    """每个测试重新检测服务端是否支持断点续传"""
+    automation.upload_state["resumable_supported"] = None
+    automation.upload_state["sessions"].clear()
+    yield
+    automation.upload_state["resumable_supported"] = None
+    automation.upload_state["sessions"].clear()
+
+def read_all(stream, size):
+    """按固定大小读完整个请求体"""
+    body = b""
+    while True:
+        data = stream.read(size)
+        if not data:
+            return body
+        body += data
+
+@pytest.mark.parametrize("read_size", [1, 7, 64, 1024 * 1024])
+def test_multipart_length_matches_body(tmp_path, read_size):
+    """无论每次读取多少字节，请求体总长度都等于 Content-Length"""
+    file_path = tmp_path / "audio.wav"
+    file_path.write_bytes(os.urandom(5000))
+
+    with automation.MultipartFileStream(str(file_path), {"description": "测试", "folder": 4}, chunk_size=512) as stream:
+        body = read_all(stream, read_size)
+        assert len(body) == len(stream)
+
+def test_multipart_body_is_parseable(tmp_path):
+    """请求体是合法的 multipart/form-data：表单字段和文件内容都能解析出来"""
+    file_path = tmp_path / "audio.wav"
+    file_content = os.urandom(3000)
+    file_path.write_bytes(file_content)
+    progress = []
+
+    with automation.MultipartFileStream(str(file_path), {"description": "测试文件", "folder": 4}, chunk_size=1000,
+                                        progress_callback=lambda sent, total: progress.append((sent, total)),
+                                        file_name="output.wav") as stream:
+        body = read_all(stream, 1000)
+        content_type = stream.content_type
+
+    message = email.parser.BytesParser().parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+    parts = {part.get_param("name", header="content-disposition"): part for part in message.get_payload()}
+    assert parts["description"].get_payload(decode=True).decode("utf-8") == "测试文件"
+    assert parts["folder"].get_payload(decode=True) == b"4"
+    assert parts["file"].get_filename() == "output.wav"
+    assert parts["file"].get_payload(decode=True) == file_content
+    assert progress[-1] == (len(body), len(body))
+
+def test_resumable_offset_from_header_or_json():
+    """偏移优先读取 Upload-Offset 响应头，其次读取JSON中的offset"""
+    assert automation.get_resumable_offset(FakeResponse(200, {"Upload-Offset": "42"})) == 42
+    assert automation.get_resumable_offset(FakeResponse(200, data={"offset": 7})) == 7
+    assert automation.get_resumable_offset(FakeResponse(200)) is None
+
+@pytest.mark.parametrize("status_code", [400, 403, 404, 413, 501])
+def test_rejected_resumable_create_falls_back_to_multipart(tmp_path, monkeypatch, status_code):
+    """服务端拒绝创建断点续传会话时返回None（改用multipart上传），并在本进程内不再尝试"""
+    file_path = tmp_path / "audio.wav"
+    file_path.write_bytes(b"x" * 100)
+    monkeypatch.setattr(automation.http_client, "post", lambda *args, **kwargs: FakeResponse(status_code))
+
+    result = automation.upload_file_resumable(str(file_path), "测试", 4, "http://upload", {}, 1024, 5)
+
+    assert result is None
+    assert automation.upload_state["resumable_supported"] is False
+
+def test_server_error_on_resumable_create_falls_back_once(tmp_path, monkeypatch):
+    """服务端错误时本次改用multipart上传，但之后仍会尝试断点续传"""
+    file_path = tmp_path / "audio.wav"
+    file_path.write_bytes(b"x" * 100)
+    monkeypatch.setattr(automation.http_client, "post", lambda *args, **kwargs: FakeResponse(500))
+
+    result = automation.upload_file_resumable(str(file_path), "测试", 4, "http://upload", {}, 1024, 5)
+
+    assert result is None
+    assert automation.upload_state["resumable_supported"] is None
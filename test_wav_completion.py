@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+WAV 写入完成判定测试
+测试 is_valid_wav_file 对完整文件、写入中的文件和非WAV文件的判断
+"""
+
+import struct
+import wave
+
+import input_textarea_win as automation
+
+def write_wav(file_path, frames=1000):
+    """写入一个单声道16位的静音WAV"""
+    with wave.open(str(file_path), 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(16000)
+        wav_file.writeframes(b'\x00\x00' * frames)
+
+def test_complete_wav_is_valid(tmp_path):
+    """完整写入的WAV文件头有效"""
+    file_path = tmp_path / "audio.wav"
+    write_wav(file_path)
+    assert automation.is_valid_wav_file(str(file_path))
+
+def test_wav_without_backfilled_riff_size_is_invalid(tmp_path):
+    """RIFF长度尚未回填（写入过程中）的文件无效"""
+    file_path = tmp_path / "audio.wav"
+    write_wav(file_path)
+    data = bytearray(file_path.read_bytes())
+    data[4:8] = struct.pack('<I', 0)
+    file_path.write_bytes(bytes(data))
+    assert not automation.is_valid_wav_file(str(file_path))
+
+def test_truncated_wav_is_invalid(tmp_path):
+    """data块超出文件末尾的文件无效"""
+    file_path = tmp_path / "audio.wav"
+    write_wav(file_path)
+    data = file_path.read_bytes()[:-100]
+    # RIFF长度与截断后的文件一致，但data块长度仍指向原来的末尾
+    data = data[:4] + struct.pack('<I', len(data) - 8) + data[8:]
+    file_path.write_bytes(data)
+    assert not automation.is_valid_wav_file(str(file_path))
+
+def test_short_or_foreign_files_are_invalid(tmp_path):
+    """过短的文件、非WAV文件和不存在的文件无效"""
+    short_file = tmp_path / "short.wav"
+    short_file.write_bytes(b"RIFF")
+    text_file = tmp_path / "text.wav"
+    text_file.write_bytes(b"x" * 100)
+    assert not automation.is_valid_wav_file(str(short_file))
+    assert not automation.is_valid_wav_file(str(text_file))
+    assert not automation.is_valid_wav_file(str(tmp_path / "missing.wav"))
@@ -1,4 +1,4 @@
-import requests
+import http_client
 
 url_base = 'http://39.105.213.3'
 #url_base = 'http://127.0.0.1:8000'
@@ -14,18 +14,18 @@ def upload_file(file_path, description):
             'description': description,
             'folder': 4  # 文件夹ID
         }
-        response = requests.post(url, files=files, data=data)
+        response = http_client.post(url, endpoint='upload', files=files, data=data)
         print(response.json())
 
 def clear_folder(folder_id):
     url = url_base + '/api/folders/clear/' + str(folder_id) + '/'
-    response = requests.post(url)
+    response = http_client.post(url)
     print(response.json())
 
 def download_audio_files(folder_id):
     #获取指定文件夹下的所有文件
     url = url_base + '/api/folders/' + str(folder_id) + '/files/?all=true'
-    response = requests.get(url)
+    response = http_client.get(url)
     files = response.json()
     files_list = files.get("data", {}).get("files", [])
     for file in files_list: